@@ -0,0 +1,46 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Time to resolve a request - URL, method and headers for Contacts/Get - with nested lookups in config.yaml, formatting
+BaseUrl and encoding the API key on every call as get_json did, and with the client's EndpointRegistry and headers.
+
+    python benchmarks/endpoint_lookup.py [calls]
+"""
+
+from __future__ import print_function
+
+import base64
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from insightly import Config, InsightlyClient  # noqa: E402
+
+
+def nested_lookup(client, contact_id):
+    uri_path = Config["Contacts"]["Endpoints"]["Get"]["Url"].format(id=contact_id)
+    method = Config["Contacts"]["Endpoints"]["Get"]["Method"]
+    url = Config["BaseUrl"].format(version_number=client.version) + uri_path
+    headers = {
+        'Content-Type': 'application/json',
+        'Authorization': "Basic {}".format(base64.b64encode(bytes("{}:".format(client.api_key), 'utf-8')).decode()),
+    }
+    return url, method, headers
+
+
+def registry_lookup(client, contact_id):
+    endpoint = client.endpoints["Contacts", "Get"]
+    return endpoint.url.format(id=contact_id), endpoint.method, client._headers
+
+
+def run(calls):
+    client = InsightlyClient('key')
+    for function in (nested_lookup, registry_lookup):
+        best = min(timeit.repeat(lambda: function(client, 1), number=calls, repeat=5))
+        print("{}: {:.2f} us per call".format(function.__name__, best / calls * 1e6))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,40 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Time of ``import insightly`` in a fresh interpreter, and the optional dependencies it loads - aiohttp and jsonpickle
+are only imported with AsyncInsightlyClient and DatetimeHandler.
+
+    python benchmarks/import_time.py [runs]
+"""
+
+from __future__ import print_function
+
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SCRIPT = """
+import sys, time
+started = time.perf_counter()
+import insightly
+elapsed = time.perf_counter() - started
+print(elapsed, *(name in sys.modules for name in ('aiohttp', 'jsonpickle', 'yaml')))
+"""
+
+
+def run(runs):
+    timings = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', _SCRIPT], cwd=ROOT, universal_newlines=True)
+        elapsed, aiohttp, jsonpickle, yaml = output.split()
+        timings.append(float(elapsed))
+    print("import insightly: median {:.1f} ms, best {:.1f} ms over {} runs".format(
+        statistics.median(timings) * 1000, min(timings) * 1000, runs))
+    print("loads aiohttp: {}, jsonpickle: {}, yaml: {}".format(aiohttp, jsonpickle, yaml))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,71 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Memory held by Contacts built from JSON, measured with tracemalloc - 100k synthetic Contacts by default, each with one
+custom field and one link. Pages of 500 records are parsed from their response text while tracing, as a listing does,
+and the records compared with keeping the parsed JSON dicts themselves.
+
+    python benchmarks/records_memory.py [records]
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from insightly import Contact  # noqa: E402
+
+PAGE_SIZE = 500
+
+CONTACT_FIELDS = ('ORGANISATION_ID', 'DEFAULT_LINKED_ORGANISATION', 'SALUTATION', 'DATE_OF_BIRTH', 'TITLE',
+                  'BACKGROUND', 'ADDRESS_MAIL_STREET', 'ADDRESS_MAIL_CITY', 'ADDRESS_MAIL_STATE',
+                  'ADDRESS_MAIL_POSTCODE', 'ADDRESS_MAIL_COUNTRY', 'ADDRESS_OTHER_STREET', 'ADDRESS_OTHER_CITY',
+                  'ADDRESS_OTHER_STATE', 'ADDRESS_OTHER_POSTCODE', 'ADDRESS_OTHER_COUNTRY', 'ASSISTANT_NAME',
+                  'PHONE_ASSISTANT', 'IMAGE_URL', 'PHONE', 'PHONE_FAX', 'PHONE_HOME', 'PHONE_MOBILE', 'PHONE_OTHER',
+                  'SOCIAL_FACEBOOK', 'SOCIAL_LINKEDIN', 'SOCIAL_TWITTER', 'VISIBLE_TEAM_ID', 'VISIBLE_USER_IDS')
+
+
+def contact_json(contact_id):
+    record = dict.fromkeys(CONTACT_FIELDS)
+    record.update({
+        'CONTACT_ID': contact_id, 'FIRST_NAME': 'First{}'.format(contact_id), 'LAST_NAME': 'Last{}'.format(contact_id),
+        'EMAIL_ADDRESS': 'contact{}@example.com'.format(contact_id), 'CAN_DELETE': True, 'CAN_EDIT': True,
+        'VISIBLE_TO': 'EVERYONE', 'OWNER_USER_ID': 1, 'DATE_CREATED_UTC': '2019-01-02 03:04:05',
+        'DATE_UPDATED_UTC': '2019-06-07 08:09:10', 'CONTACTLINKS': [], 'TAGS': [], 'DATES': [],
+        'CUSTOMFIELDS': [{'CUSTOM_FIELD_ID': 'CONTACT_FIELD_1', 'FIELD_VALUE': 'value {}'.format(contact_id)}],
+        'LINKS': [{'LINK_ID': contact_id, 'CONTACT_ID': contact_id, 'ORGANISATION_ID': 7, 'OPPORTUNITY_ID': None,
+                   'PROJECT_ID': None, 'SECOND_PROJECT_ID': None, 'SECOND_OPPORTUNITY_ID': None, 'ROLE': 'Owner',
+                   'DETAILS': None}],
+    })
+    return record
+
+
+def measure(label, pages, build):
+    tracemalloc.start()
+    started = time.perf_counter()
+    records = []
+    for text in pages:
+        records.extend(build(obj) for obj in json.loads(text))
+    elapsed = time.perf_counter() - started
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{:>14}: {:.1f} MB held, {:.1f} MB peak, built in {:.2f} s".format(label, held / 1e6, peak / 1e6, elapsed))
+    return records
+
+
+def run(count):
+    pages = [json.dumps([contact_json(i) for i in range(start, min(start + PAGE_SIZE, count + 1))])
+             for start in range(1, count + 1, PAGE_SIZE)]
+    print("{} Contacts, in pages of {}".format(count, PAGE_SIZE))
+    measure("JSON dicts", pages, lambda obj: obj)
+    measure("Contacts", pages, lambda obj: Contact.from_json(None, obj))
+    measure("lazy Contacts", pages, Contact.lazy_from_json)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
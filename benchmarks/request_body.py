@@ -0,0 +1,53 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Time to build the request body saving an Organisation - 10k synthetic Organisations by default, each with a custom
+field - with jsonpickle, as save() did (encode, parse and encode again), and with to_dict().
+
+    python benchmarks/request_body.py [records]
+"""
+
+from __future__ import print_function
+
+import datetime
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jsonpickle  # noqa: E402
+
+from insightly import CustomField, DatetimeHandler, Organisation  # noqa: E402
+
+
+def organisation(organisation_id):
+    return Organisation(None, organisation_id=organisation_id, name='Organisation {}'.format(organisation_id),
+                        background='Background of organisation {}'.format(organisation_id),
+                        phone='+44 20 7946 {:04d}'.format(organisation_id % 10000),
+                        website='https://example.com/{}'.format(organisation_id),
+                        created=datetime.datetime(2019, 1, 2, 3, 4, 5),
+                        last_updated=datetime.datetime(2019, 6, 7, 8, 9, 10),
+                        custom_fields=[CustomField(custom_field_id='ORGANISATION_FIELD_1',
+                                                   custom_field_value='value {}'.format(organisation_id))])
+
+
+def _time(function, records):
+    started = time.perf_counter()
+    for record in records:
+        function(record)
+    return time.perf_counter() - started
+
+
+def run(count):
+    jsonpickle.handlers.registry.register(datetime.datetime, DatetimeHandler)
+    records = [organisation(i) for i in range(1, count + 1)]
+    pickled = _time(lambda o: json.dumps(json.loads(jsonpickle.encode(o, unpicklable=False))), records)
+    encoded = _time(lambda o: json.dumps(o.to_dict()), records)
+    print("{} Organisations: jsonpickle encode + loads + dumps {:.2f} s, to_dict + dumps {:.2f} s ({:.1f}x)".format(
+        count, pickled, encoded, pickled / encoded))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -1,6 +1,19 @@
 # -*- coding: utf-8 -*-
 
+import importlib
+
 from .base import *
+from .config import *
+from .bulk import *
+from .cache import *
+from .conditional import *
+from .rate_limit import *
+from .retry import *
+from .circuit_breaker import *
+from .deadline import *
+from .single_flight import *
+from .endpoints import *
+from .transport import *
 from .insightly_client import *
 from .organisation import *
 from .models import *
@@ -11,3 +24,21 @@ from .custom_field import *
 from .relationship import *
 from .opportunity import *
 from .user import *
+from .sync import *
+from .store import *
+from .loader import *
+from .session import *
+
+# names imported on first use, as the optional dependencies of their modules are slow to import - aiohttp, jsonpickle
+_LAZY_NAMES = {
+    'AsyncInsightlyClient': '.async_client',
+    'DatetimeHandler': '.models',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_NAMES.get(name)
+    if module is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = globals()[name] = getattr(importlib.import_module(module, __name__), name)
+    return value
@@ -0,0 +1,457 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import asyncio
+import base64
+import json
+import logging
+from collections import deque
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency, see the "async" extra
+    aiohttp = None
+
+from insightly.contact import Contact
+from insightly.endpoints import compile_endpoints
+from insightly.helpers import parse_activity_dates
+from insightly.insightly_client import (Config, BRIEF_OMITTED_FIELDS, BRIEF_QUERY, _ABSOLUTE_URL_PREFIXES,
+                                       _listing_url, _raise_for_status)
+from insightly.opportunity import Opportunity, OpportunityCategory
+from insightly.organisation import Organisation
+from insightly.relationship import Relationship
+from insightly.user import User
+
+
+class _AsyncResponse(object):
+    """Fully read aiohttp response, exposing the attributes used by the sync client's error handling"""
+
+    def __init__(self, status_code, content, headers, request):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.request = request
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+
+class AsyncInsightlyClient(object):
+    """
+    Asyncio client for Insightly API access. Offers the same methods as InsightlyClient as coroutines, sharing a
+    single aiohttp connection pool and limiting the number of concurrent requests.
+    """
+
+    def __init__(self, api_key, version='2.3', concurrency=10, page_concurrency=4, session=None, base_url=None,
+                 lazy_dates=False, lazy_entities=False, store=None):
+        """
+        Constructor
+
+        :api_key: API key found at https://crm.na1.insightly.com/users/usersettings
+        :concurrency: maximum number of requests in flight at once
+        :page_concurrency: number of page requests kept in flight when listing all records
+        :session: optional aiohttp.ClientSession to share, otherwise one is created on first use
+        :base_url: optional override of the BaseUrl in config.yaml, e.g. for a local stub server
+        :lazy_dates: if True, record timestamps are parsed when first read instead of when each page is received
+        :lazy_entities: if True, Contacts, Organisations and Opportunities are built around their JSON, and each
+            attribute, including nested Links and Custom Fields, is only read from it when first accessed
+        :store: optional LocalStore every full page listed is written to. Saves, deletes and link changes made
+            through this client update it, or remove the records affected.
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncInsightlyClient requires aiohttp - install with: pip install insightly[async]")
+
+        self.api_key = api_key
+        self.version = version
+        self.concurrency = concurrency
+        self.page_concurrency = page_concurrency
+        self.lazy_dates = lazy_dates
+        self.lazy_entities = lazy_entities
+        self.store = store
+        if store is not None and store.client is None:
+            store.client = self
+        self.base_url = base_url if base_url else Config["BaseUrl"].format(version_number=version)
+        self.endpoints = compile_endpoints(Config, self.base_url)
+        # API Key authentication, encoded once per client
+        self._headers = {
+            'Content-Type': 'application/json',
+            'Authorization': "Basic {}".format(base64.b64encode(bytes("{}:".format(api_key), 'utf-8')).decode()),
+        }
+
+        self._session = session
+        self._owns_session = session is None
+        self._semaphore = None
+
+    @property
+    def session(self):
+        """The shared aiohttp session, created on first use inside the running event loop
+
+        :rtype: aiohttp.ClientSession
+        """
+        if self._session is None:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.concurrency))
+        return self._session
+
+    @property
+    def semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def close(self):
+        """Close the connection pool, if owned by this client"""
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def iter_contacts(self, contact_filter=None, fields=None):
+        """
+        Yields all contacts for your Insightly account, one page at a time.
+
+        :contact_filter: a Python dictionary of Search query parameters
+        :fields: optional list of the attributes to read, the others are left unset
+        :rtype: async generator of Contact
+        """
+        return self._iter_records(Contact, contact_filter, fields)
+
+    async def list_contacts(self, contact_filter=None, fields=None):
+        """
+        Returns all contacts for your Insightly account
+
+        :contact_filter: a Python dictionary of Search query parameters
+        :fields: optional list of the attributes to read, the others are left unset
+        :rtype: list of Contact
+        """
+        return [contact async for contact in self.iter_contacts(contact_filter, fields)]
+
+    async def get_contact(self, contact_id):
+        """Get contact
+
+        :rtype: Contact
+        """
+        obj = await self.get_json(self.endpoints["Contacts", "Get"].url.format(id=contact_id),
+                                  http_method=self.endpoints["Contacts", "Get"].method)
+
+        return Contact.from_json(self, obj)
+
+    async def add_contact(self, first_name, last_name, owner_user_id, **kwargs):
+        """Create Contact
+        :param first_name: First name of the Contacts to create
+        :param last_name: Last name of the Contacts to create
+        :param owner_user_id: Insightly User ID of Contact owner
+        :param kwargs: Optional additional fields - note: keys must match accepted fields, as defined in config.yaml
+        :rtype: Contact
+        """
+        post_args = self._post_args("Contacts", dict(FIRST_NAME=first_name, LAST_NAME=last_name,
+                                                     OWNER_USER_ID=owner_user_id), kwargs)
+
+        obj = await self.get_json(self.endpoints["Contacts", "Add"].url,
+                                  http_method=self.endpoints["Contacts", "Add"].method,
+                                  post_args=post_args)
+        self._record_changed("Contacts", obj["CONTACT_ID"], obj)
+        return Contact.from_json(self, json_obj=obj)
+
+    async def delete_contact(self, contact_id):
+        """Delete Contact
+        :param contact_id: ID of the Contacts to delete
+        """
+        await self.get_json(self.endpoints["Contacts", "Delete"].url.format(id=contact_id),
+                            http_method=self.endpoints["Contacts", "Delete"].method)
+        self._record_changed("Contacts", contact_id)
+        logging.info("Deleted Contact {id}".format(id=contact_id))
+        return None
+
+    def iter_opportunities(self, opportunity_filter=None, fields=None):
+        """
+        Yields all opportunities for your Insightly account, one page at a time.
+
+        :opportunity_filter: a Python dictionary of Search query parameters
+        :fields: optional list of the attributes to read, the others are left unset
+        :rtype: async generator of Opportunity
+        """
+        return self._iter_records(Opportunity, opportunity_filter, fields)
+
+    async def list_opportunities(self, opportunity_filter=None, fields=None):
+        """
+        Returns all opportunities for your Insightly account
+
+        :opportunity_filter: a Python dictionary of Search query parameters
+        :fields: optional list of the attributes to read, the others are left unset
+        :rtype: list of Opportunity
+        """
+        return [opportunity async for opportunity in self.iter_opportunities(opportunity_filter, fields)]
+
+    async def get_opportunity(self, opportunity_id):
+        """Get opportunity
+
+        :rtype: Opportunity
+        """
+        obj = await self.get_json(self.endpoints["Opportunities", "Get"].url.format(id=opportunity_id),
+                                  http_method=self.endpoints["Opportunities", "Get"].method)
+
+        return Opportunity.from_json(self, obj)
+
+    async def add_opportunity(self, name, owner_user_id, **kwargs):
+        """Create Opportunity
+        :param name: Name of the Opportunities to create
+        :param owner_user_id: Insightly User ID of Opportunity owner
+        :param kwargs: Optional additional fields - note: keys must match accepted fields, as defined in config.yaml
+        :rtype: Opportunity
+        """
+        post_args = self._post_args("Opportunities", dict(OPPORTUNITY_NAME=name, OWNER_USER_ID=owner_user_id),
+                                    kwargs)
+
+        obj = await self.get_json(self.endpoints["Opportunities", "Add"].url,
+                                  http_method=self.endpoints["Opportunities", "Add"].method,
+                                  post_args=post_args)
+        self._record_changed("Opportunities", obj["OPPORTUNITY_ID"], obj)
+        return Opportunity.from_json(self, json_obj=obj)
+
+    async def delete_opportunity(self, opportunity_id):
+        """Delete Opportunity
+        :param opportunity_id: ID of the Opportunities to delete
+        """
+        await self.get_json(self.endpoints["Opportunities", "Delete"].url.format(id=opportunity_id),
+                            http_method=self.endpoints["Opportunities", "Delete"].method)
+        self._record_changed("Opportunities", opportunity_id)
+        logging.info("Deleted Opportunity {id}".format(id=opportunity_id))
+        return None
+
+    async def list_opportunity_categories(self):
+        """
+        Returns all opportunities categories available for Insightly opportunities
+
+        :rtype: list of OpportunityCategory
+        """
+        return [OpportunityCategory.from_json(json_obj=obj)
+                async for page in self._paginate("OpportunityCategories") for obj in page]
+
+    def iter_organisations(self, organisation_filter=None, fields=None):
+        """
+        Yields all organisations for your Insightly account, one page at a time.
+
+        :organisation_filter: a Python dictionary of Search query parameters
+        :fields: optional list of the attributes to read, the others are left unset
+        :rtype: async generator of Organisation
+        """
+        return self._iter_records(Organisation, organisation_filter, fields)
+
+    async def list_organisations(self, organisation_filter=None, fields=None):
+        """
+        Returns all organisations for your Insightly account
+
+        :organisation_filter: a Python dictionary of Search query parameters
+        :fields: optional list of the attributes to read, the others are left unset
+        :rtype: list of Organisation
+        """
+        return [organisation async for organisation in self.iter_organisations(organisation_filter, fields)]
+
+    async def get_organisation(self, organisation_id):
+        """Get organisation
+
+        :rtype: Organisation
+        """
+        obj = await self.get_json(self.endpoints["Organisations", "Get"].url.format(id=organisation_id),
+                                  http_method=self.endpoints["Organisations", "Get"].method)
+
+        return Organisation.from_json(self, obj)
+
+    async def add_organisation(self, name, owner_user_id, **kwargs):
+        """Create Organisation
+        :param name: Name of the Organisations to create
+        :param owner_user_id: Insightly User ID of Organisation owner
+        :param kwargs: Optional additional fields - note: keys must match accepted fields, as defined in config.yaml
+        :rtype: Organisation
+        """
+        post_args = self._post_args("Organisations", dict(ORGANISATION_NAME=name, OWNER_USER_ID=owner_user_id),
+                                    kwargs)
+
+        obj = await self.get_json(self.endpoints["Organisations", "Add"].url,
+                                  http_method=self.endpoints["Organisations", "Add"].method,
+                                  post_args=post_args)
+        self._record_changed("Organisations", obj["ORGANISATION_ID"], obj)
+        return Organisation.from_json(self, json_obj=obj)
+
+    async def delete_organisation(self, organisation_id):
+        """Delete Organisation
+        :param organisation_id: ID of the Organisations to delete
+        """
+        await self.get_json(self.endpoints["Organisations", "Delete"].url.format(id=organisation_id),
+                            http_method=self.endpoints["Organisations", "Delete"].method)
+        self._record_changed("Organisations", organisation_id)
+        logging.info("Deleted Organisation {id}".format(id=organisation_id))
+        return None
+
+    async def list_relationships(self):
+        """
+        Returns all relationships for your Insightly account
+
+        :rtype: list of Relationship
+        """
+        json_obj = await self.get_json(self.endpoints["Relationships", "GetAll"].url,
+                                       http_method=self.endpoints["Relationships", "GetAll"].method)
+
+        return [Relationship.from_json(json_obj=obj) for obj in json_obj]
+
+    async def list_users(self):
+        """
+        Returns all users for your Insightly account
+
+        :rtype: list of User
+        """
+        json_obj = await self.get_json(self.endpoints["Users", "GetAll"].url,
+                                       http_method=self.endpoints["Users", "GetAll"].method)
+
+        return [User.from_json(self, json_obj=obj) for obj in json_obj]
+
+    def _record_changed(self, entity, record_id, json_obj=None):
+        """Replace the stored copy of a record fetched or written through this client by the JSON returned by
+        Insightly, or remove it if there is none
+
+        :entity: top level key in config.yaml e.g. Contacts
+        :record_id: the record's identifier
+        :json_obj: the record as returned by Insightly
+        """
+        if self.store is None:
+            return
+        if json_obj is None:
+            self.store.delete(entity, [record_id])
+        else:
+            self.store.put_page(entity, [json_obj])
+
+    @staticmethod
+    def _post_args(entity, post_args, kwargs):
+        for key, value in kwargs.items():
+            if key in Config[entity]["AcceptedFields"]:
+                post_args[key] = value
+            else:
+                logging.warning("Field not accepted, ignored - {}: {}".format(key, value))
+        return post_args
+
+    async def _iter_records(self, cls, search_filter=None, fields=None, updated_after=None):
+        """Yield the Contacts, Organisations or Opportunities of a listing, reading only the given fields if any and
+        only the records updated since updated_after if given
+        """
+        brief = False
+        if fields is not None:
+            cls.check_fields(fields)
+            brief = not any(field in BRIEF_OMITTED_FIELDS for field in fields)
+        pages = self._pages(cls._entity, search_filter, brief=brief, updated_after=updated_after)
+        try:
+            async for page in pages:
+                if fields is None:
+                    if self.store is not None:
+                        self.store.put_page(cls._entity, page)
+                    for obj in self._parse_dates(page):
+                        yield cls.from_json(self, json_obj=obj)
+                else:
+                    for obj in page:
+                        yield cls.project_from_json(obj, fields, client=self)
+        finally:
+            # closed at once when the caller stops early, cancelling the page requests in flight
+            await pages.aclose()
+
+    async def _pages(self, entity, search_filter=None, brief=False, updated_after=None):
+        """Yield the pages of results for an entity - every record, or a single page of Search results if a filter is
+        given
+        """
+        if not search_filter:
+            pages = self._paginate(entity, brief=brief, updated_after=updated_after)
+            try:
+                async for page in pages:
+                    yield page
+            finally:
+                await pages.aclose()
+        else:
+            if type(search_filter) != dict:
+                raise TypeError
+            query_url = self.endpoints[entity, "Search"].url
+            query_url += "&".join("{key}={value}".format(key=key, value=value)
+                                  for key, value in search_filter.items())
+            if brief:
+                query_url += BRIEF_QUERY
+            yield await self.get_json(query_url, http_method=self.endpoints[entity, "Search"].method)
+
+    def _parse_dates(self, page):
+        """Parse the timestamps of a page of records in one pass, unless they are parsed lazily"""
+        return page if self.lazy_dates or self.lazy_entities else parse_activity_dates(page)
+
+    async def _paginate(self, entity, brief=False, updated_after=None):
+        """Yield every page of the GetAll endpoint for an entity, or of the Search endpoint for the records updated
+        since updated_after, keeping up to page_concurrency requests in flight
+        """
+        endpoint = self.endpoints[entity, "GetAll"]
+        url_template = _listing_url(self.endpoints, entity, brief, updated_after)
+        top = endpoint.top
+
+        def fetch(skip):
+            return asyncio.ensure_future(self.get_json(url_template.format(skip=skip, top=top),
+                                                       http_method=endpoint.method))
+
+        pending = deque()
+        skip = 0
+        try:
+            for _ in range(self.page_concurrency):
+                pending.append(fetch(skip))
+                skip += top
+
+            while pending:
+                page = await pending.popleft()
+                if page:
+                    yield page
+                if len(page) < top:
+                    break
+                pending.append(fetch(skip))
+                skip += top
+        finally:
+            # requests still in flight are cancelled, and awaited so none outlives the listing
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def get_json(
+            self,
+            uri_path,
+            http_method='GET',
+            headers=None,
+            query_params=None,
+            post_args=None):
+        """ Get some JSON from Insightly """
+
+        # explicit values here to avoid mutable default values
+        if query_params is None:
+            query_params = dict()
+        if post_args is None:
+            post_args = dict()
+
+        data = json.dumps(post_args)
+
+        # JSON content type and API Key authentication
+        headers = dict(headers, **self._headers) if headers else self._headers
+
+        # endpoint URLs are already absolute, other paths are relative to the API root
+        if uri_path.startswith(_ABSOLUTE_URL_PREFIXES):
+            url = uri_path
+        else:
+            url = self.base_url + uri_path.lstrip('/')
+
+        async with self.semaphore:
+            async with self.session.request(http_method, url, params=query_params, headers=headers,
+                                            data=data) as http_response:
+                response = _AsyncResponse(http_response.status, await http_response.read(), http_response.headers,
+                                          http_response.request_info)
+
+        _raise_for_status(response, url)
+
+        try:
+            return json.loads(response.text)
+        except ValueError:  # Insightly API does not return JSON for all request types e.g. DELETE
+            return response.content
@@ -1,7 +1,31 @@
 # -*- coding: utf-8 -*-
 
+import copy
+from operator import attrgetter
+
+from insightly.helpers.utils import ACTIVITY_DATE_FIELDS, parse_activity_date
+
+# request body fields naming the records on either side of a link, and their config.yaml section
+_LINKED_RECORD_FIELDS = (('CONTACT_ID', "Contacts"), ('FIRST_CONTACT_ID', "Contacts"),
+                         ('SECOND_CONTACT_ID', "Contacts"), ('ORGANISATION_ID', "Organisations"),
+                         ('FIRST_ORGANISATION_ID', "Organisations"), ('SECOND_ORGANISATION_ID', "Organisations"),
+                         ('OPPORTUNITY_ID', "Opportunities"))
+
+_MISSING = object()
+
+# fields of Insightly's JSON holding a list of plain values, rather than of Links or Custom Fields
+_LIST_FIELDS = frozenset(('TAGS', 'DATES', 'EMAILDOMAINS', 'VISIBLE_USER_IDS'))
+
+# fingerprint of an empty list, shared by the snapshots of all records
+_EMPTY_FINGERPRINT = hash(())
+
+# how _update_from_json compares each kind of attribute
+_PLAIN, _TIMESTAMP, _NESTED = range(3)
+
 
 class InsightlyBase(object):
+    __slots__ = ()
+
     def __init__(self):
         self.id = None
 
@@ -13,3 +37,360 @@ class InsightlyBase(object):
         if isinstance(other, type(self)):
             return hash(self) == hash(other)
         raise NotImplementedError
+
+
+def record_slots(attributes):
+    """Return the __slots__ for a record's attributes - timestamps are stored under a private name, read through a
+    LazyActivityDate
+
+    :rtype: tuple
+    """
+    return tuple('_' + name if name in ACTIVITY_DATE_FIELDS else name for name in attributes)
+
+
+def _nested_matches(items, json_items):
+    # nested Links and Custom Fields compared with their JSON, attribute by attribute
+    if not isinstance(items, list) or not isinstance(json_items, list) or len(items) != len(json_items):
+        return items == json_items
+    for item, json_item in zip(items, json_items):
+        for key, value in json_item.items():
+            if getattr(item, key, _MISSING) != value:
+                return False
+    return True
+
+
+def _frozen(value):
+    # hashable copy of a value, nested Links and Custom Fields reduced to their attributes
+    if isinstance(value, InsightlyRecord):
+        state = value._state(value)
+        try:
+            hash(state)
+        except TypeError:
+            return tuple(_frozen(item) for item in state)
+        return state
+    if isinstance(value, dict):
+        return tuple(sorted((key, _frozen(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_frozen(item) for item in value)
+    return value
+
+
+def _fingerprints(values, positions):
+    # compact stand-ins for attribute values, kept to find the attributes changed - plain values as they are, the
+    # lists at the given positions by a hash of their contents
+    values = list(values)
+    for position in positions:
+        value = values[position]
+        if isinstance(value, list):
+            values[position] = hash(_frozen(value)) if value else _EMPTY_FINGERPRINT
+    return tuple(values)
+
+
+def _detached(value):
+    # lists such as TAGS are copied onto a record, so changing them in place leaves the JSON it is compared with as is
+    if isinstance(value, (list, dict)):
+        return copy.deepcopy(value) if value else type(value)()
+    return value
+
+
+def _read_field(name):
+    def read(json_obj):
+        try:
+            return _detached(json_obj[name])
+        except KeyError:
+            raise AttributeError(name)
+    return read
+
+
+def _read_timestamp(name):
+    def read(json_obj):
+        timestamp = json_obj.get(name)
+        if not timestamp:  # as for eagerly built records, an empty timestamp leaves the attribute unset
+            raise AttributeError(name)
+        return timestamp
+    return read
+
+
+def _read_nested(name, from_json):
+    def read(json_obj):
+        try:
+            return [from_json(obj) for obj in json_obj[name]]
+        except KeyError:
+            raise AttributeError(name)
+    return read
+
+
+def _tuple_getter(names):
+    # function returning a record's attributes as a tuple, those not set as _MISSING
+    read = attrgetter(*names) if len(names) > 1 else (lambda record: (getattr(record, names[0]),)) if names else \
+        (lambda record: ())
+
+    def get(record):
+        try:
+            return read(record)
+        except AttributeError:
+            return tuple(getattr(record, name, _MISSING) for name in names)
+    return get
+
+
+class InsightlyRecord(InsightlyBase):
+    """
+    Base class for the Insightly objects held in bulk - Contacts, Organisations, Opportunities and the Links and
+    Custom Fields nested in them. Each subclass lists its attributes in ``_attributes`` and stores them in
+    ``__slots__ = record_slots(_attributes)``, so instances carry no per-instance __dict__ unless some other attribute
+    is set on them.
+
+    A record can also be built lazily around its raw JSON with ``lazy_from_json``: each attribute is then read from the
+    JSON the first time it is accessed, building nested objects listed in ``_nested`` only at that point. A record
+    built eagerly keeps a snapshot of its attributes instead, the values themselves or a hash of lists, to find those
+    changed before saving.
+    """
+
+    __slots__ = ('id', '_json', '_snapshot', '_marked', '__dict__')
+
+    _attributes = ()
+
+    # attributes holding a list of nested objects, and the from_json building each one
+    _nested = {}
+    _hydrators = {}
+    _refreshed = ()
+    _compared = ()
+    _list_positions = ()
+    _read_compared = staticmethod(lambda record: ())
+    _state = staticmethod(lambda record: ())
+
+    def __init_subclass__(cls, **kwargs):
+        super(InsightlyRecord, cls).__init_subclass__(**kwargs)
+        hydrators = dict()
+        for name in cls._attributes:
+            if name in ACTIVITY_DATE_FIELDS:
+                hydrators['_' + name] = _read_timestamp(name)
+            elif name in cls._nested:
+                hydrators[name] = _read_nested(name, cls._nested[name])
+            else:
+                hydrators[name] = _read_field(name)
+        cls._hydrators = hydrators
+        cls._refreshed = tuple((name, '_' + name, _TIMESTAMP) if name in ACTIVITY_DATE_FIELDS else
+                               (name, name, _NESTED if name in cls._nested else _PLAIN)
+                               for name in cls._attributes if name != 'client')
+        # attributes changed_fields compares, timestamps being set by Insightly, and a function reading them at once
+        cls._compared = tuple(field for field in cls._refreshed if field[2] is not _TIMESTAMP)
+        cls._read_compared = staticmethod(_tuple_getter(tuple(storage_name for _, storage_name, _ in cls._compared)))
+        cls._list_positions = tuple(position for position, (name, _, kind) in enumerate(cls._compared)
+                                    if kind is _NESTED or name in _LIST_FIELDS)
+        cls._state = staticmethod(_tuple_getter(cls._attributes))
+
+    @classmethod
+    def lazy_from_json(cls, json_obj, **attributes):
+        """Build a record around its raw JSON, reading each attribute from it on first access
+
+        :json_obj: the record's JSON object
+        :attributes: attributes set straight away e.g. client
+        """
+        record = cls.__new__(cls)
+        record.id = None
+        record._json = json_obj
+        for name, value in attributes.items():
+            setattr(record, name, value)
+        return record
+
+    @classmethod
+    def check_fields(cls, fields):
+        """Raise a ValueError unless every field is an attribute of this record type"""
+        unknown = [field for field in fields if field not in cls._attributes or field == 'client']
+        if unknown:
+            raise ValueError("Unknown {} fields: {}".format(cls.__name__, ", ".join(unknown)))
+
+    @classmethod
+    def project_from_json(cls, json_obj, fields, **attributes):
+        """Build a record holding only some of its attributes, read from its JSON - the others are left unset and the
+        JSON is not kept. Such a record cannot be saved until fetched, as an update replaces the whole record
+
+        :json_obj: the record's JSON object
+        :fields: the attributes to read e.g. ["CONTACT_ID", "FIRST_NAME"]
+        :attributes: attributes set straight away e.g. client
+        """
+        record = cls.__new__(cls)
+        record.id = None
+        record._snapshot = None  # no snapshot of the fields not read
+        for name, value in attributes.items():
+            setattr(record, name, value)
+        hydrators = cls._hydrators
+        for field in fields:
+            if field in ACTIVITY_DATE_FIELDS:
+                field = '_' + field
+            try:
+                setattr(record, field, hydrators[field](json_obj))
+            except AttributeError:
+                pass
+        return record
+
+    def __getattr__(self, name):
+        # only reached for attributes not set yet - read them from the JSON of a lazily built record
+        hydrate = self._hydrators.get(name)
+        if hydrate is None:
+            raise AttributeError(name)
+        try:
+            json_obj = object.__getattribute__(self, '_json')
+        except AttributeError:
+            raise AttributeError(name)
+        value = hydrate(json_obj)
+        setattr(self, name, value)
+        return value
+
+    def _update_from_json(self, json_obj):
+        """Apply a record received from Insightly to this object in place, setting only the attributes whose value
+        changed. Attributes missing from the JSON are left as they are; those of a lazily built record not read yet are
+        left to be read from the new JSON.
+
+        :json_obj: the record's JSON object
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
+        changed = set()
+        getattribute = object.__getattribute__
+        try:
+            old_json = getattribute(self, '_json')
+        except AttributeError:
+            old_json = None
+        for name, storage_name, kind in self._refreshed:
+            try:
+                value = json_obj[name]
+            except KeyError:
+                continue
+            try:
+                current = getattribute(self, storage_name)
+            except AttributeError:
+                if old_json is not None:
+                    # not read yet from a lazily built record, it will be read from the new JSON
+                    if old_json.get(name) != value:
+                        changed.add(name)
+                    continue
+                current = _MISSING
+            if kind is _PLAIN:
+                if current is not _MISSING and current == value:
+                    continue
+            elif kind is _TIMESTAMP:
+                if not value:  # as for eagerly built records, an empty timestamp leaves the attribute unset
+                    continue
+                value = parse_activity_date(value)
+                if current is not _MISSING and current is not None and parse_activity_date(current) == value:
+                    continue
+            else:
+                if current is not _MISSING and _nested_matches(current, value):
+                    continue
+                value = self._hydrators[storage_name](json_obj)
+            setattr(self, storage_name, _detached(value) if kind is _PLAIN else value)
+            changed.add(name)
+        if old_json is None:
+            self._keep_snapshot()
+        else:
+            self._json = json_obj
+        self._marked = ()
+        return changed
+
+    def _keep_snapshot(self):
+        """Keep a snapshot of the attributes of a record built eagerly from Insightly's JSON, to find those changed
+        before saving - a tuple of their values, lists such as TAGS and nested Links being reduced to a hash of their
+        contents, so changes made to them in place are seen too
+        """
+        self._snapshot = _fingerprints(self._read_compared(self), self._list_positions)
+
+    def changed_fields(self):
+        """Return the attributes changed since this record was received from Insightly, found by comparing them with the
+        snapshot kept by an eagerly built record, or with the JSON a lazily built one reads from. Links and Custom
+        Fields are compared item by item.
+
+        :return: the names of the changed attributes, or None for a record not built from Insightly's JSON
+        :rtype: set
+        """
+        getattribute = object.__getattribute__
+        changed = set(getattr(self, '_marked', ()))
+        try:
+            json_obj = getattribute(self, '_json')
+        except AttributeError:
+            try:
+                snapshot = getattribute(self, '_snapshot')
+            except AttributeError:
+                return None
+            if snapshot is None:  # a record read with only some of its fields
+                return None
+            current = _fingerprints(self._read_compared(self), self._list_positions)
+            if current != snapshot:
+                changed.update(name for (name, _, _), value, kept in zip(self._compared, current, snapshot)
+                               if value != kept)
+            return changed
+        for name, storage_name, kind in self._compared:
+            try:
+                current = getattribute(self, storage_name)
+            except AttributeError:  # not read yet from a lazily built record
+                continue
+            value = json_obj.get(name, _MISSING)
+            if kind is _NESTED:
+                if not _nested_matches(current, value):
+                    changed.add(name)
+            elif current != value:
+                changed.add(name)
+        return changed
+
+    def _needs_update(self):
+        """Return False when a record received from Insightly is unchanged, so saving it sends nothing. Raises
+        ValueError for a record read with only some of its fields, as an update would clear the others in Insightly.
+
+        :rtype: bool
+        """
+        if getattr(self, '_snapshot', _MISSING) is None:
+            raise ValueError("{} {} was read with only some of its fields, fetch() it before saving".format(
+                type(self).__name__, getattr(self, self._id_field, None)))
+        changed = self.changed_fields()
+        return changed is None or bool(changed)
+
+    def mark_changed(self, *names):
+        """Have changed_fields() report attributes, and the next save() send the record, whether or not they differ
+        from those received
+
+        :names: the attribute names
+        """
+        self._marked = tuple(set(getattr(self, '_marked', ())).union(names))
+
+    def _asdict(self):
+        """Return the attributes set on this object, including any set outside ``_attributes``
+
+        :rtype: dict
+        """
+        state = dict()
+        for name in ('id',) + self._attributes:
+            try:
+                state[name] = getattr(self, name)
+            except AttributeError:
+                pass
+        state.update(self.__dict__)
+        return state
+
+    def __setstate__(self, state):
+        self.id = None
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def _changed(self, json_obj=None):
+        """Tell the client this Contact, Organisation or Opportunity was fetched or written, so any cached copy is
+        replaced by the JSON returned by Insightly or dropped
+
+        :json_obj: the record as returned by Insightly, if any
+        """
+        record_changed = getattr(self.client, '_record_changed', None)
+        if record_changed is not None:
+            record_changed(self._entity, getattr(self, self._id_field), json_obj)
+
+    def _links_changed(self, post_args):
+        """Tell the client the records on both sides of a link added or updated were changed
+
+        :post_args: the request body of the link
+        """
+        record_changed = getattr(self.client, '_record_changed', None)
+        if record_changed is None:
+            return
+        record_changed(self._entity, getattr(self, self._id_field))
+        for field, entity in _LINKED_RECORD_FIELDS:
+            if post_args.get(field) is not None:
+                record_changed(entity, post_args[field])
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+from concurrent.futures import ThreadPoolExecutor
+
+from insightly.compat import force_str
+from insightly.deadline import current_deadline, use_deadline
+
+
+class BulkResult(object):
+    """
+    Outcome of a single item in a bulk operation - either the resulting record ID, or the exception raised while
+    processing the item.
+    """
+
+    def __init__(self, item, id=None, exception=None):
+        self.item = item
+        self.id = id
+        self.exception = exception
+
+    @property
+    def ok(self):
+        return self.exception is None
+
+    def __repr__(self):
+        if self.ok:
+            return force_str(u'<BulkResult {} ok>'.format(self.id))
+        return force_str(u'<BulkResult {!r} failed: {}>'.format(self.item, self.exception))
+
+
+def run_bulk(operation, items, max_workers=8):
+    """Apply an operation to every item on a worker pool, collecting a result per item rather than stopping at the
+    first failure. Workers run under the caller's deadline, so items left once it passes fail with DeadlineExceeded
+
+    :operation: callable taking an item and returning the resulting record ID
+    :items: iterable of items to process
+    :max_workers: size of the worker pool
+    :return: a result for every item, in input order
+    :rtype: list of BulkResult
+    """
+
+    deadline = current_deadline()
+
+    def run(item):
+        try:
+            with use_deadline(deadline):
+                return BulkResult(item, id=operation(item))
+        except Exception as e:
+            return BulkResult(item, exception=e)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(run, items))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class RecordCache(object):
+    """
+    Bounded LRU cache of records by entity and ID, for the client's read-through get_contact, get_organisation and
+    get_opportunity. Each entry expires ``ttl`` seconds after it is stored, unless its entity has its own TTL. Thread
+    safe.
+
+    Any object with the same ``get``, ``put`` and ``invalidate`` methods can be given to the client instead.
+    """
+
+    def __init__(self, max_size=1024, ttl=60, entity_ttls=None, clock=time.monotonic):
+        """
+        :max_size: number of records kept, the least recently used being evicted first
+        :ttl: seconds a record is served from the cache
+        :entity_ttls: TTL per config.yaml section, overriding ttl e.g. {"Organisations": 600}
+        :clock: monotonic clock returning seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entity_ttls = dict(entity_ttls or {})
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, entity, record_id):
+        """Return a cached record, or None if it is not cached or has expired
+
+        :entity: top level key in config.yaml e.g. Contacts
+        :record_id: the record's identifier
+        """
+        key = (entity, record_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, entity, record_id, value):
+        """Cache a record, evicting the least recently used records beyond max_size"""
+        key = (entity, record_id)
+        expires = self._clock() + self.entity_ttls.get(entity, self.ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, entity, record_id=None):
+        """Drop a cached record, or every record of the entity if no ID is given"""
+        with self._lock:
+            if record_id is not None:
+                self._entries.pop((entity, record_id), None)
+            else:
+                for key in [key for key in self._entries if key[0] == entity]:
+                    del self._entries[key]
+
+    def clear(self):
+        """Drop every cached record, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        """Hit and miss counts, and the number of records cached
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
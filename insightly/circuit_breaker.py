@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import threading
+import time
+
+from insightly.exceptions import CircuitOpen
+
+# circuit breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker shared by all threads using one InsightlyClient. After ``failure_threshold`` consecutive failed
+    requests - a connection error, a timeout or a 5xx response - the circuit opens, and requests fail at once with
+    CircuitOpen rather than each waiting on an unavailable backend. After ``reset_timeout`` seconds the circuit is
+    half open: up to ``half_open_max_calls`` probe requests are let through, one success closing the circuit and one
+    failure opening it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, half_open_max_calls=1, clock=time.monotonic):
+        """
+        :failure_threshold: number of consecutive failures opening the circuit
+        :reset_timeout: seconds the circuit stays open before probe requests are let through
+        :half_open_max_calls: number of probe requests in flight at once while half open
+        :clock: monotonic clock returning seconds
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.opened = 0
+        self.rejected = 0
+
+    def _current_state(self):
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    @property
+    def state(self):
+        """State of the circuit - CLOSED, OPEN or HALF_OPEN
+
+        :rtype: str
+        """
+        with self._lock:
+            return self._current_state()
+
+    def stats(self):
+        """Return the state of the circuit for health checks
+
+        :return: state, consecutive failures, number of times opened, requests rejected, and seconds until probe
+            requests are let through while open
+        :rtype: dict
+        """
+        with self._lock:
+            state = self._current_state()
+            retry_after = max(0.0, self._opened_at + self.reset_timeout - self._clock()) if state == OPEN else 0.0
+            return dict(state=state, failures=self._failures, opened=self.opened, rejected=self.rejected,
+                        retry_after=retry_after)
+
+    def before_request(self):
+        """Admit a request, or raise CircuitOpen while the circuit is open or its probes are in flight"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return
+            self.rejected += 1
+            raise CircuitOpen(max(0.0, self._opened_at + self.reset_timeout - self._clock()))
+
+    def record(self, response=None, exception=None):
+        """Record the outcome of a request admitted
+
+        :response: the response received, if any
+        :exception: the error raised by the HTTP service, if no response was received
+        """
+        failed = exception is not None or response.status_code >= 500
+        with self._lock:
+            state = self._current_state()
+            if not failed:
+                self._failures = 0
+                if state == HALF_OPEN:
+                    self._state = CLOSED
+                return
+            self._failures += 1
+            if state == HALF_OPEN or (state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self.opened += 1
+
+    def reset(self):
+        """Close the circuit"""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import datetime
+import threading
+from collections import OrderedDict
+from email.utils import format_datetime
+
+from insightly.helpers import parse_activity_date
+
+# response status meaning the copy held is still current
+NOT_MODIFIED = 304
+
+
+class Validator(object):
+    """
+    What is known of a record last received: its ETag and Last-Modified headers, or failing those its
+    DATE_UPDATED_UTC, and its body.
+    """
+
+    __slots__ = ('etag', 'last_modified', 'body')
+
+    def __init__(self, etag=None, last_modified=None, body=None):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = body
+
+    def headers(self):
+        """Return the headers making a request conditional on the record having changed
+
+        :rtype: dict
+        """
+        headers = dict()
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+def _http_date(timestamp):
+    """Format a DATE_UPDATED_UTC timestamp as an HTTP date"""
+    date = parse_activity_date(timestamp)
+    return format_datetime(date.replace(tzinfo=datetime.timezone.utc), usegmt=True)
+
+
+class ValidatorCache(object):
+    """
+    Bounded LRU map from record URL to Validator, letting the client send conditional GETs for records it has already
+    received and reuse the body it holds when Insightly answers 304 Not Modified. Only single records are remembered,
+    not listings. Thread safe.
+    """
+
+    def __init__(self, max_size=1024):
+        """
+        :max_size: number of records remembered, the least recently used being forgotten first
+        """
+        self.max_size = max_size
+        self._validators = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """Return the Validator of the record at url, or None
+
+        :rtype: Validator
+        """
+        with self._lock:
+            validator = self._validators.get(url)
+            if validator is not None:
+                self._validators.move_to_end(url)
+            return validator
+
+    def remember(self, url, response, json_obj):
+        """Keep the validators and body of a record received
+
+        :url: the record's URL
+        :response: the HTTP response
+        :json_obj: the response body, parsed
+        """
+        if not isinstance(json_obj, dict):
+            return
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            timestamp = json_obj.get('DATE_UPDATED_UTC')
+            if not timestamp:
+                return
+            last_modified = _http_date(timestamp)
+        validator = Validator(etag, last_modified, response.text)
+        with self._lock:
+            self._validators[url] = validator
+            self._validators.move_to_end(url)
+            while len(self._validators) > self.max_size:
+                self._validators.popitem(last=False)
+
+    def forget(self, url):
+        """Forget the record at url"""
+        with self._lock:
+            self._validators.pop(url, None)
+
+    def __len__(self):
+        return len(self._validators)
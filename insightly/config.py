@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import json
+import os
+import threading
+
+from collections.abc import Mapping
+
+config_file_path = os.path.join(os.path.dirname(__file__), "config.yaml")
+
+# optional path of a JSON copy of config.yaml, reused while it is newer than config.yaml
+CONFIG_CACHE_ENV = "INSIGHTLY_CONFIG_CACHE"
+
+
+class LazyConfig(Mapping):
+    """
+    Read-only view of config.yaml, parsed on first access and shared by every module. If the INSIGHTLY_CONFIG_CACHE
+    environment variable names a file, the parsed configuration is kept there as JSON so later processes skip both
+    the YAML parse and the yaml import.
+    """
+
+    def __init__(self, path=config_file_path, cache_path=None):
+        """
+        :path: the YAML configuration file
+        :cache_path: JSON cache file, defaults to the INSIGHTLY_CONFIG_CACHE environment variable
+        """
+        self.path = path
+        self.cache_path = cache_path if cache_path is not None else os.environ.get(CONFIG_CACHE_ENV)
+
+        self._lock = threading.Lock()
+        self._data = None
+
+    @property
+    def loaded(self):
+        """True once the configuration has been read
+
+        :rtype: bool
+        """
+        return self._data is not None
+
+    @property
+    def data(self):
+        """The parsed configuration, loaded on first use
+
+        :rtype: dict
+        """
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._load()
+        return self._data
+
+    def _load(self):
+        if self.cache_path:
+            data = self._read_cache()
+            if data is not None:
+                return data
+
+        import yaml
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        with open(self.path) as config_file:
+            data = yaml.load(config_file, Loader=loader)
+
+        if self.cache_path:
+            self._write_cache(data)
+        return data
+
+    def _read_cache(self):
+        try:
+            if os.path.getmtime(self.cache_path) < os.path.getmtime(self.path):
+                return None
+            with open(self.cache_path) as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, data):
+        # write then rename, so concurrent processes never read a partial cache
+        tmp_path = "{}.{}.tmp".format(self.cache_path, os.getpid())
+        try:
+            with open(tmp_path, 'w') as cache_file:
+                json.dump(data, cache_file)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+
+# configuration shared by all modules
+Config = LazyConfig()
@@ -2,36 +2,45 @@
 
 from __future__ import with_statement, print_function, absolute_import
 
-from insightly import InsightlyBase
+from insightly import InsightlyRecord, record_slots
 from insightly.compat import force_str
+from insightly.config import Config
 from insightly.custom_field import CustomField
 from insightly.exceptions import DoesNotExist
 from insightly.link import ContactLink, Link
-from insightly.models import Address, DatetimeHandler
-from insightly.helpers import parse_activity_date
+from insightly.models import Address, record_encoder
+from insightly.helpers import LazyActivityDate, set_activity_date
 
-import os
-import yaml
 import json
-import datetime
-import jsonpickle
 
-# set serialisation for objects per Insightly API requirements
-jsonpickle.handlers.registry.register(datetime.datetime, DatetimeHandler)
 
-config_file_path = os.path.join(os.path.dirname(__file__), "config.yaml")
-
-with open(config_file_path) as config_file:
-    Config = yaml.load(config_file, Loader=yaml.FullLoader)
-
-
-class Contact(InsightlyBase):
+class Contact(InsightlyRecord):
     """
     Class representing an Insightly Contact. Contact attributes are stored as normal
     Python attributes; access to all sub-objects, however, is always
     an API call (Links, Custom Fields).
     """
 
+    # config.yaml section and identifier field for this entity
+    _entity = "Contacts"
+    _id_field = "CONTACT_ID"
+
+    # attributes, stored in slots - see InsightlyRecord
+    _attributes = ('client', 'CONTACT_ID', 'ORGANISATION_ID', 'DEFAULT_LINKED_ORGANISATION', 'SALUTATION', 'FIRST_NAME',
+                   'LAST_NAME', 'DATE_OF_BIRTH', 'EMAIL_ADDRESS', 'TITLE', 'BACKGROUND', 'ADDRESS_MAIL_STREET',
+                   'ADDRESS_MAIL_CITY', 'ADDRESS_MAIL_POSTCODE', 'ADDRESS_MAIL_STATE', 'ADDRESS_MAIL_COUNTRY',
+                   'ADDRESS_OTHER_STREET', 'ADDRESS_OTHER_CITY', 'ADDRESS_OTHER_POSTCODE', 'ADDRESS_OTHER_STATE',
+                   'ADDRESS_OTHER_COUNTRY', 'ASSISTANT_NAME', 'PHONE_ASSISTANT', 'CAN_DELETE', 'CAN_EDIT',
+                   'CONTACTLINKS', 'CUSTOMFIELDS', 'DATES', 'IMAGE_URL', 'LINKS', 'OWNER_USER_ID', 'PHONE', 'PHONE_FAX',
+                   'PHONE_HOME', 'PHONE_MOBILE', 'PHONE_OTHER', 'SOCIAL_FACEBOOK', 'SOCIAL_LINKEDIN', 'SOCIAL_TWITTER',
+                   'TAGS', 'VISIBLE_TEAM_ID', 'VISIBLE_TO', 'VISIBLE_USER_IDS', 'DATE_CREATED_UTC', 'DATE_UPDATED_UTC')
+    __slots__ = record_slots(_attributes)
+    _nested = {'CONTACTLINKS': ContactLink.from_json, 'CUSTOMFIELDS': CustomField.from_json, 'LINKS': Link.from_json}
+
+    # timestamps, parsed on first read when the client uses lazy dates
+    DATE_CREATED_UTC = LazyActivityDate()
+    DATE_UPDATED_UTC = LazyActivityDate()
+
     def __init__(self, client, contact_id=None, organisation_id=None, default_linked_organisation_id=None,
                  salutation=None, first_name='', last_name='', dob=None, email_address=None, title=None,
                  background=None, postal_address=Address(), other_address=Address(), assistant_name=None,
@@ -93,23 +102,21 @@ class Contact(InsightlyBase):
         self.VISIBLE_TO = visible_to
         self.VISIBLE_USER_IDS = visible_user_ids
 
+        lazy_dates = getattr(client, 'lazy_dates', False)
         if created:
-            self.DATE_CREATED_UTC = parse_activity_date(created)
+            set_activity_date(self, 'DATE_CREATED_UTC', created, lazy=lazy_dates)
         if last_updated:
-            self.DATE_UPDATED_UTC = parse_activity_date(last_updated)
+            set_activity_date(self, 'DATE_UPDATED_UTC', last_updated, lazy=lazy_dates)
 
     def __getstate__(self):
         """ Strip out any non-insightly parameters """
-        state = self.__dict__.copy()
-        del state['client']
+        state = self._asdict()
+        state.pop('client', None)
         del state['id']
         if state['CONTACT_ID'] is None:
             del state['CONTACT_ID']
         return state
 
-    def __setstate__(self, state):
-        self.__dict__.update(state)
-
     @classmethod
     def from_json(cls, insightly_client=None, json_obj=None):
         """
@@ -118,6 +125,8 @@ class Contact(InsightlyBase):
         :insightly_client: the insightly client
         :json_obj: the contact json object
         """
+        if getattr(insightly_client, 'lazy_entities', False):
+            return cls.lazy_from_json(json_obj, client=insightly_client)
 
         contact = Contact(client=insightly_client, contact_id=json_obj['CONTACT_ID'],
                           organisation_id=json_obj['ORGANISATION_ID'],
@@ -148,41 +157,94 @@ class Contact(InsightlyBase):
                           visible_team_id=json_obj['VISIBLE_TEAM_ID'],
                           visible_to=json_obj['VISIBLE_TO'], visible_user_ids=json_obj['VISIBLE_USER_IDS'])
 
+        contact._keep_snapshot()
         return contact
 
     def __repr__(self):
         return force_str(u'<Contact {}  {}>'.format(self.CONTACT_ID, force_str("{} {}".format(self.FIRST_NAME,
                                                                                               self.LAST_NAME))))
 
+    def to_dict(self):
+        """ Request body for this Contact, holding only the fields accepted by Insightly """
+
+        return record_encoder(Config, self._entity, self._id_field).encode(self)
+
     def to_json(self):
         """ Strip out any non-insightly parameters """
 
-        return jsonpickle.encode(self, unpicklable=False)
+        return json.dumps(self.to_dict())
 
     def fetch(self):
-        """Fetch all attributes for this Contact"""
-        json_obj = self.client.get_json(Config["Contacts"]["Endpoints"]["Get"]["Url"]
+        """Refresh this Contact from Insightly, in place
+
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
+        json_obj = self.client.get_json(self.client.endpoints["Contacts", "Get"].url
                                         .format(id=force_str(self.CONTACT_ID)),
-                                        http_method=Config["Contacts"]["Endpoints"]["Get"]["Method"])
-        self.from_json(json_obj=json_obj)
+                                        http_method=self.client.endpoints["Contacts", "Get"].method)
+        changed = self._update_from_json(json_obj)
+        self._changed(json_obj)
+        return changed
 
     def save(self):
-        """ Create or update  """
+        """Create or update this Contact, then apply the record as saved by Insightly in place. An update sends
+        the whole record, as Insightly replaces it, but no request at all when nothing changed since it was received
+
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
         if self.CONTACT_ID is None:  # create a new contact
             json_obj = self.client.get_json(
-                    Config["Contacts"]["Endpoints"]["Add"]["Url"],
-                    http_method=Config["Contacts"]["Endpoints"]["Add"]["Method"],
-                    post_args=json.loads(self.to_json()))
-            # Set initial data from Insightly, includes any updates
-            self.from_json(json_obj=json_obj)
-            self.CONTACT_ID = json_obj["CONTACT_ID"]
+                    self.client.endpoints["Contacts", "Add"].url,
+                    http_method=self.client.endpoints["Contacts", "Add"].method,
+                    post_args=self.to_dict())
         else:  # update existing contact
+            if not self._needs_update():  # unchanged since received
+                return set()
             json_obj = self.client.get_json(
-                Config["Contacts"]["Endpoints"]["Update"]["Url"].format(id=force_str(self.CONTACT_ID)),
-                http_method=Config["Contacts"]["Endpoints"]["Update"]["Method"],
-                post_args=json.loads(self.to_json()))
-            # Set new data from Insightly, includes any updates
-            self.from_json(json_obj=json_obj)
+                self.client.endpoints["Contacts", "Update"].url.format(id=force_str(self.CONTACT_ID)),
+                http_method=self.client.endpoints["Contacts", "Update"].method,
+                post_args=self.to_dict())
+        # apply the record as saved by Insightly, including its ID when created
+        changed = self._update_from_json(json_obj)
+        self._changed(json_obj)
+        return changed
+
+    async def fetch_async(self):
+        """Refresh this Contact from Insightly in place, using an AsyncInsightlyClient
+
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
+        json_obj = await self.client.get_json(self.client.endpoints["Contacts", "Get"].url
+                                              .format(id=force_str(self.CONTACT_ID)),
+                                              http_method=self.client.endpoints["Contacts", "Get"].method)
+        changed = self._update_from_json(json_obj)
+        self._changed(json_obj)
+        return changed
+
+    async def save_async(self):
+        """Create or update this Contact using an AsyncInsightlyClient, then apply the record as saved by Insightly
+        in place. An update sends the whole record, but no request at all when nothing changed since it was received
+
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
+        if self.CONTACT_ID is None:  # create a new contact
+            json_obj = await self.client.get_json(
+                    self.client.endpoints["Contacts", "Add"].url,
+                    http_method=self.client.endpoints["Contacts", "Add"].method,
+                    post_args=self.to_dict())
+        else:  # update existing contact
+            if not self._needs_update():  # unchanged since received
+                return set()
+            json_obj = await self.client.get_json(
+                self.client.endpoints["Contacts", "Update"].url.format(id=force_str(self.CONTACT_ID)),
+                http_method=self.client.endpoints["Contacts", "Update"].method,
+                post_args=self.to_dict())
+        # apply the record as saved by Insightly, including its ID when created
+        return self._update_from_json(json_obj)
 
     def get_contact_link(self, contact_link_id):
         """Get an contact link for this contact
@@ -215,10 +277,11 @@ class Contact(InsightlyBase):
         if details:
             post_args['DETAILS'] = details
 
-        json_obj = self.client.get_json(Config["Contacts"]["Endpoints"]["AddContactLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Contacts", "AddContactLink"].url
                                         .format(id=force_str(self.CONTACT_ID)),
-                                        http_method=Config["Contacts"]["Endpoints"]["AddContactLink"]["Method"],
+                                        http_method=self.client.endpoints["Contacts", "AddContactLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return ContactLink.from_json(json_obj)
 
@@ -251,11 +314,11 @@ class Contact(InsightlyBase):
         if not details and contact_link.DETAILS:
             post_args['DETAILS'] = contact_link.DETAILS
 
-        json_obj = self.client.get_json(Config["Contacts"]["Endpoints"]["UpdateContactLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Contacts", "UpdateContactLink"].url
                                         .format(id=force_str(self.CONTACT_ID)),
-                                        http_method=Config["Contacts"]["Endpoints"]["UpdateContactLink"][
-                                            "Method"],
+                                        http_method=self.client.endpoints["Contacts", "UpdateContactLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return ContactLink.from_json(json_obj)
 
@@ -292,10 +355,11 @@ class Contact(InsightlyBase):
         if details:
             post_args['DETAILS'] = details
 
-        json_obj = self.client.get_json(Config["Contacts"]["Endpoints"]["AddLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Contacts", "AddLink"].url
                                         .format(id=force_str(self.CONTACT_ID)),
-                                        http_method=Config["Contacts"]["Endpoints"]["AddLink"]["Method"],
+                                        http_method=self.client.endpoints["Contacts", "AddLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return Link.from_json(json_obj)
 
@@ -327,10 +391,11 @@ class Contact(InsightlyBase):
         if not details and link.DETAILS:
             post_args['DETAILS'] = link.DETAILS
 
-        json_obj = self.client.get_json(Config["Contacts"]["Endpoints"]["UpdateLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Contacts", "UpdateLink"].url
                                         .format(id=force_str(self.CONTACT_ID)),
-                                        http_method=Config["Contacts"]["Endpoints"]["UpdateLink"]["Method"],
+                                        http_method=self.client.endpoints["Contacts", "UpdateLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return Link.from_json(json_obj)
 
@@ -352,10 +417,11 @@ class Contact(InsightlyBase):
         if details:
             post_args['DETAILS'] = details
 
-        json_obj = self.client.get_json(Config["Contacts"]["Endpoints"]["AddLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Contacts", "AddLink"].url
                                         .format(id=force_str(self.CONTACT_ID)),
-                                        http_method=Config["Contacts"]["Endpoints"]["AddLink"]["Method"],
+                                        http_method=self.client.endpoints["Contacts", "AddLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return Link.from_json(json_obj)
 
@@ -387,9 +453,10 @@ class Contact(InsightlyBase):
         if not details and link.DETAILS:
             post_args['DETAILS'] = link.DETAILS
 
-        json_obj = self.client.get_json(Config["Contacts"]["Endpoints"]["UpdateLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Contacts", "UpdateLink"].url
                                         .format(id=force_str(self.CONTACT_ID)),
-                                        http_method=Config["Contacts"]["Endpoints"]["UpdateLink"]["Method"],
+                                        http_method=self.client.endpoints["Contacts", "UpdateLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return Link.from_json(json_obj)
@@ -2,18 +2,23 @@
 
 from __future__ import with_statement, print_function, absolute_import
 
-from insightly import InsightlyBase
+from insightly import InsightlyRecord, record_slots
 from insightly.compat import force_str
+from insightly.models import encode_value
 
-import jsonpickle
+import json
 
 
-class CustomField(InsightlyBase):
+class CustomField(InsightlyRecord):
     """
     Class representing an Insightly Custom Field - i.e. information to be stored on different entity types as defined
     in our own account.
     """
 
+    # attributes, stored in slots - see InsightlyRecord
+    _attributes = ('CUSTOM_FIELD_ID', 'FIELD_VALUE')
+    __slots__ = record_slots(_attributes)
+
     def __init__(self, custom_field_id=None, custom_field_value=None):
 
         super(CustomField, self).__init__()
@@ -22,14 +27,11 @@ class CustomField(InsightlyBase):
 
     def __getstate__(self):
         """ Strip out any non-insightly parameters """
-        state = self.__dict__.copy()
+        state = self._asdict()
         del state['id']
 
         return state
 
-    def __setstate__(self, state):
-        self.__dict__.update(state)
-
     @classmethod
     def from_json(cls, json_obj=None):
         """
@@ -49,4 +51,4 @@ class CustomField(InsightlyBase):
     def to_json(self):
         """ Strip out any non-insightly parameters """
 
-        return jsonpickle.encode(self, unpicklable=False)
\ No newline at end of file
+        return json.dumps(encode_value(self))
\ No newline at end of file
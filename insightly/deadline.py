@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import threading
+import time
+from contextlib import contextmanager
+
+from insightly.exceptions import DeadlineExceeded
+
+_local = threading.local()
+
+
+class Deadline(object):
+    """
+    Time budget of one operation, shared by every request it makes - the pages of a listing, retries and the waits
+    between them. Requests made under a deadline have their timeouts cut to the time remaining, and none is sent once
+    it has passed.
+    """
+
+    def __init__(self, seconds, clock=time.monotonic):
+        """
+        :seconds: the budget, from now
+        :clock: monotonic clock returning seconds
+        """
+        self.seconds = seconds
+        self._clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self):
+        """Seconds left, 0 once the deadline has passed
+
+        :rtype: float
+        """
+        return max(0.0, self.expires_at - self._clock())
+
+    def check(self):
+        """Raise DeadlineExceeded if the deadline has passed"""
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(self.seconds)
+
+    def clip(self, timeout):
+        """Return a requests timeout - seconds, a (connect, read) tuple, or None - cut to the time remaining
+
+        :rtype: float or tuple
+        """
+        remaining = self.remaining()
+        if isinstance(timeout, tuple):
+            return tuple(remaining if value is None else min(value, remaining) for value in timeout)
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+def current_deadline():
+    """Return the Deadline of the operation running on this thread, if any
+
+    :rtype: Deadline
+    """
+    return getattr(_local, 'deadline', None)
+
+
+@contextmanager
+def use_deadline(deadline):
+    """Run the block under a Deadline, e.g. one carried over from another thread - a nested deadline never extends the
+    one already running
+
+    :deadline: the Deadline, or None
+    """
+    previous = current_deadline()
+    if previous is not None and (deadline is None or previous.expires_at < deadline.expires_at):
+        deadline = previous
+    _local.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _local.deadline = previous
+
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+from collections import namedtuple
+from types import MappingProxyType
+
+# an Insightly API endpoint: absolute URL template, HTTP method and default page size (for GetAll endpoints)
+Endpoint = namedtuple('Endpoint', ['url', 'method', 'top'])
+
+
+class EndpointRegistry(object):
+    """
+    Immutable table of the endpoints defined in config.yaml, compiled once for a base URL. Each endpoint's URL is
+    pre-joined onto the base URL, so building a request URL is a single template fill, e.g.
+
+        registry["Contacts", "Get"].url.format(id=contact_id)
+    """
+
+    def __init__(self, config, base_url):
+        """
+        :config: the parsed config.yaml
+        :base_url: absolute API root, ending in a slash e.g. https://api.insight.ly/v2.3/
+        """
+        table = dict()
+        for entity, section in config.items():
+            if not isinstance(section, dict) or "Endpoints" not in section:
+                continue
+            for name, endpoint in section["Endpoints"].items():
+                top = (endpoint.get("DefaultQueryParameters") or {}).get("Top")
+                table[entity, name] = Endpoint(base_url + endpoint["Url"].lstrip('/'), endpoint["Method"], top)
+
+        self.base_url = base_url
+        self._table = MappingProxyType(table)
+
+    def __getitem__(self, key):
+        """
+        :key: tuple of config.yaml section and endpoint name e.g. ("Contacts", "Get")
+        :rtype: Endpoint
+        """
+        return self._table[key]
+
+    def __contains__(self, key):
+        return key in self._table
+
+    def __iter__(self):
+        return iter(self._table)
+
+    def __len__(self):
+        return len(self._table)
+
+
+# compiled registries by config identity and base URL, each kept with its config so that the ID is never reused
+_registries = dict()
+
+
+def compile_endpoints(config, base_url):
+    """Return the endpoint registry for a config and base URL, compiling it on first use
+
+    :config: the parsed config.yaml
+    :base_url: absolute API root, ending in a slash
+    :rtype: EndpointRegistry
+    """
+    key = (id(config), base_url)
+    entry = _registries.get(key)
+    if entry is None:
+        entry = _registries.setdefault(key, (config, EndpointRegistry(config, base_url)))
+    return entry[1]
@@ -9,6 +9,11 @@ class ResourceUnavailable(Exception):
         self._msg = msg
         self._status = http_response.status_code
 
+    @property
+    def status_code(self):
+        """HTTP status of the failed response"""
+        return self._status
+
     def __str__(self):
         return "{} (HTTP status: {})".format(self._msg, self._status)
 
@@ -29,6 +34,32 @@ class NotFound(ResourceUnavailable):
     pass
 
 
+class RateLimited(ResourceUnavailable):
+    pass
+
+
+class CircuitOpen(Exception):
+    """Exception raised without sending a request, while the circuit breaker is open"""
+
+    def __init__(self, retry_after):
+        Exception.__init__(self)
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return "Insightly unavailable, circuit open (probing again in {:.1f}s)".format(self.retry_after)
+
+
+class DeadlineExceeded(Exception):
+    """Exception raised when an operation runs out of the time given by its deadline"""
+
+    def __init__(self, seconds):
+        Exception.__init__(self)
+        self.seconds = seconds
+
+    def __str__(self):
+        return "Deadline of {}s exceeded".format(self.seconds)
+
+
 class TokenError(Exception):
     pass
 
@@ -47,3 +78,15 @@ class GenericException(Exception):
 
 class DoesNotExist(GenericException):
     pass
+
+
+class CommitFailed(Exception):
+    """Exception raised when some of the writes of a Session failed"""
+
+    def __init__(self, results):
+        Exception.__init__(self)
+        self.results = results
+
+    def __str__(self):
+        failed = [result for result in self.results if not result.ok]
+        return "{} of {} writes failed, the first with: {}".format(len(failed), len(self.results), failed[0].exception)
@@ -1,11 +1,87 @@
 # -*- coding: utf-8 -*-
 
-from dateutil import parser as dateparser
+import datetime
+
+# timestamp fields set on every Insightly record
+ACTIVITY_DATE_FIELDS = ('DATE_CREATED_UTC', 'DATE_UPDATED_UTC')
+
+# parses the YYYY-MM-DD HH:MM:SS timestamps returned by Insightly
+_fromisoformat = datetime.datetime.fromisoformat
 
 
 def parse_activity_date(date_string):
-    """Return the date of an action.
+    """Return the date of an action. Timestamps in the Insightly format, YYYY-MM-DD HH:MM:SS, take a fast path; any
+    other format is parsed by dateutil. Dates already parsed are returned as they are.
 
     :rtype: datetime.datetime
     """
-    return dateparser.parse(date_string)
\ No newline at end of file
+    if isinstance(date_string, datetime.datetime):
+        return date_string
+    try:
+        return _fromisoformat(date_string)
+    except (TypeError, ValueError):
+        pass
+    # imported on first use, dateutil is slow to import
+    from dateutil import parser as dateparser
+    return dateparser.parse(date_string)
+
+
+def parse_activity_dates(records, fields=ACTIVITY_DATE_FIELDS):
+    """Parse the timestamps of a page of records in place, parsing each distinct timestamp once
+
+    :records: the JSON records of a page of results
+    :fields: the timestamp fields to parse
+    :return: the records
+    :rtype: list of dict
+    """
+    parsed = dict()
+    for record in records:
+        for field in fields:
+            value = record.get(field)
+            if not isinstance(value, str):
+                continue
+            date = parsed.get(value)
+            if date is None:
+                date = parsed[value] = parse_activity_date(value)
+            record[field] = date
+    return records
+
+
+class LazyActivityDate(object):
+    """
+    Timestamp attribute, stored under a private slot. A timestamp stored as received from Insightly, by an entity
+    built with lazy dates, is parsed on first read and the parsed date stored in its place.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.storage_name = '_' + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            date = getattr(obj, self.storage_name)
+        except AttributeError:
+            raise AttributeError(self.name)
+        if isinstance(date, str):
+            date = parse_activity_date(date)
+            setattr(obj, self.storage_name, date)
+        return date
+
+    def __set__(self, obj, value):
+        setattr(obj, self.storage_name, value)
+
+    def __delete__(self, obj):
+        delattr(obj, self.storage_name)
+
+
+def set_activity_date(obj, name, value, lazy=False):
+    """Set a timestamp attribute, deferring parsing until it is read if lazy
+
+    :obj: the entity, whose class declares ``name`` as a LazyActivityDate
+    :name: the attribute e.g. DATE_CREATED_UTC
+    :value: the timestamp as returned by Insightly, or a datetime
+    :lazy: if True, parse on first read
+    """
+    setattr(obj, name, value if lazy else parse_activity_date(value))
@@ -1,42 +1,161 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import with_statement, print_function, absolute_import
+import datetime
 import json
-import requests
-import os
-import yaml
 import base64
 import logging
+from urllib.parse import quote
 
+from insightly.bulk import run_bulk
 from insightly.compat import force_str
+from insightly.conditional import NOT_MODIFIED
+from insightly.config import Config
 from insightly.contact import Contact
+from insightly.deadline import Deadline, current_deadline, use_deadline
+from insightly.endpoints import compile_endpoints
+from insightly.helpers import parse_activity_date, parse_activity_dates
+from insightly.loader import Loader
+from insightly.models import DATETIME_FORMAT
 from insightly.opportunity import Opportunity, OpportunityCategory
 from insightly.organisation import Organisation
+from insightly.pagination import Paginator
+from insightly.rate_limit import RequestScheduler
 from insightly.relationship import Relationship
+from insightly.retry import IDEMPOTENT_METHODS, NATURAL_KEYS, RESEND_STATUS_CODES, RetryPolicy
+from insightly.session import Session
+from insightly.single_flight import SingleFlight
+from insightly.transport import PooledHTTPService
 from insightly.user import User
 from insightly.exceptions import *
 
 logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s')
 
-config_file_path = os.path.join(os.path.dirname(__file__), "config.yaml")
-
-with open(config_file_path) as config_file:
-    Config = yaml.load(config_file, Loader=yaml.FullLoader)
+# prefixes of URLs that get_json sends as is
+_ABSOLUTE_URL_PREFIXES = ('https://', 'http://')
+
+# query parameter asking Insightly for records without their child collections, and the fields it leaves out
+BRIEF_QUERY = "&brief=true"
+BRIEF_OMITTED_FIELDS = frozenset(['CONTACTLINKS', 'CUSTOMFIELDS', 'DATES', 'EMAILDOMAINS', 'LINKS', 'ORGANISATIONLINKS',
+                                  'TAGS'])
+
+# paginated Search query for the records updated since a UTC timestamp
+UPDATED_AFTER_QUERY = "updated_after_utc={updated_after}&skip={{skip}}&top={{top}}"
+
+# entity types listed by iter_updated and iter_ids, by config.yaml section
+_RECORD_TYPES = dict((cls._entity, cls) for cls in (Contact, Organisation, Opportunity))
+
+
+def _listing_url(endpoints, entity, brief=False, updated_after=None):
+    """Return the URL template, with skip and top placeholders, of the pages listing an entity
+
+    :endpoints: the client's EndpointRegistry
+    :entity: top level key in config.yaml e.g. Contacts
+    :brief: if True, ask for records without their child collections
+    :updated_after: optional datetime, to list only the records updated since through the Search endpoint
+    :rtype: str
+    """
+    if updated_after is None:
+        url_template = endpoints[entity, "GetAll"].url
+    else:
+        url_template = endpoints[entity, "Search"].url + UPDATED_AFTER_QUERY.format(
+            updated_after=quote(updated_after.strftime(DATETIME_FORMAT)))
+    return url_template + BRIEF_QUERY if brief else url_template
+
+
+def _raise_for_status(response, url):
+    """Raise the exception matching a failed Insightly response, if any"""
+    if response.status_code == 400:
+        logging.error("Failed request - {}".format(response.request))
+        raise MissingOrInvalidParameter("{} at {}".format(response.text, url), response)
+    if response.status_code == 401:
+        logging.error("Failed request - {}".format(response.request))
+        raise Unauthorized("{} at {}".format(response.text, url), response)
+    if response.status_code == 403:
+        logging.error("Failed request - {}".format(response.request))
+        raise NoPermission("{} at {}".format(response.text, url), response)
+    if response.status_code == 404:
+        logging.error("Failed request - {}".format(response.request))
+        raise NotFound("{} at {}".format(response.text, url), response)
+    if response.status_code == 429:
+        logging.error("Failed request - {}".format(response.request))
+        raise RateLimited("{} at {}".format(response.text, url), response)
+    if response.status_code not in [200, 201, 202]:
+        raise ResourceUnavailable("%s at %s" % (response.text, url), response)
 
 
 class InsightlyClient(object):
     """ Base class for Insightly API access """
 
-    def __init__(self, api_key, version='2.3', http_service=requests):
+    def __init__(self, api_key, version='2.3', http_service=None, page_concurrency=4, scheduler=None,
+                 lazy_dates=False, lazy_entities=False, store=None, cache=None, coalesce=True, validators=None,
+                 retry_policy=None, circuit_breaker=None, connect_timeout=10.0, read_timeout=60.0):
         """
         Constructor
 
         :api_key: API key found at https://crm.na1.insightly.com/users/usersettings
+        :http_service: object exposing ``request(method, url, **kwargs)``, defaults to a PooledHTTPService so
+            connections are reused between calls
+        :page_concurrency: number of page requests kept in flight when listing all records
+        :scheduler: RequestScheduler shared by all threads using this client, defaults to one that does not limit the
+            request rate and only backs off when Insightly throttles
+        :lazy_dates: if True, record timestamps are parsed when first read instead of when each page is received
+        :lazy_entities: if True, Contacts, Organisations and Opportunities are built around their JSON, and each
+            attribute, including nested Links and Custom Fields, is only read from it when first accessed
+        :store: optional LocalStore every full page listed is written to. Saves, deletes and link changes made
+            through this client update it, or remove the records affected.
+        :cache: optional RecordCache, or object with the same get, put and invalidate methods, that get_contact,
+            get_organisation and get_opportunity read through. Saves, deletes and link changes made through this
+            client update or invalidate it.
+        :coalesce: if True, identical GET requests made concurrently from several threads share one HTTP request,
+            unless made under a deadline
+        :validators: optional ValidatorCache, to fetch records already received with conditional GETs - on 304 Not
+            Modified the body held is reused
+        :retry_policy: RetryPolicy for requests failing transiently, defaults to one retrying up to 3 times - pass
+            RetryPolicy(max_retries=0) to raise the first failure
+        :circuit_breaker: optional CircuitBreaker, failing requests at once with CircuitOpen while Insightly keeps
+            failing - share one between clients to share its state
+        :connect_timeout: seconds to wait for a connection to Insightly, None to wait forever
+        :read_timeout: seconds to wait for each read of a response, None to wait forever. Both are cut to the time
+            remaining under a deadline - see InsightlyClient.deadline
         """
 
         self.api_key = api_key
         self.version = version
-        self.http_service = http_service
+        self.http_service = http_service if http_service is not None else PooledHTTPService()
+        self.page_concurrency = page_concurrency
+        self.lazy_dates = lazy_dates
+        self.lazy_entities = lazy_entities
+        self.store = store
+        self.cache = cache
+        self._single_flight = SingleFlight() if coalesce else None
+        self.validators = validators
+        if store is not None and store.client is None:
+            store.client = self
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        self.endpoints = compile_endpoints(Config, Config["BaseUrl"].format(version_number=version))
+        # API Key authentication, encoded once per client
+        self._headers = {
+            'Content-Type': 'application/json',
+            'Authorization': "Basic {}".format(base64.b64encode(bytes("{}:".format(api_key), 'utf-8')).decode()),
+        }
+
+    def close(self):
+        """Release any pooled connections held by the HTTP service"""
+        close = getattr(self.http_service, 'close', None)
+        if callable(close):
+            close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     @classmethod
     def from_user_input(cls):
@@ -46,12 +165,27 @@ class InsightlyClient(object):
 
         return insightly_client
 
-    def list_contacts(self, contact_filter=None):
+    def iter_contacts(self, contact_filter=None, fields=None):
+        """
+        Yields all contacts for your Insightly account, one page at a time. Only the pages currently being fetched
+        are held in memory, however many contacts the account has.
+
+        :contact_filter: a Python dictionary of key-value pairs corresponding to query parameters defined in
+            Insightly API documentation - https://api.insight.ly/v2.3/Help#!/Contacts/GetContactsBySearch
+        :fields: optional list of the attributes to read e.g. ["CONTACT_ID", "FIRST_NAME"], the others are left unset
+
+        :return: a generator of Python objects representing the Insightly Contacts.
+        :rtype: generator of Contact
+        """
+        return self._iter_records(Contact, contact_filter, fields)
+
+    def list_contacts(self, contact_filter=None, fields=None):
         """
         Returns all contacts for your Insightly account
 
         :contact_filter: a Python dictionary of key-value pairs corresponding to query parameters defined in
             Insightly API documentation - https://api.insight.ly/v2.3/Help#!/Contacts/GetContactsBySearch
+        :fields: optional list of the attributes to read e.g. ["CONTACT_ID", "FIRST_NAME"], the others are left unset
 
         :return: a list of Python objects representing the Insightly Contacts.
         :rtype: list of Contact
@@ -60,37 +194,14 @@ class InsightlyClient(object):
             - id: the Contact's identifier
             - name: Name of the Contact
         """
-        if not contact_filter:  # assume you want all
-            # as of v2.2, Insightly paginates by default
-            top = Config["Contacts"]["Endpoints"]["GetAll"]["DefaultQueryParameters"]["Top"]
-            skip = 0
-
-            page = self.get_json(Config["Contacts"]["Endpoints"]["GetAll"]["Url"].format(skip=skip, top=top),
-                                 http_method=Config["Contacts"]["Endpoints"]["GetAll"]["Method"])
-            json_obj = [] + page
-            while len(page) > 0:
-                skip += top
-                page = self.get_json(Config["Contacts"]["Endpoints"]["GetAll"]["Url"].format(skip=skip, top=top),
-                                     http_method=Config["Contacts"]["Endpoints"]["GetAll"]["Method"])
-                json_obj += page
-        else:
-            if type(contact_filter) != dict:
-                raise TypeError
-            query_url = Config["Contacts"]["Endpoints"]["Search"]["Url"]
-            for key, value in contact_filter.items():
-                query_url += "{key}={value}".format(key=key, value=value)
-            json_obj = self.get_json(query_url,
-                                     http_method=Config["Contacts"]["Endpoints"]["Search"]["Method"])
-
-        return [Contact.from_json(self, json_obj=obj) for obj in json_obj]
+        return list(self.iter_contacts(contact_filter, fields))
 
     def get_contact(self, contact_id):
         """Get contact
 
         :rtype: Contact
         """
-        obj = self.get_json(Config["Contacts"]["Endpoints"]["Get"]["Url"].format(id=contact_id),
-                            http_method=Config["Contacts"]["Endpoints"]["Get"]["Method"])
+        obj = self._get_record("Contacts", contact_id)
 
         return Contact.from_json(self, obj)
 
@@ -111,9 +222,8 @@ class InsightlyClient(object):
             else:
                 logging.warn("Field not accepted, ignored - {}: {}".format(key, value))
 
-        obj = self.get_json(Config["Contacts"]["Endpoints"]["Add"]["Url"],
-                            http_method=Config["Contacts"]["Endpoints"]["Add"]["Method"],
-                            post_args=post_args)
+        obj = self._create("Contacts", post_args)
+        self._record_changed("Contacts", obj["CONTACT_ID"], obj)
         return Contact.from_json(self, json_obj=obj)
 
     def delete_contact(self, contact_id):
@@ -122,17 +232,35 @@ class InsightlyClient(object):
         :rtype: Contact
         """
 
-        obj = self.get_json(Config["Contacts"]["Endpoints"]["Delete"]["Url"].format(id=contact_id),
-                            http_method=Config["Contacts"]["Endpoints"]["Delete"]["Method"])
+        obj = self.get_json(self.endpoints["Contacts", "Delete"].url.format(id=contact_id),
+                            http_method=self.endpoints["Contacts", "Delete"].method)
+        self._record_changed("Contacts", contact_id)
         logging.info("Deleted Contact {id}".format(id=contact_id))
         return None
 
-    def list_opportunities(self, opportunity_filter=None):
+    def iter_opportunities(self, opportunity_filter=None, fields=None):
+        """
+        Yields all opportunities for your Insightly account, one page at a time. Only the pages currently being fetched
+        are held in memory, however many opportunities the account has.
+
+        :opportunity_filter: a Python dictionary of key-value pairs corresponding to query parameters defined in
+            Insightly API documentation - https://api.insight.ly/v2.3/Help#!/Opportunities/GetOpportunitiesBySearch
+        :fields: optional list of the attributes to read e.g. ["OPPORTUNITY_ID", "OPPORTUNITY_NAME"], the others are
+            left unset
+
+        :return: a generator of Python objects representing the Insightly Opportunities.
+        :rtype: generator of Opportunity
+        """
+        return self._iter_records(Opportunity, opportunity_filter, fields)
+
+    def list_opportunities(self, opportunity_filter=None, fields=None):
         """
         Returns all opportunities for your Insightly account
 
         :opportunity_filter: a Python dictionary of key-value pairs corresponding to query parameters defined in
             Insightly API documentation - https://api.insight.ly/v2.3/Help#!/Opportunities/GetOpportunitiesBySearch
+        :fields: optional list of the attributes to read e.g. ["OPPORTUNITY_ID", "OPPORTUNITY_NAME"], the others are
+            left unset
 
         :return: a list of Python objects representing the Insightly Opportunities.
         :rtype: list of Opportunity
@@ -141,38 +269,14 @@ class InsightlyClient(object):
             - id: the Opportunity's identifier
             - name: Name of the Opportunity
         """
-        if not opportunity_filter:  # assume you want all
-            # as of v2.2, Insightly paginates by default
-            top = Config["Opportunities"]["Endpoints"]["GetAll"]["DefaultQueryParameters"]["Top"]
-            skip = 0
-
-            page = self.get_json(Config["Opportunities"]["Endpoints"]["GetAll"]["Url"].format(skip=skip, top=top),
-                                 http_method=Config["Opportunities"]["Endpoints"]["GetAll"]["Method"])
-            json_obj = [] + page
-            while len(page) > 0:
-                skip += top
-                page = self.get_json(Config["Opportunities"]["Endpoints"]["GetAll"]["Url"].format(skip=skip, top=top),
-                                     http_method=Config["Opportunities"]["Endpoints"]["GetAll"]["Method"])
-                json_obj += page
-
-        else:
-            if type(opportunity_filter) != dict:
-                raise TypeError
-            query_url = Config["Opportunities"]["Endpoints"]["Search"]["Url"]
-            for key, value in opportunity_filter.items():
-                query_url += "{key}={value}".format(key=key, value=value)
-            json_obj = self.get_json(query_url,
-                                     http_method=Config["Opportunities"]["Endpoints"]["Search"]["Method"])
-
-        return [Opportunity.from_json(self, json_obj=obj) for obj in json_obj]
+        return list(self.iter_opportunities(opportunity_filter, fields))
 
     def get_opportunity(self, opportunity_id):
         """Get opportunity
 
         :rtype: Opportunity
         """
-        obj = self.get_json(Config["Opportunities"]["Endpoints"]["Get"]["Url"].format(id=opportunity_id),
-                            http_method=Config["Opportunities"]["Endpoints"]["Get"]["Method"])
+        obj = self._get_record("Opportunities", opportunity_id)
 
         return Opportunity.from_json(self, obj)
 
@@ -193,9 +297,8 @@ class InsightlyClient(object):
             else:
                 logging.warn("Field not accepted, ignored - {}: {}".format(key, value))
 
-        obj = self.get_json(Config["Opportunities"]["Endpoints"]["Add"]["Url"],
-                            http_method=Config["Opportunities"]["Endpoints"]["Add"]["Method"],
-                            post_args=post_args)
+        obj = self._create("Opportunities", post_args)
+        self._record_changed("Opportunities", obj["OPPORTUNITY_ID"], obj)
         return Opportunity.from_json(self, json_obj=obj)
 
     def delete_opportunity(self, opportunity_id):
@@ -204,8 +307,9 @@ class InsightlyClient(object):
         :rtype: Opportunity
         """
 
-        obj = self.get_json(Config["Opportunities"]["Endpoints"]["Delete"]["Url"].format(id=opportunity_id),
-                            http_method=Config["Opportunities"]["Endpoints"]["Delete"]["Method"])
+        obj = self.get_json(self.endpoints["Opportunities", "Delete"].url.format(id=opportunity_id),
+                            http_method=self.endpoints["Opportunities", "Delete"].method)
+        self._record_changed("Opportunities", opportunity_id)
         logging.info("Deleted Opportunity {id}".format(id=opportunity_id))
         return None
 
@@ -221,26 +325,33 @@ class InsightlyClient(object):
             - CATEGORY_NAME: Name of the Opportunity Category
         """
 
-        top = Config["OpportunityCategories"]["Endpoints"]["GetAll"]["DefaultQueryParameters"]["Top"]
-        skip = 0
-
-        page = self.get_json(Config["OpportunityCategories"]["Endpoints"]["GetAll"]["Url"].format(skip=skip, top=top),
-                             http_method=Config["OpportunityCategories"]["Endpoints"]["GetAll"]["Method"])
-        json_obj = [] + page
-        while len(page) > 0:
-            skip += top
-            page = self.get_json(Config["OpportunityCategories"]["Endpoints"]["GetAll"]["Url"].format(skip=skip, top=top),
-                                 http_method=Config["OpportunityCategories"]["Endpoints"]["GetAll"]["Method"])
-            json_obj += page
+        json_obj = [obj for page in self._paginate("OpportunityCategories") for obj in page]
 
         return [OpportunityCategory.from_json(json_obj=obj) for obj in json_obj]
 
-    def list_organisations(self, organisation_filter=None):
+    def iter_organisations(self, organisation_filter=None, fields=None):
+        """
+        Yields all organisations for your Insightly account, one page at a time. Only the pages currently being fetched
+        are held in memory, however many organisations the account has.
+
+        :organisation_filter: a Python dictionary of key-value pairs corresponding to query parameters defined in
+            Insightly API documentation - https://api.insight.ly/v2.3/Help#!/Organisations/GetOrganisationsBySearch
+        :fields: optional list of the attributes to read e.g. ["ORGANISATION_ID", "ORGANISATION_NAME"], the others are
+            left unset
+
+        :return: a generator of Python objects representing the Insightly Organisations.
+        :rtype: generator of Organisation
+        """
+        return self._iter_records(Organisation, organisation_filter, fields)
+
+    def list_organisations(self, organisation_filter=None, fields=None):
         """
         Returns all organisations for your Insightly account
 
         :organisation_filter: a Python dictionary of key-value pairs corresponding to query parameters defined in
             Insightly API documentation - https://api.insight.ly/v2.3/Help#!/Organisations/GetOrganisationsBySearch
+        :fields: optional list of the attributes to read e.g. ["ORGANISATION_ID", "ORGANISATION_NAME"], the others are
+            left unset
 
         :return: a list of Python objects representing the Insightly Organisations.
         :rtype: list of Organisation
@@ -249,37 +360,14 @@ class InsightlyClient(object):
             - id: the Organisation's identifier
             - name: Name of the Organisation
         """
-        if not organisation_filter:  # assume you want all
-            # as of v2.2, Insightly paginates by default
-            top = Config["Organisations"]["Endpoints"]["GetAll"]["DefaultQueryParameters"]["Top"]
-            skip = 0
-
-            page = self.get_json(Config["Organisations"]["Endpoints"]["GetAll"]["Url"].format(skip=skip, top=top),
-                                 http_method=Config["Organisations"]["Endpoints"]["GetAll"]["Method"])
-            json_obj = [] + page
-            while len(page) > 0:
-                skip += top
-                page = self.get_json(Config["Organisations"]["Endpoints"]["GetAll"]["Url"].format(skip=skip, top=top),
-                                     http_method=Config["Organisations"]["Endpoints"]["GetAll"]["Method"])
-                json_obj += page
-        else:
-            if type(organisation_filter) != dict:
-                raise TypeError
-            query_url = Config["Organisations"]["Endpoints"]["Search"]["Url"]
-            for key, value in organisation_filter.items():
-                query_url += "{key}={value}".format(key=key, value=value)
-            json_obj = self.get_json(query_url,
-                                     http_method=Config["Organisations"]["Endpoints"]["Search"]["Method"])
-
-        return [Organisation.from_json(self, json_obj=obj) for obj in json_obj]
+        return list(self.iter_organisations(organisation_filter, fields))
 
     def get_organisation(self, organisation_id):
         """Get organisation
 
         :rtype: Organisation
         """
-        obj = self.get_json(Config["Organisations"]["Endpoints"]["Get"]["Url"].format(id=organisation_id),
-                            http_method=Config["Organisations"]["Endpoints"]["Get"]["Method"])
+        obj = self._get_record("Organisations", organisation_id)
 
         return Organisation.from_json(self, obj)
 
@@ -298,9 +386,8 @@ class InsightlyClient(object):
             else:
                 logging.warn("Field not accepted, ignored - {}: {}".format(key, value))
 
-        obj = self.get_json(Config["Organisations"]["Endpoints"]["Add"]["Url"],
-                            http_method=Config["Organisations"]["Endpoints"]["Add"]["Method"],
-                            post_args=post_args)
+        obj = self._create("Organisations", post_args)
+        self._record_changed("Organisations", obj["ORGANISATION_ID"], obj)
         return Organisation.from_json(self, json_obj=obj)
 
     def delete_organisation(self, organisation_id):
@@ -309,8 +396,9 @@ class InsightlyClient(object):
         :rtype: Organisation
         """
 
-        obj = self.get_json(Config["Organisations"]["Endpoints"]["Delete"]["Url"].format(id=organisation_id),
-                            http_method=Config["Organisations"]["Endpoints"]["Delete"]["Method"])
+        obj = self.get_json(self.endpoints["Organisations", "Delete"].url.format(id=organisation_id),
+                            http_method=self.endpoints["Organisations", "Delete"].method)
+        self._record_changed("Organisations", organisation_id)
         logging.info("Deleted Organisation {id}".format(id=organisation_id))
         return None
     
@@ -325,8 +413,8 @@ class InsightlyClient(object):
             - id: the Relationships's identifier
             - name: Name of the Relationship
         """
-        json_obj = self.get_json(Config["Relationships"]["Endpoints"]["GetAll"]["Url"],
-                                 http_method=Config["Relationships"]["Endpoints"]["GetAll"]["Method"])
+        json_obj = self.get_json(self.endpoints["Relationships", "GetAll"].url,
+                                 http_method=self.endpoints["Relationships", "GetAll"].method)
 
         return [Relationship.from_json(json_obj=obj) for obj in json_obj]
 
@@ -342,11 +430,202 @@ class InsightlyClient(object):
             - FIRST_NAME: First name of the User
             - LAST_NAME: Last name of the User
         """
-        json_obj = self.get_json(Config["Users"]["Endpoints"]["GetAll"]["Url"],
-                                 http_method=Config["Users"]["Endpoints"]["GetAll"]["Method"])
+        json_obj = self.get_json(self.endpoints["Users", "GetAll"].url,
+                                 http_method=self.endpoints["Users", "GetAll"].method)
 
         return [User.from_json(self, json_obj=obj) for obj in json_obj]
 
+    def iter_updated(self, entity, updated_after):
+        """
+        Yields the Contacts, Organisations or Opportunities updated since a time, paging through the Search endpoint
+
+        :entity: the entity type - Contact, Organisation or Opportunity, or its config.yaml section e.g. Contacts
+        :updated_after: datetime in UTC, or None to list every record
+        :rtype: generator of Contact, Organisation or Opportunity
+        """
+        return self._iter_records(_RECORD_TYPES[getattr(entity, '_entity', entity)], updated_after=updated_after)
+
+    def iter_ids(self, entity):
+        """
+        Yields the IDs of every Contact, Organisation or Opportunity. Insightly cannot list IDs alone, so this pages
+        through the brief records - every top level field, without the child collections - and keeps only the IDs.
+
+        :entity: the entity type - Contact, Organisation or Opportunity, or its config.yaml section e.g. Contacts
+        :rtype: generator of int
+        """
+        cls = _RECORD_TYPES[getattr(entity, '_entity', entity)]
+        for page in self._pages(cls._entity, brief=True):
+            for obj in page:
+                yield obj[cls._id_field]
+
+    def bulk_save(self, objects, max_workers=8):
+        """Create or update many Contacts, Organisations or Opportunities concurrently
+
+        :objects: the entities to save - new entities (without an ID) are created, the rest updated
+        :max_workers: number of requests in flight at once
+        :return: a result per object, in input order, holding the saved record ID or the exception raised
+        :rtype: list of BulkResult
+        """
+
+        def save(obj):
+            if obj.client is None:
+                obj.client = self
+            obj.save()
+            return getattr(obj, obj._id_field)
+
+        return run_bulk(save, objects, max_workers=max_workers)
+
+    def bulk_delete(self, entity, ids, max_workers=8):
+        """Delete many records of one entity type concurrently
+
+        :entity: the entity type - Contact, Organisation or Opportunity, or its config.yaml section e.g. Contacts
+        :ids: identifiers of the records to delete
+        :max_workers: number of requests in flight at once
+        :return: a result per ID, in input order, holding the deleted record ID or the exception raised
+        :rtype: list of BulkResult
+        """
+        entity = getattr(entity, '_entity', entity)
+        delete = {"Contacts": self.delete_contact,
+                  "Organisations": self.delete_organisation,
+                  "Opportunities": self.delete_opportunity}[entity]
+
+        def delete_one(record_id):
+            delete(record_id)
+            return record_id
+
+        return run_bulk(delete_one, ids, max_workers=max_workers)
+
+    def loader(self, batch_size=100):
+        """Return a Loader resolving record IDs in batches, for one unit of work
+
+        :batch_size: number of IDs fetched per request
+        :rtype: Loader
+        """
+        return Loader(self, batch_size=batch_size, parse_dates=self._parse_dates)
+
+    @staticmethod
+    def deadline(seconds):
+        """Give the operations run in a ``with`` block on this thread ``seconds`` in total, covering every page of a
+        listing, retries and the waits between them - e.g. ``with client.deadline(2.5): client.list_contacts()``.
+        Once it has passed no request is sent and DeadlineExceeded is raised.
+
+        :seconds: the budget
+        """
+        return use_deadline(Deadline(seconds))
+
+    def session(self, max_workers=8):
+        """Return a Session queuing saves, deletes and link mutations until committed - at the end of a ``with`` block
+
+        :max_workers: number of requests in flight at once on commit
+        :rtype: Session
+        """
+        return Session(self, max_workers=max_workers)
+
+    def _get_record(self, entity, record_id):
+        """Return the JSON of a record, from the cache if it holds a fresh copy
+
+        :entity: top level key in config.yaml e.g. Contacts
+        :record_id: the record's identifier
+        :rtype: dict
+        """
+        if self.cache is not None:
+            cached = self.cache.get(entity, record_id)
+            if cached is not None:
+                # cached as text, so callers changing their record never change the cached copy
+                return json.loads(cached)
+        endpoint = self.endpoints[entity, "Get"]
+        obj = self.get_json(endpoint.url.format(id=record_id), http_method=endpoint.method)
+        if self.cache is not None:
+            self.cache.put(entity, record_id, json.dumps(obj))
+        return obj
+
+    def _record_changed(self, entity, record_id, json_obj=None):
+        """Replace the cached and stored copies of a record fetched or written through this client by the JSON
+        returned by Insightly, or drop them if there is none
+
+        :entity: top level key in config.yaml e.g. Contacts
+        :record_id: the record's identifier
+        :json_obj: the record as returned by Insightly
+        """
+        if self.cache is not None:
+            if json_obj is None:
+                self.cache.invalidate(entity, record_id)
+            else:
+                self.cache.put(entity, record_id, json.dumps(json_obj, default=str))
+        if self.store is not None:
+            if json_obj is None:
+                self.store.delete(entity, [record_id])
+            else:
+                self.store.put_page(entity, [json_obj])
+
+    def _iter_records(self, cls, search_filter=None, fields=None, updated_after=None):
+        """Yield the Contacts, Organisations or Opportunities of a listing
+
+        :cls: the entity type e.g. Contact
+        :search_filter: a Python dictionary of Search query parameters
+        :fields: optional list of the attributes to read - when none of them are child collections, Insightly is
+            asked for brief records
+        :updated_after: optional datetime, to only list the records updated since
+        """
+        if fields is None:
+            for page in self._pages(cls._entity, search_filter, updated_after=updated_after):
+                if self.store is not None:
+                    self.store.put_page(cls._entity, page)
+                for obj in self._parse_dates(page):
+                    yield cls.from_json(self, json_obj=obj)
+        else:
+            cls.check_fields(fields)
+            brief = not any(field in BRIEF_OMITTED_FIELDS for field in fields)
+            for page in self._pages(cls._entity, search_filter, brief=brief, updated_after=updated_after):
+                for obj in page:
+                    yield cls.project_from_json(obj, fields, client=self)
+
+    def _pages(self, entity, search_filter=None, brief=False, updated_after=None):
+        """Yield the pages of results for an entity - every record, or a single page of Search results if a filter is
+        given
+
+        :entity: top level key in config.yaml e.g. Contacts
+        :search_filter: a Python dictionary of Search query parameters
+        :brief: if True, ask for records without their child collections
+        :updated_after: optional datetime, to only page through the records updated since
+        :rtype: generator of list
+        """
+        if not search_filter:  # assume you want all
+            # as of v2.2, Insightly paginates by default
+            for page in self._paginate(entity, brief=brief, updated_after=updated_after):
+                yield page
+        else:
+            if type(search_filter) != dict:
+                raise TypeError
+            query_url = self.endpoints[entity, "Search"].url
+            query_url += "&".join("{key}={value}".format(key=key, value=value)
+                                  for key, value in search_filter.items())
+            if brief:
+                query_url += BRIEF_QUERY
+            yield self.get_json(query_url, http_method=self.endpoints[entity, "Search"].method)
+
+    def _parse_dates(self, page):
+        """Parse the timestamps of a page of records in one pass, unless they are parsed lazily
+
+        :rtype: list
+        """
+        return page if self.lazy_dates or self.lazy_entities else parse_activity_dates(page)
+
+    def _paginate(self, entity, brief=False, updated_after=None):
+        """Yield every page of the GetAll endpoint for an entity, prefetching pages concurrently. If updated_after is
+        given, page through the Search endpoint for the records updated since instead.
+
+        :entity: top level key in config.yaml e.g. Contacts
+        :brief: if True, ask for records without their child collections
+        :updated_after: optional datetime
+        :rtype: generator of list
+        """
+        endpoint = self.endpoints[entity, "GetAll"]
+        url_template = _listing_url(self.endpoints, entity, brief, updated_after)
+        paginator = Paginator(self, url_template, http_method=endpoint.method, top=endpoint.top,
+                              concurrency=self.page_concurrency)
+        return paginator.pages()
+
     def get_json(
             self,
             uri_path,
@@ -360,8 +639,6 @@ class InsightlyClient(object):
         # TODO: Check if headers and additional request fields are needed
 
         # explicit values here to avoid mutable default values
-        if headers is None:
-            headers = dict()
         if query_params is None:
             query_params = dict()
         if post_args is None:
@@ -372,43 +649,158 @@ class InsightlyClient(object):
         if files is None:
             data = json.dumps(post_args)
 
-        # set content type and accept headers to handle JSON
-        if http_method in ("POST", "PUT", "DELETE") and not files:
-            headers['Content-Type'] = 'application/json; charset=utf-8'
-
-        # construct the full URL without query parameters
-        if uri_path[0] == '/':
-            uri_path = uri_path[1:]
-        url = Config["BaseUrl"].format(version_number=self.version) + uri_path
-
-        # API Key authentication
-        headers['Content-Type'] = 'application/json'
-        headers['Authorization'] = "Basic {}".format(base64.b64encode(bytes("{}:".format(self.api_key), 'utf-8'))
-                                                     .decode())
-
-        # perform the HTTP requests, if possible uses OAuth authentication
-        response = self.http_service.request(http_method, url, params=query_params,
-                                             headers=headers, data=data, files=files)
-
-        if response.status_code == 400:
-            logging.error("Failed request - {}".format(response.request))
-            raise MissingOrInvalidParameter("{} at {}".format(response.text, url), response)
-        if response.status_code == 401:
-            logging.error("Failed request - {}".format(response.request))
-            raise Unauthorized("{} at {}".format(response.text, url), response)
-        if response.status_code == 403:
-            logging.error("Failed request - {}".format(response.request))
-            raise NoPermission("{} at {}".format(response.text, url), response)
-        if response.status_code == 404:
-            logging.error("Failed request - {}".format(response.request))
-            raise NotFound("{} at {}".format(response.text, url), response)
-        if response.status_code not in [200, 201, 202]:
-            raise ResourceUnavailable("%s at %s" % (response.text, url), response)
+        # JSON content type and API Key authentication
+        headers = dict(headers, **self._headers) if headers else self._headers
+
+        # endpoint URLs are already absolute, other paths are relative to the API root
+        if uri_path.startswith(_ABSOLUTE_URL_PREFIXES):
+            url = uri_path
+        else:
+            url = self.endpoints.base_url + uri_path.lstrip('/')
+
+        # a record already received is only sent again if it changed
+        validator = None
+        if self.validators is not None and http_method == 'GET' and not query_params:
+            validator = self.validators.get(url)
+            if validator is not None:
+                headers = dict(headers, **validator.headers())
+
+        def send():
+            return self._send(http_method, url, query_params, headers, data, files)
+
+        if (self._single_flight is not None and http_method == 'GET' and files is None and
+                current_deadline() is None):
+            # concurrent identical reads share one request, each caller then parsing the response itself - not those
+            # made under a deadline, which would have a caller wait on, or fail with, another caller's deadline
+            key = (url, json.dumps(query_params, sort_keys=True, default=str),
+                   tuple(sorted(headers.items())) if headers is not self._headers else None)
+            response = self._single_flight.do(key, send)
+        else:
+            response = send()
+
+        if validator is not None and response.status_code == NOT_MODIFIED:
+            return json.loads(validator.body)
+
+        _raise_for_status(response, url)
 
         try:
-            return response.json()
+            json_obj = response.json()
         except ValueError:  # Insightly API does not return JSON for all request types e.g. DELETE
             return response.content
+        if self.validators is not None and http_method == 'GET' and not query_params:
+            self.validators.remember(url, response, json_obj)
+        return json_obj
+
+    def _send(self, http_method, url, query_params, headers, data, files):
+        """Perform an HTTP request, retrying throttled requests per the scheduler, and idempotent requests failing
+        transiently per the retry policy. Raises CircuitOpen without sending anything while the circuit breaker is
+        open, and DeadlineExceeded once the deadline of the operation, if any, has passed.
+
+        :return: the last response received
+        """
+        idempotent = http_method.upper() in IDEMPOTENT_METHODS
+        breaker = self.circuit_breaker
+        deadline = current_deadline()
+        timeout = (self.connect_timeout, self.read_timeout)
+        attempt = retries = 0
+        while True:
+            limit = None
+            if deadline is not None:
+                deadline.check()
+                limit = deadline.remaining()
+            if not self.scheduler.acquire(timeout=limit):
+                raise DeadlineExceeded(deadline.seconds)
+            if breaker is not None:
+                breaker.before_request()
+            try:
+                response = self.http_service.request(http_method, url, params=query_params, headers=headers,
+                                                     data=data, files=files,
+                                                     timeout=deadline.clip(timeout) if deadline else timeout)
+            except Exception as e:
+                if breaker is not None:
+                    breaker.record(exception=e)
+                if deadline is not None and deadline.remaining() <= 0:
+                    raise DeadlineExceeded(deadline.seconds)
+                if not idempotent or not self.retry_policy.should_retry(http_method, retries, exception=e):
+                    raise
+                logging.warning("Failed request, retrying - {} {} ({})".format(http_method, url, e))
+                self.retry_policy.backoff(retries, limit=deadline.remaining() if deadline else None)
+                retries += 1
+                continue
+            if breaker is not None:
+                breaker.record(response)
+            throttled = self.scheduler.observe(response)
+            if (throttled and attempt < self.scheduler.max_retries and
+                    (idempotent or response.status_code in RESEND_STATUS_CODES)):
+                logging.warning("Throttled request, retrying - {} {} (HTTP status: {})".format(
+                    http_method, url, response.status_code))
+                self.scheduler.backoff(attempt, limit=deadline.remaining() if deadline else None)
+                attempt += 1
+                continue
+            if idempotent and self.retry_policy.should_retry(http_method, retries, response=response):
+                logging.warning("Failed request, retrying - {} {} (HTTP status: {})".format(
+                    http_method, url, response.status_code))
+                self.retry_policy.backoff(retries, limit=deadline.remaining() if deadline else None)
+                retries += 1
+                continue
+            return response
+
+    def _create(self, entity, post_args):
+        """POST a new record. A transient failure, 503 included, is only retried once a Search on the record's natural
+        keys shows the failed attempt did not create it, so the record is never created twice.
+
+        :entity: top level key in config.yaml e.g. Contacts
+        :post_args: the record's fields
+        :return: the JSON of the created record
+        :rtype: dict
+        """
+        endpoint = self.endpoints[entity, "Add"]
+        attempt = 0
+        while True:
+            sent_at = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            try:
+                return self.get_json(endpoint.url, http_method=endpoint.method, post_args=post_args)
+            except Exception as e:
+                if not self.retry_policy.is_transient(exception=e):
+                    raise
+                try:
+                    created = self._find_created(entity, post_args, sent_at)
+                except Exception:  # whether the record was created is unknown, so it is not sent again
+                    self.retry_policy.give_up()
+                    raise e
+                if created is not None:
+                    logging.warning("Failed request created its record - POST {} ({})".format(endpoint.url, e))
+                    self.retry_policy.record_recovered()
+                    return created
+                if not self.retry_policy.should_retry(endpoint.method, attempt, exception=e, idempotent=True):
+                    raise
+                logging.warning("Failed request, retrying - POST {} ({})".format(endpoint.url, e))
+                deadline = current_deadline()
+                self.retry_policy.backoff(attempt, limit=deadline.remaining() if deadline else None)
+                attempt += 1
+
+    def _find_created(self, entity, post_args, sent_at):
+        """Search for a record created by a POST that failed, by its natural keys
+
+        :entity: top level key in config.yaml e.g. Contacts
+        :post_args: the fields POSTed
+        :sent_at: UTC time the POST was sent
+        :return: the JSON of the record, or None if not found
+        :rtype: dict
+        """
+        keys = [(param, field) for param, field in NATURAL_KEYS[entity] if post_args.get(field) is not None]
+        if not keys:
+            return None
+        search_filter = dict((param, quote(force_str(post_args[field]))) for param, field in keys)
+        created_since = sent_at - datetime.timedelta(seconds=self.retry_policy.clock_skew)
+        for page in self._pages(entity, search_filter):
+            for obj in page:
+                if any(obj.get(field) != post_args[field] for _, field in keys):
+                    continue
+                created = obj.get('DATE_CREATED_UTC')
+                if created and parse_activity_date(created) >= created_since:
+                    return obj
+        return None
 
     # def search(self, query, partial_match=False, models=[],
     #            board_ids=[], org_ids=[], card_ids=[]):
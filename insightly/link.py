@@ -2,11 +2,11 @@
 
 from __future__ import with_statement, print_function, absolute_import
 
-from insightly import InsightlyBase
+from insightly import InsightlyBase, InsightlyRecord, record_slots
 from insightly.compat import force_str
+from insightly.models import encode_value
 
 import json
-import jsonpickle
 
 
 class OrganisationLink(InsightlyBase):
@@ -59,7 +59,7 @@ class OrganisationLink(InsightlyBase):
     def to_json(self):
         """ Strip out any non-insightly parameters """
 
-        return jsonpickle.encode(self, unpicklable=False)
+        return json.dumps(encode_value(self))
 
 
 class ContactLink(InsightlyBase):
@@ -112,7 +112,7 @@ class ContactLink(InsightlyBase):
     def to_json(self):
         """ Strip out any non-insightly parameters """
 
-        return jsonpickle.encode(self, unpicklable=False)
+        return json.dumps(encode_value(self))
 
 
 class OpportunityLink(InsightlyBase):
@@ -165,15 +165,20 @@ class OpportunityLink(InsightlyBase):
     def to_json(self):
         """ Strip out any non-insightly parameters """
 
-        return jsonpickle.encode(self, unpicklable=False)
+        return json.dumps(encode_value(self))
 
 
-class Link(InsightlyBase):
+class Link(InsightlyRecord):
     """
         Class representing an Insightly Link i.e. a link between two different types of entities. Link attributes are
         stored as normal Python attributes.
     """
 
+    # attributes, stored in slots - see InsightlyRecord
+    _attributes = ('LINK_ID', 'ORGANISATION_ID', 'CONTACT_ID', 'OPPORTUNITY_ID', 'SECOND_OPPORTUNITY_ID', 'PROJECT_ID',
+                   'SECOND_PROJECT_ID', 'ROLE', 'DETAILS')
+    __slots__ = record_slots(_attributes)
+
     def __init__(self, link_id=None, organisation_id=None, contact_id=None, opportunity_id=None,
                  second_opportunity_id=None, project_id=None, second_project_id=None,
                  role=None, details=None):
@@ -185,21 +190,18 @@ class Link(InsightlyBase):
         self.OPPORTUNITY_ID = opportunity_id
         self.SECOND_OPPORTUNITY_ID = second_opportunity_id
         self.PROJECT_ID = project_id
-        self.SECOND_OPPORTUNITY_ID = second_project_id
+        self.SECOND_PROJECT_ID = second_project_id
         self.ROLE = role
         self.DETAILS = details
 
     def __getstate__(self):
         """ Strip out any non-insightly parameters """
-        state = self.__dict__.copy()
+        state = self._asdict()
         del state['id']
         if state['LINK_ID'] is None:
             del state['LINK_ID']
         return state
 
-    def __setstate__(self, state):
-        self.__dict__.update(state)
-
     @classmethod
     def from_json(cls, json_obj=None):
         """
@@ -221,6 +223,6 @@ class Link(InsightlyBase):
     def to_json(self):
         """ Strip out any non-insightly parameters """
 
-        return jsonpickle.encode(self, unpicklable=False)
+        return json.dumps(encode_value(self))
 
 
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+from insightly.compat import force_str
+from insightly.contact import Contact
+from insightly.helpers import parse_activity_dates
+from insightly.opportunity import Opportunity
+from insightly.organisation import Organisation
+
+# entity types fetched in batches through the ids filter of their listing, by config.yaml section
+_BATCHED_TYPES = dict((cls._entity, cls) for cls in (Contact, Organisation, Opportunity))
+
+# query appended to a listing to fetch only the given records
+IDS_QUERY = "&ids={ids}"
+
+
+class Deferred(object):
+    """
+    A record asked of a Loader. Its value is fetched, along with every other record asked of the loader so far, the
+    first time any of them is read.
+    """
+
+    __slots__ = ('_loader', 'entity', 'id')
+
+    def __init__(self, loader, entity, record_id):
+        self._loader = loader
+        self.entity = entity
+        self.id = record_id
+
+    def get(self):
+        """Return the record, or None if Insightly has no record with this ID"""
+        return self._loader._result(self.entity, self.id)
+
+    def __repr__(self):
+        return force_str(u'<Deferred {} {}>'.format(self.entity, self.id))
+
+
+class Loader(object):
+    """
+    Resolves the IDs met while walking records - Link.CONTACT_ID, OPPORTUNITY_ID, OWNER_USER_ID, the partners of
+    Organisation and Contact links - into records in a few requests rather than one get_* call per ID.
+
+    IDs asked for with ``load`` are queued; the first read of any queued record fetches all of them, in batches of
+    ``batch_size`` per request through the ``ids`` filter of each entity's listing. Users are read from a single
+    listing. Every record fetched is kept for the life of the loader, so a loader should cover one unit of work.
+    """
+
+    def __init__(self, client, batch_size=100, parse_dates=parse_activity_dates):
+        """
+        :client: Insightly API client
+        :batch_size: number of IDs fetched per request
+        :parse_dates: callable returning a page of records with their timestamps parsed, or left to be parsed lazily
+        """
+        self.client = client
+        self.batch_size = batch_size
+        self.parse_dates = parse_dates
+        self._pending = dict()
+        self._loaded = dict()
+
+    def load(self, entity, record_id):
+        """Queue a record to be fetched
+
+        :entity: the entity type - Contact, Organisation, Opportunity or User, or its config.yaml section e.g. Users
+        :record_id: the record's identifier
+        :rtype: Deferred
+        """
+        entity = getattr(entity, '_entity', entity)
+        if entity != "Users" and entity not in _BATCHED_TYPES:
+            raise ValueError("Cannot load {}".format(entity))
+        if (entity, record_id) not in self._loaded:
+            self._pending.setdefault(entity, set()).add(record_id)
+        return Deferred(self, entity, record_id)
+
+    def load_many(self, entity, ids):
+        """Fetch several records at once, along with any others queued
+
+        :entity: the entity type - Contact, Organisation, Opportunity or User, or its config.yaml section e.g. Users
+        :ids: identifiers of the records
+        :return: the records, in the order of ids, None for each ID Insightly has no record for
+        :rtype: list
+        """
+        deferred = [self.load(entity, record_id) for record_id in ids]
+        self.dispatch()
+        return [record.get() for record in deferred]
+
+    def dispatch(self):
+        """Fetch every record queued"""
+        pending, self._pending = self._pending, dict()
+        for entity, ids in pending.items():
+            ids = [record_id for record_id in ids if record_id is not None and (entity, record_id) not in self._loaded]
+            if entity == "Users":
+                self._load_users(ids)
+                continue
+            cls = _BATCHED_TYPES[entity]
+            endpoint = self.client.endpoints[entity, "GetAll"]
+            ids = sorted(ids)
+            for start in range(0, len(ids), self.batch_size):
+                batch = ids[start:start + self.batch_size]
+                url = endpoint.url.format(skip=0, top=len(batch)) + IDS_QUERY.format(
+                    ids=",".join(str(record_id) for record_id in batch))
+                page = self.client.get_json(url, http_method=endpoint.method)
+                for obj in self.parse_dates(page):
+                    self._loaded[entity, obj[cls._id_field]] = cls.from_json(self.client, json_obj=obj)
+                for record_id in batch:
+                    self._loaded.setdefault((entity, record_id), None)
+
+    def _load_users(self, ids):
+        if not ids:
+            return
+        for user in self.client.list_users():
+            self._loaded["Users", user.USER_ID] = user
+        for record_id in ids:
+            self._loaded.setdefault(("Users", record_id), None)
+
+    def _result(self, entity, record_id):
+        key = (entity, record_id)
+        if key not in self._loaded and record_id is not None:
+            self.dispatch()
+        return self._loaded.get(key)
@@ -1,4 +1,10 @@
 # -*- coding: utf-8 -*-
 
 from .address import *
-from .serialization import *
\ No newline at end of file
+from .serialization import *
+
+
+def __getattr__(name):
+    if name == 'DatetimeHandler':  # imports jsonpickle, so not imported by *
+        return serialization.DatetimeHandler
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -1,10 +1,97 @@
 # -*- coding: utf-8 -*-
 
-import jsonpickle
+import datetime
 
+# datetime format required by the Insightly API
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
 
-class DatetimeHandler(jsonpickle.handlers.BaseHandler):
-    """ Serialise Datetime objects in required format for Insightly API """
+# values written to the request body as they are
+_PLAIN_TYPES = (type(None), bool, int, float, str)
 
-    def flatten(self, obj, data):
-        return obj.strftime('%Y-%m-%d %H:%M:%S')
+_MISSING = object()
+
+
+def encode_value(value):
+    """Convert a value to its JSON compatible form for the Insightly API - datetimes are formatted, Insightly objects
+    are reduced to their state
+
+    :rtype: JSON compatible value
+    """
+    if isinstance(value, _PLAIN_TYPES):
+        return value
+    if isinstance(value, datetime.datetime):
+        return value.strftime(DATETIME_FORMAT)
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    if isinstance(value, dict):
+        return dict((key, encode_value(item)) for key, item in value.items())
+    if hasattr(value, '__getstate__'):
+        return encode_value(value.__getstate__())
+    return encode_value(value.__dict__)
+
+
+class RecordEncoder(object):
+    """
+    Builds the request body for an entity from its AcceptedFields in config.yaml, reading attributes directly rather
+    than reflecting over the whole object. The identifier field is left out while it is None.
+    """
+
+    def __init__(self, fields, id_field):
+        """
+        :fields: the accepted field names, in the order they are written
+        :id_field: the entity's identifier field e.g. CONTACT_ID
+        """
+        self.fields = tuple(fields)
+        self.id_field = id_field
+
+    def encode(self, obj):
+        """Return the request body for an entity
+
+        :rtype: dict
+        """
+        body = dict()
+        for field in self.fields:
+            value = getattr(obj, field, _MISSING)
+            if value is _MISSING:
+                continue
+            body[field] = value if isinstance(value, _PLAIN_TYPES) else encode_value(value)
+        if body.get(self.id_field, 0) is None:
+            del body[self.id_field]
+        return body
+
+
+_encoders = dict()
+
+
+def record_encoder(config, entity, id_field):
+    """Return the encoder for an entity, building it on first use
+
+    :config: the parsed config.yaml
+    :entity: top level key in config.yaml e.g. Contacts
+    :id_field: the entity's identifier field e.g. CONTACT_ID
+    :rtype: RecordEncoder
+    """
+    encoder = _encoders.get(entity)
+    if encoder is None:
+        encoder = _encoders.setdefault(entity, RecordEncoder(config[entity]["AcceptedFields"], id_field))
+    return encoder
+
+
+def _datetime_handler():
+    # jsonpickle is no longer used by the entities, and slow to import, so only imported for DatetimeHandler users
+    import jsonpickle
+
+    class DatetimeHandler(jsonpickle.handlers.BaseHandler):
+        """ Serialise Datetime objects in required format for Insightly API """
+
+        def flatten(self, obj, data):
+            return obj.strftime(DATETIME_FORMAT)
+
+    return DatetimeHandler
+
+
+def __getattr__(name):
+    if name == 'DatetimeHandler':
+        handler = globals()[name] = _datetime_handler()
+        return handler
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -2,36 +2,43 @@
 
 from __future__ import with_statement, print_function, absolute_import
 
-from insightly import InsightlyBase
+from insightly import InsightlyBase, InsightlyRecord, record_slots
 from insightly.compat import force_str
+from insightly.config import Config
 from insightly.custom_field import CustomField
 from insightly.exceptions import DoesNotExist
 from insightly.link import Link
-from insightly.models import DatetimeHandler
-from insightly.helpers import parse_activity_date
+from insightly.models import record_encoder
+from insightly.helpers import LazyActivityDate, set_activity_date
 
-import os
-import yaml
 import json
-import datetime
-import jsonpickle
 
-# set serialisation for objects per Insightly API requirements
-jsonpickle.handlers.registry.register(datetime.datetime, DatetimeHandler)
 
-config_file_path = os.path.join(os.path.dirname(__file__), "config.yaml")
-
-with open(config_file_path) as config_file:
-    Config = yaml.load(config_file, Loader=yaml.FullLoader)
-
-
-class Opportunity(InsightlyBase):
+class Opportunity(InsightlyRecord):
     """
     Class representing an Insightly Opportunity. Opportunity attributes are stored as normal
     Python attributes; access to all sub-objects, however, is always
     an API call (Links).
     """
 
+    # config.yaml section and identifier field for this entity
+    _entity = "Opportunities"
+    _id_field = "OPPORTUNITY_ID"
+
+    # attributes, stored in slots - see InsightlyRecord
+    _attributes = ('client', 'OPPORTUNITY_ID', 'OPPORTUNITY_NAME', 'OPPORTUNITY_DETAILS', 'ORGANISATION_ID',
+                   'OWNER_USER_ID', 'BID_AMOUNT', 'BID_CURRENCY', 'BID_DURATION', 'BID_TYPE', 'CAN_DELETE', 'CAN_EDIT',
+                   'CATEGORY_ID', 'CUSTOMFIELDS', 'FORECAST_CLOSE_DATE', 'ACTUAL_CLOSE_DATE', 'IMAGE_URL', 'LINKS',
+                   'OPPORTUNITY_STATE', 'OPPORTUNITY_STATE_REASON_ID', 'OPPORTUNITY_VALUE', 'PIPELINE_ID',
+                   'PROBABILITY', 'RESPONSIBLE_USER_ID', 'STAGE_ID', 'TAGS', 'VISIBLE_TEAM_ID', 'VISIBLE_TO',
+                   'VISIBLE_USER_IDS', 'DATE_CREATED_UTC', 'DATE_UPDATED_UTC')
+    __slots__ = record_slots(_attributes)
+    _nested = {'CUSTOMFIELDS': CustomField.from_json, 'LINKS': Link.from_json}
+
+    # timestamps, parsed on first read when the client uses lazy dates
+    DATE_CREATED_UTC = LazyActivityDate()
+    DATE_UPDATED_UTC = LazyActivityDate()
+
     def __init__(self, client, opportunity_id=None, opportunity_name=None, opportunity_details=None,
                  organisation_id=None, owner_user_id=None, bid_amount=None, bid_currency=None, bid_duration=None,
                  bid_type=None, deletable=None, editable=None, category_id=None, customfields=None,
@@ -76,23 +83,21 @@ class Opportunity(InsightlyBase):
         self.VISIBLE_TO = visible_to
         self.VISIBLE_USER_IDS = visible_user_ids
 
+        lazy_dates = getattr(client, 'lazy_dates', False)
         if created:
-            self.DATE_CREATED_UTC = parse_activity_date(created)
+            set_activity_date(self, 'DATE_CREATED_UTC', created, lazy=lazy_dates)
         if last_updated:
-            self.DATE_UPDATED_UTC = parse_activity_date(last_updated)
+            set_activity_date(self, 'DATE_UPDATED_UTC', last_updated, lazy=lazy_dates)
 
     def __getstate__(self):
         """ Strip out any non-insightly parameters """
-        state = self.__dict__.copy()
-        del state['client']
+        state = self._asdict()
+        state.pop('client', None)
         del state['id']
         if state['OPPORTUNITY_ID'] is None:
             del state['OPPORTUNITY_ID']
         return state
 
-    def __setstate__(self, state):
-        self.__dict__.update(state)
-
     @classmethod
     def from_json(cls, insightly_client=None, json_obj=None):
         """
@@ -101,6 +106,8 @@ class Opportunity(InsightlyBase):
         :insightly_client: the insightly client
         :json_obj: the opportunity json object
         """
+        if getattr(insightly_client, 'lazy_entities', False):
+            return cls.lazy_from_json(json_obj, client=insightly_client)
 
         opportunity = Opportunity(client=insightly_client, opportunity_id=json_obj['OPPORTUNITY_ID'],
                                   opportunity_name=json_obj['OPPORTUNITY_NAME'],
@@ -133,40 +140,93 @@ class Opportunity(InsightlyBase):
                                   created=json_obj['DATE_CREATED_UTC'],
                                   last_updated=json_obj['DATE_UPDATED_UTC'])
 
+        opportunity._keep_snapshot()
         return opportunity
 
     def __repr__(self):
         return force_str(u'<Opportunity {}  {}>'.format(self.OPPORTUNITY_ID, self.OPPORTUNITY_NAME))
 
+    def to_dict(self):
+        """ Request body for this Opportunity, holding only the fields accepted by Insightly """
+
+        return record_encoder(Config, self._entity, self._id_field).encode(self)
+
     def to_json(self):
         """ Strip out any non-insightly parameters """
 
-        return jsonpickle.encode(self, unpicklable=False)
+        return json.dumps(self.to_dict())
 
     def fetch(self):
-        """Fetch all attributes for this Organisation"""
-        json_obj = self.client.get_json(Config["Opportunities"]["Endpoints"]["Get"]["Url"]
+        """Refresh this Opportunity from Insightly, in place
+
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
+        json_obj = self.client.get_json(self.client.endpoints["Opportunities", "Get"].url
                                         .format(id=self.OPPORTUNITY_ID),
-                                        http_method=Config["Opportunities"]["Endpoints"]["Get"]["Method"])
-        self.from_json(json_obj=json_obj)
+                                        http_method=self.client.endpoints["Opportunities", "Get"].method)
+        changed = self._update_from_json(json_obj)
+        self._changed(json_obj)
+        return changed
 
     def save(self):
-        """ Create or update  """
+        """Create or update this Opportunity, then apply the record as saved by Insightly in place. An update sends
+        the whole record, as Insightly replaces it, but no request at all when nothing changed since it was received
+
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
         if self.OPPORTUNITY_ID is None:  # create a new opportunity
             json_obj = self.client.get_json(
-                    Config["Opportunities"]["Endpoints"]["Add"]["Url"],
-                    http_method=Config["Opportunities"]["Endpoints"]["Add"]["Method"],
-                    post_args=json.loads(self.to_json()))
-            # Set initial data from Insightly, includes any updates
-            self.from_json(json_obj=json_obj)
-            self.OPPORTUNITY_ID = json_obj["OPPORTUNITY_ID"]
+                    self.client.endpoints["Opportunities", "Add"].url,
+                    http_method=self.client.endpoints["Opportunities", "Add"].method,
+                    post_args=self.to_dict())
         else:  # update existing opportunity
+            if not self._needs_update():  # unchanged since received
+                return set()
             json_obj = self.client.get_json(
-                Config["Opportunities"]["Endpoints"]["Update"]["Url"].format(id=self.OPPORTUNITY_ID),
-                http_method=Config["Opportunities"]["Endpoints"]["Update"]["Method"],
-                post_args=json.loads(self.to_json()))
-            # Set new data from Insightly, includes any updates
-            self.from_json(json_obj=json_obj)
+                self.client.endpoints["Opportunities", "Update"].url.format(id=self.OPPORTUNITY_ID),
+                http_method=self.client.endpoints["Opportunities", "Update"].method,
+                post_args=self.to_dict())
+        # apply the record as saved by Insightly, including its ID when created
+        changed = self._update_from_json(json_obj)
+        self._changed(json_obj)
+        return changed
+
+    async def fetch_async(self):
+        """Refresh this Opportunity from Insightly in place, using an AsyncInsightlyClient
+
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
+        json_obj = await self.client.get_json(self.client.endpoints["Opportunities", "Get"].url
+                                              .format(id=self.OPPORTUNITY_ID),
+                                              http_method=self.client.endpoints["Opportunities", "Get"].method)
+        changed = self._update_from_json(json_obj)
+        self._changed(json_obj)
+        return changed
+
+    async def save_async(self):
+        """Create or update this Opportunity using an AsyncInsightlyClient, then apply the record as saved by Insightly
+        in place. An update sends the whole record, but no request at all when nothing changed since it was received
+
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
+        if self.OPPORTUNITY_ID is None:  # create a new opportunity
+            json_obj = await self.client.get_json(
+                    self.client.endpoints["Opportunities", "Add"].url,
+                    http_method=self.client.endpoints["Opportunities", "Add"].method,
+                    post_args=self.to_dict())
+        else:  # update existing opportunity
+            if not self._needs_update():  # unchanged since received
+                return set()
+            json_obj = await self.client.get_json(
+                self.client.endpoints["Opportunities", "Update"].url.format(id=self.OPPORTUNITY_ID),
+                http_method=self.client.endpoints["Opportunities", "Update"].method,
+                post_args=self.to_dict())
+        # apply the record as saved by Insightly, including its ID when created
+        return self._update_from_json(json_obj)
 
     def get_link(self, link_id):
         """Get a link for this organisation
@@ -201,10 +261,11 @@ class Opportunity(InsightlyBase):
         if details:
             post_args['DETAILS'] = details
 
-        json_obj = self.client.get_json(Config["Opportunities"]["Endpoints"]["AddLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Opportunities", "AddLink"].url
                                         .format(id=self.OPPORTUNITY_ID),
-                                        http_method=Config["Opportunities"]["Endpoints"]["AddLink"]["Method"],
+                                        http_method=self.client.endpoints["Opportunities", "AddLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return Link.from_json(json_obj)
 
@@ -236,10 +297,11 @@ class Opportunity(InsightlyBase):
         if not details and link.DETAILS:
             post_args['DETAILS'] = link.DETAILS
 
-        json_obj = self.client.get_json(Config["Opportunities"]["Endpoints"]["UpdateLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Opportunities", "UpdateLink"].url
                                         .format(id=self.OPPORTUNITY_ID),
-                                        http_method=Config["Opportunities"]["Endpoints"]["UpdateLink"]["Method"],
+                                        http_method=self.client.endpoints["Opportunities", "UpdateLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return Link.from_json(json_obj)
 
@@ -261,10 +323,11 @@ class Opportunity(InsightlyBase):
         if details:
             post_args['DETAILS'] = details
 
-        json_obj = self.client.get_json(Config["Opportunities"]["Endpoints"]["AddLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Opportunities", "AddLink"].url
                                         .format(id=self.OPPORTUNITY_ID),
-                                        http_method=Config["Opportunities"]["Endpoints"]["AddLink"]["Method"],
+                                        http_method=self.client.endpoints["Opportunities", "AddLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return Link.from_json(json_obj)
 
@@ -296,10 +359,11 @@ class Opportunity(InsightlyBase):
         if not details and link.DETAILS:
             post_args['DETAILS'] = link.DETAILS
 
-        json_obj = self.client.get_json(Config["Opportunities"]["Endpoints"]["UpdateLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Opportunities", "UpdateLink"].url
                                         .format(id=self.OPPORTUNITY_ID),
-                                        http_method=Config["Opportunities"]["Endpoints"]["UpdateLink"]["Method"],
+                                        http_method=self.client.endpoints["Opportunities", "UpdateLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return Link.from_json(json_obj)
 
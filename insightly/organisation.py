@@ -2,37 +2,45 @@
 
 from __future__ import with_statement, print_function, absolute_import
 
-from insightly import InsightlyBase
+from insightly import InsightlyRecord, record_slots
 from insightly.compat import force_str
+from insightly.config import Config
 from insightly.custom_field import  CustomField
 from insightly.exceptions import DoesNotExist
 from insightly.link import Link, OrganisationLink
-from insightly.models import Address
-from insightly.models import DatetimeHandler
-from insightly.helpers import parse_activity_date
+from insightly.models import Address, record_encoder
+from insightly.helpers import LazyActivityDate, set_activity_date
 
-import os
-import yaml
 import json
-import datetime
-import jsonpickle
 
-# set serialisation for objects per Insightly API requirements
-jsonpickle.handlers.registry.register(datetime.datetime, DatetimeHandler)
 
-config_file_path = os.path.join(os.path.dirname(__file__), "config.yaml")
-
-with open(config_file_path) as config_file:
-    Config = yaml.load(config_file, Loader=yaml.FullLoader)
-
-
-class Organisation(InsightlyBase):
+class Organisation(InsightlyRecord):
     """
     Class representing an Insightly Organisation. Organisation attributes are stored as normal
     Python attributes; access to all sub-objects, however, is always
     an API call (Lists, Cards).
     """
 
+    # config.yaml section and identifier field for this entity
+    _entity = "Organisations"
+    _id_field = "ORGANISATION_ID"
+
+    # attributes, stored in slots - see InsightlyRecord
+    _attributes = ('client', 'ORGANISATION_ID', 'ORGANISATION_NAME', 'BACKGROUND', 'ADDRESS_BILLING_CITY',
+                   'ADDRESS_BILLING_COUNTRY', 'ADDRESS_BILLING_POSTCODE', 'ADDRESS_BILLING_STATE',
+                   'ADDRESS_BILLING_STREET', 'ADDRESS_SHIP_CITY', 'ADDRESS_SHIP_COUNTRY', 'ADDRESS_SHIP_POSTCODE',
+                   'ADDRESS_SHIP_STATE', 'ADDRESS_SHIP_STREET', 'CAN_DELETE', 'CAN_EDIT', 'CUSTOMFIELDS', 'DATES',
+                   'DATE_CREATED_UTC', 'DATE_UPDATED_UTC', 'EMAILDOMAINS', 'IMAGE_URL', 'LINKS', 'ORGANISATIONLINKS',
+                   'OWNER_USER_ID', 'PHONE', 'PHONE_FAX', 'SOCIAL_FACEBOOK', 'SOCIAL_LINKEDIN', 'SOCIAL_TWITTER',
+                   'TAGS', 'VISIBLE_TEAM_ID', 'VISIBLE_TO', 'VISIBLE_USER_IDS', 'WEBSITE')
+    __slots__ = record_slots(_attributes)
+    _nested = {'CUSTOMFIELDS': CustomField.from_json, 'LINKS': Link.from_json,
+               'ORGANISATIONLINKS': OrganisationLink.from_json}
+
+    # timestamps, parsed on first read when the client uses lazy dates
+    DATE_CREATED_UTC = LazyActivityDate()
+    DATE_UPDATED_UTC = LazyActivityDate()
+
     def __init__(self, client, organisation_id=None, name='', background=None, billing_address=Address(),
                  shipping_address=Address(), deletable=True, editable=True, custom_fields=[],
                  dates=[], created=None, last_updated=None, email_domains=[], image_url=None, links=[],
@@ -73,10 +81,11 @@ class Organisation(InsightlyBase):
         self.CUSTOMFIELDS = custom_fields
         self.DATES = dates
 
+        lazy_dates = getattr(client, 'lazy_dates', False)
         if created:
-            self.DATE_CREATED_UTC = parse_activity_date(created)
+            set_activity_date(self, 'DATE_CREATED_UTC', created, lazy=lazy_dates)
         if last_updated:
-            self.DATE_UPDATED_UTC = parse_activity_date(last_updated)
+            set_activity_date(self, 'DATE_UPDATED_UTC', last_updated, lazy=lazy_dates)
 
         self.EMAILDOMAINS = email_domains
         self.IMAGE_URL = image_url
@@ -95,16 +104,13 @@ class Organisation(InsightlyBase):
         self.WEBSITE = website
 
     def __getstate__(self):
-        state = self.__dict__.copy()
-        del state['client']
+        state = self._asdict()
+        state.pop('client', None)
         del state['id']
         if state['ORGANISATION_ID'] is None:
             del state['ORGANISATION_ID']
         return state
 
-    def __setstate__(self, state):
-        self.__dict__.update(state)
-
     @classmethod
     def from_json(cls, insightly_client=None, json_obj=None):
         """
@@ -113,6 +119,8 @@ class Organisation(InsightlyBase):
         :insightly_client: the insightly client
         :json_obj: the organisation json object
         """
+        if getattr(insightly_client, 'lazy_entities', False):
+            return cls.lazy_from_json(json_obj, client=insightly_client)
 
         organisation = Organisation(client=insightly_client, organisation_id=json_obj['ORGANISATION_ID'],
                                     name=json_obj['ORGANISATION_NAME'], background=json_obj['BACKGROUND'],
@@ -121,11 +129,11 @@ class Organisation(InsightlyBase):
                                                             json_obj['ADDRESS_BILLING_STATE'],
                                                             json_obj['ADDRESS_BILLING_POSTCODE'],
                                                             json_obj['ADDRESS_BILLING_COUNTRY']),
-                                    shipping_address=Address(json_obj['ADDRESS_BILLING_STREET'],
-                                                             json_obj['ADDRESS_BILLING_CITY'],
-                                                             json_obj['ADDRESS_BILLING_STATE'],
-                                                             json_obj['ADDRESS_BILLING_POSTCODE'],
-                                                             json_obj['ADDRESS_BILLING_COUNTRY']),
+                                    shipping_address=Address(json_obj['ADDRESS_SHIP_STREET'],
+                                                             json_obj['ADDRESS_SHIP_CITY'],
+                                                             json_obj['ADDRESS_SHIP_STATE'],
+                                                             json_obj['ADDRESS_SHIP_POSTCODE'],
+                                                             json_obj['ADDRESS_SHIP_COUNTRY']),
                                     deletable=json_obj['CAN_DELETE'], editable=json_obj['CAN_EDIT'],
                                     custom_fields=[CustomField.from_json(obj) for obj in json_obj['CUSTOMFIELDS']],
                                     dates=json_obj['DATES'], created=json_obj['DATE_CREATED_UTC'],
@@ -141,40 +149,93 @@ class Organisation(InsightlyBase):
                                     visible_to=json_obj['VISIBLE_TO'], visible_user_ids=json_obj['VISIBLE_USER_IDS'],
                                     website=json_obj['WEBSITE'])
 
+        organisation._keep_snapshot()
         return organisation
 
     def __repr__(self):
         return force_str(u'<Organisation {}  {}>'.format(self.ORGANISATION_ID, self.ORGANISATION_NAME))
 
+    def to_dict(self):
+        """ Request body for this Organisation, holding only the fields accepted by Insightly """
+
+        return record_encoder(Config, self._entity, self._id_field).encode(self)
+
     def to_json(self):
         """ Strip out any non-insightly parameters """
 
-        return jsonpickle.encode(self, unpicklable=False)
+        return json.dumps(self.to_dict())
 
     def fetch(self):
-        """Fetch all attributes for this Organisation"""
-        json_obj = self.client.get_json(Config["Organisations"]["Endpoints"]["Get"]["Url"]
+        """Refresh this Organisation from Insightly, in place
+
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
+        json_obj = self.client.get_json(self.client.endpoints["Organisations", "Get"].url
                                         .format(id=self.ORGANISATION_ID),
-                                        http_method=Config["Organisations"]["Endpoints"]["Get"]["Method"])
-        self.from_json(json_obj=json_obj)
+                                        http_method=self.client.endpoints["Organisations", "Get"].method)
+        changed = self._update_from_json(json_obj)
+        self._changed(json_obj)
+        return changed
 
     def save(self):
-        """ Create or update  """
+        """Create or update this Organisation, then apply the record as saved by Insightly in place. An update sends
+        the whole record, as Insightly replaces it, but no request at all when nothing changed since it was received
+
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
         if self.ORGANISATION_ID is None:  # create a new organisation
             json_obj = self.client.get_json(
-                    Config["Organisations"]["Endpoints"]["Add"]["Url"],
-                    http_method=Config["Organisations"]["Endpoints"]["Add"]["Method"],
-                    post_args=json.loads(self.to_json()))
-            # Set initial data from Insightly, includes any updates
-            self.from_json(json_obj=json_obj)
-            self.ORGANISATION_ID = json_obj["ORGANISATION_ID"]
+                    self.client.endpoints["Organisations", "Add"].url,
+                    http_method=self.client.endpoints["Organisations", "Add"].method,
+                    post_args=self.to_dict())
         else:  # update existing organisation
+            if not self._needs_update():  # unchanged since received
+                return set()
             json_obj = self.client.get_json(
-                Config["Organisations"]["Endpoints"]["Update"]["Url"].format(id=self.ORGANISATION_ID),
-                http_method=Config["Organisations"]["Endpoints"]["Update"]["Method"],
-                post_args=json.loads(self.to_json()))
-            # Set new data from Insightly, includes any updates
-            self.from_json(json_obj=json_obj)
+                self.client.endpoints["Organisations", "Update"].url.format(id=self.ORGANISATION_ID),
+                http_method=self.client.endpoints["Organisations", "Update"].method,
+                post_args=self.to_dict())
+        # apply the record as saved by Insightly, including its ID when created
+        changed = self._update_from_json(json_obj)
+        self._changed(json_obj)
+        return changed
+
+    async def fetch_async(self):
+        """Refresh this Organisation from Insightly in place, using an AsyncInsightlyClient
+
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
+        json_obj = await self.client.get_json(self.client.endpoints["Organisations", "Get"].url
+                                              .format(id=self.ORGANISATION_ID),
+                                              http_method=self.client.endpoints["Organisations", "Get"].method)
+        changed = self._update_from_json(json_obj)
+        self._changed(json_obj)
+        return changed
+
+    async def save_async(self):
+        """Create or update this Organisation using an AsyncInsightlyClient, then apply the record as saved by Insightly
+        in place. An update sends the whole record, but no request at all when nothing changed since it was received
+
+        :return: the names of the attributes that changed
+        :rtype: set
+        """
+        if self.ORGANISATION_ID is None:  # create a new organisation
+            json_obj = await self.client.get_json(
+                    self.client.endpoints["Organisations", "Add"].url,
+                    http_method=self.client.endpoints["Organisations", "Add"].method,
+                    post_args=self.to_dict())
+        else:  # update existing organisation
+            if not self._needs_update():  # unchanged since received
+                return set()
+            json_obj = await self.client.get_json(
+                self.client.endpoints["Organisations", "Update"].url.format(id=self.ORGANISATION_ID),
+                http_method=self.client.endpoints["Organisations", "Update"].method,
+                post_args=self.to_dict())
+        # apply the record as saved by Insightly, including its ID when created
+        return self._update_from_json(json_obj)
 
     def get_organisation_link(self, organisation_link_id):
         """Get an organisation link for this organisation
@@ -207,10 +268,10 @@ class Organisation(InsightlyBase):
         if details:
             post_args['DETAILS'] = details
 
-        json_obj = self.client.get_json(Config["Organisations"]["Endpoints"]["AddOrganisationLink"]["Url"]
-                                        .format(id=self.ORGANISATION_ID),
-                                        http_method=Config["Organisations"]["Endpoints"]["AddOrganisationLink"]["Method"],
+        endpoint = self.client.endpoints["Organisations", "AddOrganisationLink"]
+        json_obj = self.client.get_json(endpoint.url.format(id=self.ORGANISATION_ID), http_method=endpoint.method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return OrganisationLink.from_json(json_obj)
 
@@ -243,11 +304,10 @@ class Organisation(InsightlyBase):
         if not details and organisation_link.DETAILS:
             post_args['DETAILS'] = organisation_link.DETAILS
 
-        json_obj = self.client.get_json(Config["Organisations"]["Endpoints"]["UpdateOrganisationLink"]["Url"]
-                                        .format(id=self.ORGANISATION_ID),
-                                        http_method=Config["Organisations"]["Endpoints"]["UpdateOrganisationLink"][
-                                            "Method"],
+        endpoint = self.client.endpoints["Organisations", "UpdateOrganisationLink"]
+        json_obj = self.client.get_json(endpoint.url.format(id=self.ORGANISATION_ID), http_method=endpoint.method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return OrganisationLink.from_json(json_obj)
 
@@ -284,10 +344,11 @@ class Organisation(InsightlyBase):
         if details:
             post_args['DETAILS'] = details
 
-        json_obj = self.client.get_json(Config["Organisations"]["Endpoints"]["AddLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Organisations", "AddLink"].url
                                         .format(id=self.ORGANISATION_ID),
-                                        http_method=Config["Organisations"]["Endpoints"]["AddLink"]["Method"],
+                                        http_method=self.client.endpoints["Organisations", "AddLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return Link.from_json(json_obj)
 
@@ -319,10 +380,11 @@ class Organisation(InsightlyBase):
         if not details and link.DETAILS:
             post_args['DETAILS'] = link.DETAILS
 
-        json_obj = self.client.get_json(Config["Organisations"]["Endpoints"]["UpdateLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Organisations", "UpdateLink"].url
                                         .format(id=self.ORGANISATION_ID),
-                                        http_method=Config["Organisations"]["Endpoints"]["UpdateLink"]["Method"],
+                                        http_method=self.client.endpoints["Organisations", "UpdateLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return Link.from_json(json_obj)
 
@@ -344,10 +406,11 @@ class Organisation(InsightlyBase):
         if details:
             post_args['DETAILS'] = details
 
-        json_obj = self.client.get_json(Config["Organisations"]["Endpoints"]["AddLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Organisations", "AddLink"].url
                                         .format(id=self.ORGANISATION_ID),
-                                        http_method=Config["Organisations"]["Endpoints"]["AddLink"]["Method"],
+                                        http_method=self.client.endpoints["Organisations", "AddLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return Link.from_json(json_obj)
 
@@ -379,9 +442,10 @@ class Organisation(InsightlyBase):
         if not details and link.DETAILS:
             post_args['DETAILS'] = link.DETAILS
 
-        json_obj = self.client.get_json(Config["Organisations"]["Endpoints"]["UpdateLink"]["Url"]
+        json_obj = self.client.get_json(self.client.endpoints["Organisations", "UpdateLink"].url
                                         .format(id=self.ORGANISATION_ID),
-                                        http_method=Config["Organisations"]["Endpoints"]["UpdateLink"]["Method"],
+                                        http_method=self.client.endpoints["Organisations", "UpdateLink"].method,
                                         post_args=post_args)
+        self._links_changed(post_args)
         # self.fetch()  # update current model
         return Link.from_json(json_obj)
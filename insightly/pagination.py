@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from insightly.deadline import current_deadline, use_deadline
+
+
+class Paginator(object):
+    """
+    Fetches the pages of a ``skip``/``top`` paginated Insightly endpoint, keeping up to ``concurrency`` page requests
+    in flight at once. Pages are yielded in order; paging stops at the first page holding fewer than ``top`` records,
+    so no extra request is made for a trailing empty page unless it is already in flight. Page requests run under the
+    deadline of the thread iterating, if any.
+    """
+
+    def __init__(self, client, url_template, http_method='GET', top=500, concurrency=4):
+        """
+        :client: Insightly API client
+        :url_template: endpoint URL with ``{skip}`` and ``{top}`` placeholders
+        :http_method: HTTP method for the endpoint
+        :top: number of records requested per page
+        :concurrency: maximum number of page requests in flight
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        self.client = client
+        self.url_template = url_template
+        self.http_method = http_method
+        self.top = top
+        self.concurrency = concurrency
+
+    def _fetch(self, skip, deadline=None):
+        with use_deadline(deadline):
+            return self.client.get_json(self.url_template.format(skip=skip, top=self.top),
+                                        http_method=self.http_method)
+
+    def pages(self):
+        """Yield each page of results in order
+
+        :rtype: generator of list
+        """
+        deadline = current_deadline()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        pending = deque()
+        skip = 0
+        try:
+            for _ in range(self.concurrency):
+                pending.append(executor.submit(self._fetch, skip, deadline))
+                skip += self.top
+
+            while pending:
+                page = pending.popleft().result()
+                if page:
+                    yield page
+                if len(page) < self.top:
+                    break
+                pending.append(executor.submit(self._fetch, skip, deadline))
+                skip += self.top
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def __iter__(self):
+        return self.pages()
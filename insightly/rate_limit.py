@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# responses that mean "slow down and try again"
+THROTTLED_STATUS_CODES = (429, 503)
+
+# tolerance for floating point error when refilling
+_EPSILON = 1e-9
+
+
+class TokenBucket(object):
+    """
+    Token bucket refilled at ``rate`` tokens per second, holding at most ``capacity`` tokens. Not thread safe on its
+    own - see RequestScheduler.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        """
+        :rate: tokens added per second
+        :capacity: maximum burst size, defaults to one second's worth of tokens
+        :clock: monotonic clock returning seconds
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self):
+        """Tokens currently available
+
+        :rtype: float
+        """
+        self._refill()
+        return self._tokens
+
+    def take(self):
+        """Take a token if one is available
+
+        :return: 0 if a token was taken, otherwise the number of seconds until one will be
+        :rtype: float
+        """
+        self._refill()
+        if self._tokens >= 1 - _EPSILON:
+            self._tokens = max(0.0, self._tokens - 1)
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def limit(self, tokens):
+        """Cap the available tokens, e.g. to a remaining quota reported by the server"""
+        self._refill()
+        self._tokens = min(self._tokens, float(tokens))
+
+
+class RequestScheduler(object):
+    """
+    Client side request scheduler, shared by all threads using one InsightlyClient. Given a rate, requests are admitted
+    through a token bucket; throttled responses (HTTP 429 / 503) pause all callers for the server's ``Retry-After``
+    period and are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, rate=None, burst=None, max_retries=5, backoff_base=0.5, backoff_max=30.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        """
+        :rate: requests per second admitted, or None (the default) to only react to throttled responses
+        :burst: maximum number of requests admitted at once, defaults to one second's worth
+        :max_retries: number of times a throttled request is retried before its error is raised
+        :backoff_base: initial backoff in seconds, doubled on every retry
+        :backoff_max: upper bound for a single backoff in seconds
+        """
+        self.bucket = TokenBucket(rate, burst, clock=clock) if rate else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._waiting = 0
+        self.throttled = 0
+        self.retries = 0
+
+    @property
+    def budget(self):
+        """Requests that can be sent right now without waiting
+
+        :rtype: float
+        """
+        with self._lock:
+            if self._clock() < self._paused_until:
+                return 0.0
+            return self.bucket.tokens if self.bucket else float('inf')
+
+    @property
+    def queue_depth(self):
+        """Number of threads currently waiting to send a request
+
+        :rtype: int
+        """
+        return self._waiting
+
+    def _reserve(self):
+        wait = self._paused_until - self._clock()
+        if wait > 0:
+            return wait
+        return self.bucket.take() if self.bucket else 0.0
+
+    def acquire(self, timeout=None):
+        """Block until a request may be sent
+
+        :timeout: optional maximum number of seconds to wait
+        :return: False if the request could not be admitted within timeout
+        :rtype: bool
+        """
+        with self._lock:
+            wait = self._reserve()
+            if wait <= 0:
+                return True
+            self._waiting += 1
+        give_up_at = None if timeout is None else self._clock() + timeout
+        try:
+            while wait > 0:
+                if give_up_at is not None and self._clock() + wait > give_up_at:
+                    return False
+                self._sleep(wait)
+                with self._lock:
+                    wait = self._reserve()
+            return True
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def observe(self, response):
+        """Update the schedule from a response's status and rate limit headers
+
+        :return: True if the response was throttled
+        :rtype: bool
+        """
+        headers = getattr(response, 'headers', None) or {}
+
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is not None and self.bucket:
+            try:
+                with self._lock:
+                    self.bucket.limit(int(remaining))
+            except ValueError:
+                pass
+
+        if response.status_code not in THROTTLED_STATUS_CODES:
+            return False
+
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        with self._lock:
+            self.throttled += 1
+            if retry_after:
+                self._paused_until = max(self._paused_until, self._clock() + retry_after)
+        return True
+
+    def backoff(self, attempt, limit=None):
+        """Sleep before retrying a throttled request, using full jitter exponential backoff. If the server asked for
+        a pause with Retry-After, acquire() already waits for it and no extra backoff is added.
+
+        :attempt: number of retries already made for this request
+        :limit: optional maximum number of seconds to sleep
+        """
+        with self._lock:
+            self.retries += 1
+            if self._paused_until > self._clock():
+                return
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        self._sleep(delay if limit is None else min(delay, limit))
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header, given either as seconds or as an HTTP date
+
+    :return: seconds to wait, or None if absent or invalid
+    :rtype: float
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
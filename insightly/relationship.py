@@ -5,18 +5,11 @@ from __future__ import with_statement, print_function, absolute_import
 from insightly import InsightlyBase
 from insightly.compat import force_str
 
-import os
-import yaml
 import json
 
 # set serialisation for objects per Insightly API requirements
 # jsonpickle.handlers.registry.register(datetime.datetime, DatetimeHandler)
 
-config_file_path = os.path.join(os.path.dirname(__file__), "config.yaml")
-
-with open(config_file_path) as config_file:
-    Config = yaml.load(config_file, Loader=yaml.FullLoader)
-
 
 class Relationship(InsightlyBase):
     """
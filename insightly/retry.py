@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import random
+import threading
+import time
+
+import requests
+
+# HTTP methods that leave the same state however many times they are sent, so safe to send again
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+
+# responses meaning the request failed on the way or on the server, and may succeed if sent again - 429 and 503 are
+# retried by the RequestScheduler
+RETRY_STATUS_CODES = (500, 502, 504)
+
+# throttling responses sent before the request was handled, so sent again by the RequestScheduler whatever the method -
+# a 503 may come from a server failing part way through a POST, which is then only sent again once a Search shows it
+# did not create its record
+RESEND_STATUS_CODES = (429,)
+
+# response to a request the server was unavailable for, transient for a POST the RequestScheduler does not send again
+SERVICE_UNAVAILABLE = 503
+
+# errors raised by the HTTP service when no response was received
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)
+
+# Search parameters matching a record created by add_*, and the field each one is read from
+NATURAL_KEYS = {
+    "Contacts": (("first_name", "FIRST_NAME"), ("last_name", "LAST_NAME"), ("email", "EMAIL_ADDRESS")),
+    "Organisations": (("organisation_name", "ORGANISATION_NAME"),),
+    "Opportunities": (("opportunity_name", "OPPORTUNITY_NAME"),),
+}
+
+
+class RetryPolicy(object):
+    """
+    Retries requests that failed transiently - a connection error, a timeout or a 500, 502 or 504 response - with
+    jittered exponential backoff. Only idempotent requests (GET, PUT, DELETE) are sent again as they are; a POST
+    creating a record is retried by the client only once a Search on the record's natural keys shows the first
+    attempt did not create it. Counts the retries made and the transient failures given up on. Thread safe.
+    """
+
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_max=30.0, clock_skew=300.0, sleep=time.sleep):
+        """
+        :max_retries: number of times a request is retried before its error is raised
+        :backoff_base: initial backoff in seconds, doubled on every retry
+        :backoff_max: upper bound for a single backoff in seconds
+        :clock_skew: seconds by which a record's DATE_CREATED_UTC may precede the local time a failed POST was sent
+            and still be taken for the record that POST created
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock_skew = clock_skew
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.give_ups = 0
+        self.recovered = 0
+
+    @staticmethod
+    def is_transient(response=None, exception=None):
+        """Return True if a response or error received means the request may succeed if sent again
+
+        :rtype: bool
+        """
+        if exception is not None:
+            status_code = getattr(exception, 'status_code', None)
+            return (isinstance(exception, TRANSIENT_ERRORS) or status_code in RETRY_STATUS_CODES or
+                    status_code == SERVICE_UNAVAILABLE)
+        return response is not None and response.status_code in RETRY_STATUS_CODES
+
+    def should_retry(self, http_method, attempt, response=None, exception=None, idempotent=None):
+        """Decide whether to send a request again after a response or error, counting a give up when a transient
+        failure is not retried
+
+        :http_method: the request's HTTP method
+        :attempt: number of retries already made for this request
+        :response: the response received, if any
+        :exception: the error raised, if no response was received
+        :idempotent: whether the request may be sent again as it is, by default per its HTTP method
+        :rtype: bool
+        """
+        if not self.is_transient(response, exception):
+            return False
+        if idempotent is None:
+            idempotent = http_method.upper() in IDEMPOTENT_METHODS
+        if idempotent and attempt < self.max_retries:
+            return True
+        self.give_up()
+        return False
+
+    def backoff(self, attempt, limit=None):
+        """Sleep before a retry, using full jitter exponential backoff
+
+        :attempt: number of retries already made for this request
+        :limit: optional maximum number of seconds to sleep
+        """
+        with self._lock:
+            self.retries += 1
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        self._sleep(delay if limit is None else min(delay, limit))
+
+    def give_up(self):
+        """Count a transient failure raised to the caller"""
+        with self._lock:
+            self.give_ups += 1
+
+    def record_recovered(self):
+        """Count a failed POST found to have created its record after all"""
+        with self._lock:
+            self.recovered += 1
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import inspect
+from collections import OrderedDict
+
+from insightly.base import InsightlyRecord
+from insightly.bulk import run_bulk
+from insightly.compat import force_str
+from insightly.exceptions import CommitFailed
+
+# client method deleting a record, by config.yaml section
+_DELETE_METHODS = {"Contacts": "delete_contact",
+                   "Organisations": "delete_organisation",
+                   "Opportunities": "delete_opportunity"}
+
+# identifier fields of the links returned by link mutations
+_LINK_ID_FIELDS = ('LINK_ID', 'CONTACT_LINK_ID', 'ORG_LINK_ID')
+
+
+def _record_key(record):
+    """Key of a record within a session - its entity and ID, or while it is not created None and the object's identity,
+    records not created all hashing alike"""
+    record_id = getattr(record, record._id_field, None)
+    if record_id is None:
+        return None, id(record)
+    return record._entity, record_id
+
+
+def _resolve(value):
+    # records passed to a link mutation stand for their ID, known once they are created
+    if isinstance(value, InsightlyRecord) and hasattr(value, '_id_field'):
+        record_id = getattr(value, value._id_field, None)
+        if record_id is None:
+            raise ValueError("{!r} was not created".format(value))
+        return record_id
+    return value
+
+
+class LinkCall(object):
+    """
+    A link mutation queued in a Session - one of the add_*_link or update_*_link methods of a Contact, Organisation or
+    Opportunity, and its arguments. Records given as arguments are replaced by their ID when the call is made.
+    """
+
+    def __init__(self, record, method, arguments):
+        self.record = record
+        self.method = method
+        self.arguments = arguments
+
+    def records(self):
+        """Return the records this call depends on - its own record and any given as arguments
+
+        :rtype: list
+        """
+        return [self.record] + [value for value in self.arguments.values() if isinstance(value, InsightlyRecord)]
+
+    def __call__(self):
+        arguments = dict((name, _resolve(value)) for name, value in self.arguments.items())
+        if getattr(self.record, self.record._id_field, None) is None:
+            raise ValueError("{!r} was not created".format(self.record))
+        link = getattr(self.record, self.method)(**arguments)
+        for field in _LINK_ID_FIELDS:
+            link_id = getattr(link, field, None)
+            if link_id is not None:
+                return link_id
+        return None
+
+    def __repr__(self):
+        return force_str(u'<LinkCall {!r}.{}>'.format(self.record, self.method))
+
+
+class Session(object):
+    """
+    Unit of work queuing the saves, deletes and link mutations of many Contacts, Organisations and Opportunities, then
+    sending them together on commit - at the end of the ``with`` block when used as a context manager.
+
+    On commit, redundant writes are collapsed: a record saved several times is sent once in its final state, a record
+    deleted is not saved, one created and deleted in the same session is never sent, links of deleted records are
+    dropped, repeated link additions are sent once and successive updates of one link are merged. The remaining writes
+    are then sent concurrently in three waves: records created, then records updated and deleted, then link mutations,
+    which by then know the ID of every record they refer to.
+    """
+
+    def __init__(self, client, max_workers=8):
+        """
+        :client: Insightly API client
+        :max_workers: number of requests in flight at once
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.results = None
+        self._reset()
+
+    def _reset(self):
+        self._saves = OrderedDict()
+        self._deletes = OrderedDict()
+        self._links = OrderedDict()
+
+    def save(self, record):
+        """Queue a Contact, Organisation or Opportunity to be created or updated
+
+        :record: the record - its state when the session is committed is sent
+        """
+        if record.client is None:
+            record.client = self.client
+        self._saves.pop(_record_key(record), None)
+        self._saves[_record_key(record)] = record
+
+    def delete(self, record, record_id=None):
+        """Queue a record to be deleted
+
+        :record: the record, or its entity type with record_id - Contact, Organisation or Opportunity, or its
+                 config.yaml section e.g. Contacts
+        :record_id: identifier of the record, if an entity type is given
+        """
+        if record_id is None:
+            key = _record_key(record)
+            if key[0] is None:  # never created, so nothing to send
+                self._saves.pop(key, None)
+                self._deletes[key] = record
+                return
+        else:
+            key = (getattr(record, '_entity', record), record_id)
+        if key[0] not in _DELETE_METHODS:
+            raise ValueError("Cannot delete {}".format(key[0]))
+        self._saves.pop(key, None)
+        self._deletes[key] = record
+
+    def link(self, record, method, *args, **kwargs):
+        """Queue a link mutation - e.g. ``session.link(contact, "add_organisation_link", organisation, role="CEO")``
+
+        :record: the Contact, Organisation or Opportunity the link is added to or updated on
+        :method: name of the record's add_*_link or update_*_link method
+        :args: the method's arguments - records given in place of an ID are replaced by their ID once created
+        :kwargs: the method's keyword arguments
+        """
+        if not (method.startswith('add_') or method.startswith('update_')) or not method.endswith('_link'):
+            raise ValueError("{} is not a link mutation".format(method))
+        arguments = inspect.signature(getattr(record, method)).bind(*args, **kwargs).arguments
+        if method.startswith('update_'):
+            # successive updates of one link are merged, the latest values winning
+            link_id = next(iter(arguments.values()), None)
+            key = (_record_key(record), method, link_id)
+            queued = self._links.pop(key, None)
+            if queued is not None:
+                merged = dict(queued.arguments)
+                merged.update((name, value) for name, value in arguments.items() if value is not None)
+                arguments = merged
+        else:
+            key = (_record_key(record), method, tuple((name, _record_key(value) if isinstance(value, InsightlyRecord)
+                                                       else value) for name, value in arguments.items()))
+            self._links.pop(key, None)
+        self._links[key] = LinkCall(record, method, dict(arguments))
+
+    def pending(self):
+        """Return the number of writes queued, before they are collapsed
+
+        :rtype: int
+        """
+        return len(self._saves) + len(self._deletes) + len(self._links)
+
+    def rollback(self):
+        """Discard every write queued"""
+        self._reset()
+
+    def commit(self):
+        """Send every write queued, collapsing redundant ones, and empty the session
+
+        :return: a result per write sent, holding the record or link ID, or the exception raised
+        :rtype: list of BulkResult
+        """
+        saves, deletes, links = self._saves, self._deletes, self._links
+        self._reset()
+        creates = [record for key, record in saves.items() if key[0] is None]
+        updates = [record for key, record in saves.items() if key[0] is not None]
+        links = [call for call in links.values()
+                 if not any(_record_key(record) in deletes for record in call.records())]
+        deletes = [key for key in deletes if key[0] is not None]
+
+        def write(item):
+            if isinstance(item, tuple):  # entity and ID of a record to delete
+                getattr(self.client, _DELETE_METHODS[item[0]])(item[1])
+                return item[1]
+            item.save()
+            return getattr(item, item._id_field)
+
+        results = run_bulk(write, creates, max_workers=self.max_workers)
+        results += run_bulk(write, updates + deletes, max_workers=self.max_workers)
+        results += run_bulk(lambda call: call(), links, max_workers=self.max_workers)
+        self.results = results
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.rollback()
+            return
+        results = self.commit()
+        if not all(result.ok for result in results):
+            raise CommitFailed(results)
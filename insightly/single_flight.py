@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import threading
+
+
+class _Call(object):
+    """A call in flight, and its outcome once done"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class SingleFlight(object):
+    """
+    Runs at most one call per key at a time. A thread asking for a key already in flight waits for that call and
+    shares its result, or its exception, instead of making the call again. Thread safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = dict()
+
+    def do(self, key, function):
+        """Call function, unless a call for the same key is already in flight
+
+        :key: hashable key identifying the call
+        :function: callable taking no arguments
+        :return: the result of the call made for this key
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        """Return the number of keys with a call in flight
+
+        :rtype: int
+        """
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import json
+import sqlite3
+import threading
+
+from insightly.contact import Contact
+from insightly.opportunity import Opportunity
+from insightly.organisation import Organisation
+
+# entity types that can be stored, by config.yaml section
+_STORED_TYPES = dict((cls._entity, cls) for cls in (Contact, Organisation, Opportunity))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    entity TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    name TEXT COLLATE NOCASE,
+    owner_user_id INTEGER,
+    json TEXT NOT NULL,
+    PRIMARY KEY (entity, id)
+);
+CREATE INDEX IF NOT EXISTS records_name ON records (entity, name);
+CREATE INDEX IF NOT EXISTS records_owner ON records (entity, owner_user_id);
+CREATE TABLE IF NOT EXISTS record_tags (
+    entity TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    tag TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (entity, tag, id)
+);
+CREATE INDEX IF NOT EXISTS record_tags_id ON record_tags (entity, id);
+CREATE TABLE IF NOT EXISTS record_email_domains (
+    entity TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    domain TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (entity, domain, id)
+);
+CREATE INDEX IF NOT EXISTS record_email_domains_id ON record_email_domains (entity, id);
+"""
+
+
+def _record_name(entity, json_obj):
+    if entity == "Contacts":
+        return u' '.join(name for name in (json_obj.get('FIRST_NAME'), json_obj.get('LAST_NAME')) if name) or None
+    if entity == "Organisations":
+        return json_obj.get('ORGANISATION_NAME')
+    return json_obj.get('OPPORTUNITY_NAME')
+
+
+def _record_tags(json_obj):
+    # Insightly returns tags as {"TAG_NAME": ...} objects
+    return set(tag.get('TAG_NAME') if isinstance(tag, dict) else tag for tag in json_obj.get('TAGS') or ()) - {None}
+
+
+def _record_email_domains(entity, json_obj):
+    if entity == "Contacts":
+        email_address = json_obj.get('EMAIL_ADDRESS') or ''
+        return {email_address.rpartition('@')[2]} if '@' in email_address else set()
+    return set(domain.get('EMAIL_DOMAIN') if isinstance(domain, dict) else domain
+               for domain in json_obj.get('EMAILDOMAINS') or ()) - {None}
+
+
+class LocalStore(object):
+    """
+    Local copy of Contacts, Organisations and Opportunities in SQLite, indexed on IDs, names, owners, tags and email
+    domains. A client given a store writes every full page it lists into it, and every record it fetches or saves,
+    and removes the records it deletes or links; records are then read from disk by ID or by filter without an API
+    call. Each record is kept as the JSON received from Insightly and rebuilt on read.
+    """
+
+    def __init__(self, path=':memory:', client=None):
+        """
+        :path: the SQLite database file, in memory by default
+        :client: Insightly API client given to the records read back
+        """
+        self.path = path
+        self.client = client
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # readers are not blocked while a page is written
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def put_page(self, entity, page):
+        """Insert or replace the records of a page, in one transaction
+
+        :entity: top level key in config.yaml e.g. Contacts
+        :page: the JSON records as received from Insightly
+        """
+        id_field = _STORED_TYPES[entity]._id_field
+        rows, tags, domains = [], [], []
+        for json_obj in page:
+            record_id = json_obj[id_field]
+            rows.append((entity, record_id, _record_name(entity, json_obj), json_obj.get('OWNER_USER_ID'),
+                         json.dumps(json_obj, default=str)))
+            tags.extend((entity, record_id, tag) for tag in _record_tags(json_obj))
+            domains.extend((entity, record_id, domain) for domain in _record_email_domains(entity, json_obj))
+        ids = [(entity, row[1]) for row in rows]
+        with self._lock, self._connection:
+            self._connection.executemany("DELETE FROM record_tags WHERE entity = ? AND id = ?", ids)
+            self._connection.executemany("DELETE FROM record_email_domains WHERE entity = ? AND id = ?", ids)
+            self._connection.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)", rows)
+            self._connection.executemany("INSERT OR IGNORE INTO record_tags VALUES (?, ?, ?)", tags)
+            self._connection.executemany("INSERT OR IGNORE INTO record_email_domains VALUES (?, ?, ?)", domains)
+
+    def delete(self, entity, ids):
+        """Remove records from the store
+
+        :entity: the entity type - Contact, Organisation or Opportunity, or its config.yaml section e.g. Contacts
+        :ids: identifiers of the records to remove
+        """
+        entity = getattr(entity, '_entity', entity)
+        keys = [(entity, record_id) for record_id in ids]
+        with self._lock, self._connection:
+            for table in ('records', 'record_tags', 'record_email_domains'):
+                self._connection.executemany("DELETE FROM {} WHERE entity = ? AND id = ?".format(table), keys)
+
+    def get(self, entity, record_id):
+        """Return a stored record, or None if it is not in the store
+
+        :entity: the entity type - Contact, Organisation or Opportunity, or its config.yaml section e.g. Contacts
+        :record_id: the record's identifier
+        """
+        cls = _STORED_TYPES[getattr(entity, '_entity', entity)]
+        with self._lock:
+            row = self._connection.execute("SELECT json FROM records WHERE entity = ? AND id = ?",
+                                           (cls._entity, record_id)).fetchone()
+        return None if row is None else cls.from_json(self.client, json.loads(row[0]))
+
+    def get_contact(self, contact_id):
+        """:rtype: Contact"""
+        return self.get(Contact, contact_id)
+
+    def get_organisation(self, organisation_id):
+        """:rtype: Organisation"""
+        return self.get(Organisation, organisation_id)
+
+    def get_opportunity(self, opportunity_id):
+        """:rtype: Opportunity"""
+        return self.get(Opportunity, opportunity_id)
+
+    def filter(self, entity, name=None, owner_user_id=None, tag=None, email_domain=None):
+        """Return the stored records matching every criterion given, ordered by ID. Names, tags and email domains are
+        compared case insensitively.
+
+        :entity: the entity type - Contact, Organisation or Opportunity, or its config.yaml section e.g. Contacts
+        :name: the record's name - for a Contact, its first and last names separated by a space
+        :owner_user_id: the Insightly User ID of the record's owner
+        :tag: a tag of the record
+        :email_domain: an email domain of an Organisation, or the domain of a Contact's email address
+        :rtype: list
+        """
+        cls = _STORED_TYPES[getattr(entity, '_entity', entity)]
+        query = ["SELECT json FROM records WHERE entity = ?"]
+        params = [cls._entity]
+        if name is not None:
+            query.append("AND name = ?")
+            params.append(name)
+        if owner_user_id is not None:
+            query.append("AND owner_user_id = ?")
+            params.append(owner_user_id)
+        if tag is not None:
+            query.append("AND id IN (SELECT id FROM record_tags WHERE entity = ? AND tag = ?)")
+            params.extend((cls._entity, tag))
+        if email_domain is not None:
+            query.append("AND id IN (SELECT id FROM record_email_domains WHERE entity = ? AND domain = ?)")
+            params.extend((cls._entity, email_domain))
+        query.append("ORDER BY id")
+        with self._lock:
+            rows = self._connection.execute(" ".join(query), params).fetchall()
+        return [cls.from_json(self.client, json.loads(row[0])) for row in rows]
+
+    def count(self, entity):
+        """Return the number of stored records of an entity
+
+        :rtype: int
+        """
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM records WHERE entity = ?",
+                                            (getattr(entity, '_entity', entity),)).fetchone()[0]
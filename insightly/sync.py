@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import datetime
+import json
+import os
+
+from insightly.compat import force_str
+from insightly.contact import Contact
+from insightly.helpers import parse_activity_date
+from insightly.models import DATETIME_FORMAT
+from insightly.opportunity import Opportunity
+from insightly.organisation import Organisation
+
+# entity types that can be synced, by config.yaml section
+_SYNCED_TYPES = dict((cls._entity, cls) for cls in (Contact, Organisation, Opportunity))
+
+
+class SyncReport(object):
+    """
+    Changes found by one sync of an entity - the records inserted and updated since the previous sync, and the IDs of
+    the records deleted.
+    """
+
+    def __init__(self, entity, watermark=None):
+        self.entity = entity
+        self.inserted = []
+        self.updated = []
+        self.deleted = []
+        self.watermark = watermark
+
+    def __len__(self):
+        return len(self.inserted) + len(self.updated) + len(self.deleted)
+
+    def __repr__(self):
+        return force_str(u'<SyncReport {}: {} inserted, {} updated, {} deleted>'.format(
+            self.entity, len(self.inserted), len(self.updated), len(self.deleted)))
+
+
+class SyncState(object):
+    """
+    What DeltaSync knows of each entity between runs: the high-water mark of DATE_UPDATED_UTC, the IDs of the records
+    updated at that exact timestamp, and the IDs of every record seen. Saved as JSON.
+    """
+
+    def __init__(self, entities=None):
+        """
+        :entities: state per config.yaml section, as returned by to_json
+        """
+        self._entities = dict()
+        for entity, state in (entities or {}).items():
+            watermark = state.get('watermark')
+            self._entities[entity] = {
+                'watermark': parse_activity_date(watermark) if watermark else None,
+                'boundary_ids': set(state.get('boundary_ids', ())),
+                'ids': set(state.get('ids', ())),
+            }
+
+    def entity(self, entity):
+        """Return the mutable state of an entity, empty if it was never synced
+
+        :entity: top level key in config.yaml e.g. Contacts
+        :rtype: dict
+        """
+        state = self._entities.get(entity)
+        if state is None:
+            state = self._entities[entity] = {'watermark': None, 'boundary_ids': set(), 'ids': set()}
+        return state
+
+    def watermark(self, entity):
+        """Return the DATE_UPDATED_UTC of the latest change synced for an entity, or None if it was never synced
+
+        :rtype: datetime.datetime
+        """
+        return self.entity(entity)['watermark']
+
+    def to_json(self):
+        """:rtype: dict"""
+        entities = dict()
+        for entity, state in self._entities.items():
+            watermark = state['watermark']
+            entities[entity] = {'watermark': watermark.strftime(DATETIME_FORMAT) if watermark else None,
+                                'boundary_ids': sorted(state['boundary_ids']),
+                                'ids': sorted(state['ids'])}
+        return entities
+
+    @classmethod
+    def load(cls, path):
+        """Read the state saved at path, or return an empty state if there is none
+
+        :rtype: SyncState
+        """
+        try:
+            with open(path) as f:
+                return cls(json.load(f))
+        except (IOError, OSError):
+            return cls()
+
+    def save(self, path):
+        """Write the state to path, replacing any previous state only once it is fully written"""
+        tmp_path = '{}.tmp'.format(path)
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_json(), f)
+        os.replace(tmp_path, path)
+
+
+class DeltaSync(object):
+    """
+    Keeps a local mirror of Contacts, Organisations or Opportunities current. The first sync of an entity lists every
+    record; each sync after that asks the Search endpoint only for the records updated since the high-water mark of
+    DATE_UPDATED_UTC. Search does not return deleted records, so finding them means listing every record again, brief
+    (all top level fields, without the child collections) - only done if asked for, as it costs as much as the first
+    sync. If the client has a LocalStore, the changes are written to it as they are listed and the deleted records
+    removed from it.
+    """
+
+    def __init__(self, client, state=None, path=None, detect_deletes=False, overlap=datetime.timedelta(seconds=1)):
+        """
+        :client: Insightly API client
+        :state: the SyncState to start from - loaded from path if not given
+        :path: optional file the state is loaded from and saved to after every sync
+        :detect_deletes: if True, list the IDs of every record after each sync but the first, to report the records
+            deleted - otherwise no deletes are reported
+        :overlap: how far before the high-water mark to search from, so that records updated in the same second as
+            the last sync are not missed
+        """
+        self.client = client
+        self.path = path
+        if state is None:
+            state = SyncState.load(path) if path else SyncState()
+        self.state = state
+        self.detect_deletes = detect_deletes
+        self.overlap = overlap
+
+    def sync(self, entity):
+        """Fetch the changes to an entity since its last sync
+
+        :entity: the entity type - Contact, Organisation or Opportunity, or its config.yaml section e.g. Contacts
+        :return: the records inserted and updated, and the IDs deleted, since the last sync
+        :rtype: SyncReport
+        """
+        cls = _SYNCED_TYPES[getattr(entity, '_entity', entity)]
+        state = self.state.entity(cls._entity)
+        since = state['watermark']
+        seen_at_since = state['boundary_ids']
+        boundary_ids = set(seen_at_since)
+        known_ids = state['ids']
+        report = SyncReport(cls._entity, since)
+
+        updated_after = None if since is None else since - self.overlap
+        for record in self.client.iter_updated(cls, updated_after):
+            record_id = getattr(record, cls._id_field)
+            updated = getattr(record, 'DATE_UPDATED_UTC', None)
+            if updated is not None:
+                updated = parse_activity_date(updated)
+                if since is not None and (updated < since or (updated == since and record_id in seen_at_since)):
+                    continue  # already reported by the previous sync, returned again by the overlap
+                if report.watermark is None or updated > report.watermark:
+                    report.watermark = updated
+                    boundary_ids = set()
+                if updated == report.watermark:
+                    boundary_ids.add(record_id)
+            if record_id in known_ids:
+                report.updated.append(record)
+            else:
+                known_ids.add(record_id)
+                report.inserted.append(record)
+
+        if since is not None and self.detect_deletes:
+            current_ids = set(self.client.iter_ids(cls))
+            # records created after the delta was read are left unknown, to be reported as inserts next time
+            report.deleted = sorted(known_ids - current_ids)
+            known_ids.difference_update(report.deleted)
+            store = getattr(self.client, 'store', None)
+            if store is not None:
+                store.delete(cls, report.deleted)
+
+        state['watermark'] = report.watermark
+        state['boundary_ids'] = boundary_ids
+        if self.path:
+            self.state.save(self.path)
+        return report
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import with_statement, print_function, absolute_import
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PooledHTTPService(object):
+    """
+    HTTP service backed by a ``requests.Session`` with a bounded connection pool. Connections to the Insightly API are
+    kept alive and reused between calls, so repeated requests skip the TCP and TLS handshakes.
+
+    Exposes the same ``request(method, url, **kwargs)`` interface as the ``requests`` module, so it can be used
+    anywhere an ``http_service`` is expected.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True):
+        """
+        :pool_connections: number of per-host connection pools to cache
+        :pool_maxsize: maximum number of connections kept open per host
+        :pool_block: if True, wait for a free connection when the per-host limit is reached instead of opening an
+            extra, non-pooled connection
+        :keep_alive: if False, ask the server to close the connection after each request
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+
+        self._lock = threading.Lock()
+        self._session = None
+
+    @property
+    def session(self):
+        """The underlying session, created on first use
+
+        :rtype: requests.Session
+        """
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def _build_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def request(self, method, url, **kwargs):
+        """Perform a request using a pooled connection
+
+        :rtype: requests.Response
+        """
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        """Close all pooled connections"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -5,21 +5,9 @@ from __future__ import with_statement, print_function, absolute_import
 from insightly import InsightlyBase
 from insightly.compat import force_str
 from insightly.helpers import parse_activity_date
-from insightly.models import DatetimeHandler
+from insightly.models import encode_value
 
-import os
-import yaml
 import json
-import datetime
-import jsonpickle
-
-# set serialisation for objects per Insightly API requirements
-jsonpickle.handlers.registry.register(datetime.datetime, DatetimeHandler)
-
-config_file_path = os.path.join(os.path.dirname(__file__), "config.yaml")
-
-with open(config_file_path) as config_file:
-    Config = yaml.load(config_file, Loader=yaml.FullLoader)
 
 
 class User(InsightlyBase):
@@ -29,6 +17,10 @@ class User(InsightlyBase):
     Users
     """
 
+    # config.yaml section and identifier field for this entity
+    _entity = "Users"
+    _id_field = "USER_ID"
+
     def __init__(self, client, user_id=None, first_name=None, last_name=None, email_address=None,
                  admin=False, active=True, contact_id=None, contact_display=None, contact_order=None, instance_id=None,
                  account_owner=None, timezone_id=None, user_currency=None, task_week_start=None,
@@ -80,7 +72,7 @@ class User(InsightlyBase):
     def to_json(self):
         """ Strip out any non-insightly parameters """
 
-        return jsonpickle.encode(self, unpicklable=False)
+        return json.dumps(encode_value(self))
 
     @classmethod
     def from_json(cls, insightly_client=None, json_obj=None):
@@ -0,0 +1,115 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import json
+import threading
+
+
+class FakeClock(object):
+    """Clock and sleep function pair where sleeping just advances time"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class StubResponse(object):
+    """Minimal stand-in for requests.Response"""
+
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.text = self.content.decode('utf-8')
+        self.request = None
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class StubHTTPService(object):
+    """
+    Records every request and answers it with ``handler(method, url, **kwargs)``, which returns a StubResponse.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.calls.append((method, url, kwargs))
+        return self.handler(method, url, **kwargs)
+
+
+def paged_handler(records, prefix):
+    """Serve ``records`` from a ``skip``/``top`` paginated GetAll endpoint whose path starts with ``prefix``"""
+
+    def handler(method, url, **kwargs):
+        path, _, query = url.partition('?')
+        if not path.endswith(prefix):
+            return StubResponse(404, {'error': 'not found'})
+        params = dict(part.split('=') for part in query.split('&'))
+        skip, top = int(params['skip']), int(params['top'])
+        return StubResponse(200, records[skip:skip + top])
+
+    return handler
+
+
+def _record(id_field, id_value, fields, **values):
+    record = dict((field, None) for field in fields)
+    record.update({'CUSTOMFIELDS': [], 'LINKS': [], 'TAGS': [], 'DATES': [], 'CAN_DELETE': True, 'CAN_EDIT': True,
+                   'VISIBLE_TO': 'EVERYONE', 'DATE_CREATED_UTC': '2019-01-02 03:04:05',
+                   'DATE_UPDATED_UTC': '2019-06-07 08:09:10', 'OWNER_USER_ID': 1})
+    record[id_field] = id_value
+    record.update(values)
+    return record
+
+
+CONTACT_FIELDS = ['CONTACT_ID', 'ORGANISATION_ID', 'DEFAULT_LINKED_ORGANISATION', 'SALUTATION', 'FIRST_NAME',
+                  'LAST_NAME', 'DATE_OF_BIRTH', 'EMAIL_ADDRESS', 'TITLE', 'BACKGROUND', 'ADDRESS_MAIL_STREET',
+                  'ADDRESS_MAIL_CITY', 'ADDRESS_MAIL_STATE', 'ADDRESS_MAIL_POSTCODE', 'ADDRESS_MAIL_COUNTRY',
+                  'ADDRESS_OTHER_STREET', 'ADDRESS_OTHER_CITY', 'ADDRESS_OTHER_STATE', 'ADDRESS_OTHER_POSTCODE',
+                  'ADDRESS_OTHER_COUNTRY', 'ASSISTANT_NAME', 'PHONE_ASSISTANT', 'CONTACTLINKS', 'IMAGE_URL',
+                  'PHONE', 'PHONE_FAX', 'PHONE_HOME', 'PHONE_MOBILE', 'PHONE_OTHER', 'SOCIAL_FACEBOOK',
+                  'SOCIAL_LINKEDIN', 'SOCIAL_TWITTER', 'VISIBLE_TEAM_ID', 'VISIBLE_USER_IDS']
+
+ORGANISATION_FIELDS = ['ORGANISATION_ID', 'ORGANISATION_NAME', 'BACKGROUND', 'ADDRESS_BILLING_STREET',
+                       'ADDRESS_BILLING_CITY', 'ADDRESS_BILLING_STATE', 'ADDRESS_BILLING_POSTCODE',
+                       'ADDRESS_BILLING_COUNTRY', 'ADDRESS_SHIP_STREET', 'ADDRESS_SHIP_CITY', 'ADDRESS_SHIP_STATE',
+                       'ADDRESS_SHIP_POSTCODE', 'ADDRESS_SHIP_COUNTRY', 'EMAILDOMAINS', 'IMAGE_URL',
+                       'ORGANISATIONLINKS', 'PHONE', 'PHONE_FAX', 'SOCIAL_FACEBOOK', 'SOCIAL_LINKEDIN',
+                       'SOCIAL_TWITTER', 'VISIBLE_TEAM_ID', 'VISIBLE_USER_IDS', 'WEBSITE']
+
+OPPORTUNITY_FIELDS = ['OPPORTUNITY_ID', 'OPPORTUNITY_NAME', 'OPPORTUNITY_DETAILS', 'ORGANISATION_ID', 'BID_AMOUNT',
+                      'BID_CURRENCY', 'BID_DURATION', 'BID_TYPE', 'CATEGORY_ID', 'FORECAST_CLOSE_DATE',
+                      'ACTUAL_CLOSE_DATE', 'IMAGE_URL', 'OPPORTUNITY_STATE', 'OPPORTUNITY_STATE_REASON_ID',
+                      'OPPORTUNITY_VALUE', 'PIPELINE_ID', 'PROBABILITY', 'RESPONSIBLE_USER_ID', 'STAGE_ID',
+                      'VISIBLE_TEAM_ID', 'VISIBLE_USER_IDS']
+
+
+def contact_json(contact_id, **values):
+    values.setdefault('FIRST_NAME', 'First{}'.format(contact_id))
+    values.setdefault('LAST_NAME', 'Last{}'.format(contact_id))
+    values.setdefault('CONTACTLINKS', [])
+    return _record('CONTACT_ID', contact_id, CONTACT_FIELDS, **values)
+
+
+def organisation_json(organisation_id, **values):
+    values.setdefault('ORGANISATION_NAME', 'Organisation {}'.format(organisation_id))
+    values.setdefault('ORGANISATIONLINKS', [])
+    values.setdefault('EMAILDOMAINS', [])
+    return _record('ORGANISATION_ID', organisation_id, ORGANISATION_FIELDS, **values)
+
+
+def opportunity_json(opportunity_id, **values):
+    values.setdefault('OPPORTUNITY_NAME', 'Opportunity {}'.format(opportunity_id))
+    return _record('OPPORTUNITY_ID', opportunity_id, OPPORTUNITY_FIELDS, **values)
@@ -0,0 +1,116 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import asyncio
+import unittest
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from insightly import AsyncInsightlyClient, NotFound
+from stubs import organisation_json
+
+
+def _stub_app(organisations, delay=0):
+    """aiohttp application serving a small in-memory set of Organisations, answering for pages after the first after
+    a delay"""
+
+    async def get_all(request):
+        skip, top = int(request.query['skip']), int(request.query['top'])
+        if skip:
+            await asyncio.sleep(delay)
+        return web.json_response(list(organisations.values())[skip:skip + top])
+
+    async def get_one(request):
+        organisation_id = int(request.match_info['id'])
+        if organisation_id not in organisations:
+            return web.json_response({'Message': 'not found'}, status=404)
+        return web.json_response(organisations[organisation_id])
+
+    async def add(request):
+        body = await request.json()
+        organisation_id = max(organisations) + 1 if organisations else 1
+        organisations[organisation_id] = organisation_json(organisation_id,
+                                                           ORGANISATION_NAME=body['ORGANISATION_NAME'])
+        return web.json_response(organisations[organisation_id], status=201)
+
+    async def update(request):
+        body = await request.json()
+        organisations[body['ORGANISATION_ID']]['ORGANISATION_NAME'] = body['ORGANISATION_NAME']
+        return web.json_response(organisations[body['ORGANISATION_ID']])
+
+    async def delete(request):
+        organisations.pop(int(request.match_info['id']))
+        return web.Response(status=202)
+
+    app = web.Application()
+    app.router.add_get('/v2.3/Organisations', get_all)
+    app.router.add_get('/v2.3/Organisations/{id}', get_one)
+    app.router.add_post('/v2.3/Organisations', add)
+    app.router.add_put('/v2.3/Organisations', update)
+    app.router.add_delete('/v2.3/Organisations/{id}', delete)
+    return app
+
+
+@unittest.skipIf(web is None, "aiohttp is not installed")
+class AsyncInsightlyClientTestCase(unittest.TestCase):
+    """
+    Tests for AsyncInsightlyClient, run against a local stub HTTP server.
+    """
+
+    def _run(self, scenario, total=1234, delay=0):
+        organisations = dict((i, organisation_json(i)) for i in range(1, total + 1))
+
+        async def run():
+            runner = web.AppRunner(_stub_app(organisations, delay))
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            try:
+                async with AsyncInsightlyClient('key', concurrency=4,
+                                                base_url='http://127.0.0.1:{}/v2.3/'.format(port)) as client:
+                    return await scenario(client)
+            finally:
+                await runner.cleanup()
+
+        return asyncio.run(run()), organisations
+
+    def test_list_organisations(self):
+        async def scenario(client):
+            return await client.list_organisations()
+
+        result, _ = self._run(scenario)
+        self.assertEqual([o.ORGANISATION_ID for o in result], list(range(1, 1235)))
+
+    def test_stopped_listing_leaves_no_request_in_flight(self):
+        async def scenario(client):
+            organisations = client.iter_organisations()
+            first = await organisations.__anext__()
+            await organisations.aclose()
+            return first, [task for task in asyncio.all_tasks() if 'get_json' in task.get_coro().__qualname__]
+
+        (first, tasks), _ = self._run(scenario, delay=0.05)
+        self.assertEqual(first.ORGANISATION_ID, 1)
+        self.assertEqual(tasks, [])
+
+    def test_get_add_save_delete(self):
+        async def scenario(client):
+            organisation = await client.add_organisation('New Organisation', 1)
+            organisation.ORGANISATION_NAME = 'Renamed Organisation'
+            await organisation.save_async()
+            fetched = await client.get_organisation(organisation.ORGANISATION_ID)
+            await client.delete_organisation(organisation.ORGANISATION_ID)
+            with self.assertRaises(NotFound):
+                await client.get_organisation(organisation.ORGANISATION_ID)
+            return fetched
+
+        fetched, organisations = self._run(scenario, total=3)
+        self.assertEqual(fetched.ORGANISATION_NAME, 'Renamed Organisation')
+        self.assertEqual(sorted(organisations), [1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import itertools
+import json
+import time
+import unittest
+
+from insightly import DeadlineExceeded, InsightlyClient, Organisation, MissingOrInvalidParameter, NotFound
+from stubs import StubHTTPService, StubResponse, organisation_json
+
+
+class BulkOperationsTestCase(unittest.TestCase):
+    """
+    Tests for bulk_save and bulk_delete, run against a stubbed HTTP service.
+    """
+
+    def setUp(self):
+        ids = itertools.count(100)
+
+        def handler(method, url, data=None, **kwargs):
+            body = json.loads(data) if data else {}
+            if method == 'POST':
+                if body['ORGANISATION_NAME'] == 'invalid':
+                    return StubResponse(400, {'Message': 'invalid name'})
+                return StubResponse(201, organisation_json(next(ids), ORGANISATION_NAME=body['ORGANISATION_NAME']))
+            if method == 'PUT':
+                return StubResponse(200, organisation_json(body['ORGANISATION_ID'],
+                                                           ORGANISATION_NAME=body['ORGANISATION_NAME']))
+            if method == 'DELETE':
+                if url.endswith('/404'):
+                    return StubResponse(404, {'Message': 'not found'})
+                return StubResponse(202)
+            return StubResponse(405)
+
+        self._http_service = StubHTTPService(handler)
+        self._insightly = InsightlyClient('key', http_service=self._http_service)
+
+    def test_bulk_save_reports_each_item(self):
+        organisations = [Organisation(self._insightly, name='Organisation {}'.format(i)) for i in range(20)]
+        organisations.insert(5, Organisation(self._insightly, name='invalid'))
+        organisations.append(Organisation(self._insightly, organisation_id=7, name='existing'))
+
+        results = self._insightly.bulk_save(organisations, max_workers=4)
+
+        self.assertEqual(len(results), 22)
+        self.assertEqual([r.item for r in results], organisations)
+        self.assertIsInstance(results[5].exception, MissingOrInvalidParameter)
+        self.assertEqual(len([r for r in results if r.ok]), 21)
+        self.assertEqual(results[-1].id, 7)
+        created_ids = [r.id for r in results[:-1] if r.ok]
+        self.assertEqual(len(set(created_ids)), 20)
+
+    def test_bulk_delete_reports_each_item(self):
+        results = self._insightly.bulk_delete(Organisation, [1, 2, 404, 3])
+
+        self.assertEqual([r.id for r in results if r.ok], [1, 2, 3])
+        self.assertIsInstance(results[2].exception, NotFound)
+
+    def test_bulk_delete_by_entity_name(self):
+        results = self._insightly.bulk_delete("Contacts", [1, 2])
+        self.assertTrue(all(r.ok for r in results))
+        self.assertTrue(all('/Contacts/' in url for _, url, _ in self._http_service.calls))
+
+    def test_bulk_save_stops_at_deadline(self):
+        handler = self._http_service.handler
+
+        def slow_handler(method, url, **kwargs):
+            time.sleep(0.05)
+            return handler(method, url, **kwargs)
+
+        self._http_service.handler = slow_handler
+        organisations = [Organisation(self._insightly, name='Organisation {}'.format(i)) for i in range(40)]
+        started = time.monotonic()
+        with self._insightly.deadline(0.2):
+            results = self._insightly.bulk_save(organisations, max_workers=2)
+
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertIsInstance(results[-1].exception, DeadlineExceeded)
+        self.assertLess(len(self._http_service.calls), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
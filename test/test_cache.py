@@ -0,0 +1,119 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import json
+import unittest
+
+from insightly import InsightlyClient, RecordCache
+from stubs import FakeClock, StubHTTPService, StubResponse, contact_json, organisation_json
+
+
+class RecordCacheTestCase(unittest.TestCase):
+
+    def test_least_recently_used_evicted(self):
+        cache = RecordCache(max_size=2)
+        cache.put("Contacts", 1, 'one')
+        cache.put("Contacts", 2, 'two')
+        cache.get("Contacts", 1)
+        cache.put("Contacts", 3, 'three')
+
+        self.assertIsNone(cache.get("Contacts", 2))
+        self.assertEqual(cache.get("Contacts", 1), 'one')
+        self.assertEqual(cache.stats, {'hits': 2, 'misses': 1, 'size': 2})
+
+    def test_entity_ttl(self):
+        clock = FakeClock()
+        cache = RecordCache(ttl=10, entity_ttls={"Organisations": 100}, clock=clock)
+        cache.put("Contacts", 1, 'contact')
+        cache.put("Organisations", 1, 'organisation')
+        clock.now = 50
+
+        self.assertIsNone(cache.get("Contacts", 1))
+        self.assertEqual(cache.get("Organisations", 1), 'organisation')
+        self.assertEqual(len(cache), 1)
+
+    def test_invalidate(self):
+        cache = RecordCache()
+        for record_id in (1, 2):
+            cache.put("Contacts", record_id, 'contact')
+            cache.put("Organisations", record_id, 'organisation')
+        cache.invalidate("Contacts", 1)
+        self.assertIsNone(cache.get("Contacts", 1))
+        cache.invalidate("Organisations")
+        self.assertEqual(len(cache), 1)
+
+
+class ReadThroughCacheTestCase(unittest.TestCase):
+    """
+    Tests for the client's read-through cache, run against a stubbed HTTP service.
+    """
+
+    def setUp(self):
+        self.records = {'Contacts': dict((i, contact_json(i)) for i in range(1, 4)),
+                        'Organisations': dict((i, organisation_json(i)) for i in range(1, 4))}
+
+        def handler(method, url, data=None, **kwargs):
+            parts = url.split('/v2.3/')[1].split('/')
+            entity = parts[0]
+            if method == 'GET':
+                return StubResponse(200, self.records[entity][int(parts[1])])
+            if method == 'PUT' and len(parts) == 1:
+                body = json.loads(data)
+                record = self.records[entity][body['ORGANISATION_ID']]
+                record.update(body)
+                return StubResponse(200, record)
+            if method == 'POST' and parts[-1] == 'Links':
+                link = dict.fromkeys(['ORGANISATION_ID', 'CONTACT_ID', 'OPPORTUNITY_ID', 'SECOND_OPPORTUNITY_ID',
+                                      'PROJECT_ID', 'SECOND_PROJECT_ID', 'ROLE', 'DETAILS'])
+                link.update(json.loads(data), LINK_ID=1)
+                return StubResponse(201, link)
+            if method == 'DELETE':
+                return StubResponse(202)
+            return StubResponse(405)
+
+        self._http_service = StubHTTPService(handler)
+        self.cache = RecordCache()
+        self._insightly = InsightlyClient('key', http_service=self._http_service, cache=self.cache)
+
+    def test_repeated_gets_hit_cache(self):
+        for _ in range(3):
+            organisation = self._insightly.get_organisation(1)
+        self.assertEqual(organisation.ORGANISATION_NAME, 'Organisation 1')
+        self.assertEqual(len(self._http_service.calls), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_cached_copy_not_shared(self):
+        self._insightly.get_organisation(1).TAGS.append('changed')
+        self.assertEqual(self._insightly.get_organisation(1).TAGS, [])
+
+    def test_save_updates_cache(self):
+        organisation = self._insightly.get_organisation(1)
+        organisation.ORGANISATION_NAME = 'Renamed'
+        organisation.save()
+        calls = len(self._http_service.calls)
+
+        self.assertEqual(self._insightly.get_organisation(1).ORGANISATION_NAME, 'Renamed')
+        self.assertEqual(len(self._http_service.calls), calls)
+
+    def test_fetch_updates_cache(self):
+        organisation = self._insightly.get_organisation(1)
+        self.records['Organisations'][1] = organisation_json(1, ORGANISATION_NAME='Renamed elsewhere')
+        organisation.fetch()
+        calls = len(self._http_service.calls)
+
+        self.assertEqual(self._insightly.get_organisation(1).ORGANISATION_NAME, 'Renamed elsewhere')
+        self.assertEqual(len(self._http_service.calls), calls)
+
+    def test_delete_and_links_invalidate(self):
+        organisation = self._insightly.get_organisation(2)
+        self._insightly.get_contact(3)
+        organisation.add_contact_link(3)
+        self.assertEqual(len(self.cache), 0)
+
+        self._insightly.get_contact(1)
+        self._insightly.delete_contact(1)
+        self.assertIsNone(self.cache.get("Contacts", 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import unittest
+
+import requests
+
+from insightly import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, InsightlyClient, RetryPolicy)
+from stubs import FakeClock, StubHTTPService, StubResponse, organisation_json
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=self.clock)
+
+    def _fail(self, times):
+        for _ in range(times):
+            self.breaker.before_request()
+            self.breaker.record(StubResponse(502))
+
+    def test_opens_after_consecutive_failures(self):
+        self._fail(2)
+        self.breaker.record(StubResponse(200))
+        self._fail(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self._fail(1)
+        self.assertEqual(self.breaker.state, OPEN)
+
+        self.clock.now = 4
+        self.assertRaises(CircuitOpen, self.breaker.before_request)
+        self.assertEqual(self.breaker.stats(), dict(state=OPEN, failures=3, opened=1, rejected=1, retry_after=6))
+
+    def test_half_open_probe(self):
+        self._fail(3)
+        self.clock.now = 10
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.before_request()
+        # only one probe in flight at once
+        self.assertRaises(CircuitOpen, self.breaker.before_request)
+        self.breaker.record(exception=requests.Timeout())
+        self.assertEqual(self.breaker.state, OPEN)
+
+        self.clock.now = 20
+        self.breaker.before_request()
+        self.breaker.record(StubResponse(404))
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.before_request()
+
+
+class ClientCircuitBreakerTestCase(unittest.TestCase):
+    """
+    Tests for the client failing fast while Insightly is unavailable, run against a stubbed HTTP service.
+    """
+
+    def test_fails_fast_while_open(self):
+        self.available = False
+
+        def handler(method, url, **kwargs):
+            if not self.available:
+                raise requests.ConnectionError('refused')
+            return StubResponse(200, organisation_json(1))
+
+        http_service = StubHTTPService(handler)
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=4, reset_timeout=30, clock=clock)
+        client = InsightlyClient('key', http_service=http_service,
+                                 retry_policy=RetryPolicy(max_retries=3, sleep=lambda seconds: None),
+                                 circuit_breaker=breaker)
+
+        self.assertRaises(requests.ConnectionError, client.get_organisation, 1)
+        self.assertEqual(breaker.state, OPEN)
+        for _ in range(10):
+            self.assertRaises(CircuitOpen, client.get_organisation, 1)
+        self.assertEqual(len(http_service.calls), 4)
+
+        self.available = True
+        clock.now = 30
+        self.assertEqual(client.get_organisation(1).ORGANISATION_ID, 1)
+        self.assertEqual(breaker.state, CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
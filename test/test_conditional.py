@@ -0,0 +1,65 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import unittest
+
+from insightly import InsightlyClient, ValidatorCache
+from stubs import StubHTTPService, StubResponse, contact_json, organisation_json
+
+
+class ConditionalRequestsTestCase(unittest.TestCase):
+    """
+    Tests for conditional GETs of records already received, run against a stubbed HTTP service.
+    """
+
+    def setUp(self):
+        self.version = 'v1'
+
+        def handler(method, url, headers=None, **kwargs):
+            if '/Organisations/' in url:
+                etag = '"{}"'.format(self.version)
+                if headers.get('If-None-Match') == etag:
+                    return StubResponse(304)
+                return StubResponse(200, organisation_json(1, BACKGROUND=self.version), headers={'ETag': etag})
+            if headers.get('If-Modified-Since') == 'Fri, 07 Jun 2019 08:09:10 GMT':
+                return StubResponse(304)
+            return StubResponse(200, contact_json(1))
+
+        self._http_service = StubHTTPService(handler)
+        self.validators = ValidatorCache()
+        self._insightly = InsightlyClient('key', http_service=self._http_service, validators=self.validators)
+
+    def test_etag_revalidation(self):
+        self._insightly.get_organisation(1)
+        organisation = self._insightly.get_organisation(1)
+
+        self.assertEqual(organisation.BACKGROUND, 'v1')
+        self.assertEqual(self._http_service.calls[1][2]['headers']['If-None-Match'], '"v1"')
+
+        self.version = 'v2'
+        self.assertEqual(self._insightly.get_organisation(1).BACKGROUND, 'v2')
+        self.assertEqual(self._insightly.get_organisation(1).BACKGROUND, 'v2')
+
+    def test_date_updated_fallback(self):
+        self._insightly.get_contact(1)
+        contact = self._insightly.get_contact(1)
+
+        self.assertEqual(contact.FIRST_NAME, 'First1')
+        headers = self._http_service.calls[1][2]['headers']
+        self.assertEqual(headers['If-Modified-Since'], 'Fri, 07 Jun 2019 08:09:10 GMT')
+        self.assertNotIn('If-None-Match', headers)
+
+    def test_listings_not_remembered(self):
+        self._http_service.handler = lambda method, url, **kwargs: StubResponse(200, [])
+        self._insightly.list_users()
+        self.assertEqual(len(self.validators), 0)
+
+    def test_disabled_by_default(self):
+        client = InsightlyClient('key', http_service=self._http_service)
+        client.get_contact(1)
+        client.get_contact(1)
+        self.assertNotIn('If-Modified-Since', self._http_service.calls[1][2]['headers'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from insightly import LazyConfig
+from insightly.config import config_file_path
+
+
+class LazyConfigTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._cache_path = os.path.join(self._dir, 'config.json')
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_loaded_on_first_access(self):
+        config = LazyConfig(cache_path='')
+        self.assertFalse(config.loaded)
+        self.assertEqual(config["Contacts"]["Endpoints"]["Get"]["Method"], 'GET')
+        self.assertTrue(config.loaded)
+
+    def test_cache_is_written_and_reused(self):
+        parsed = LazyConfig(cache_path=self._cache_path)
+        self.assertIn("BaseUrl", parsed)
+        with open(self._cache_path) as cache_file:
+            self.assertEqual(json.load(cache_file), dict(parsed))
+
+        with open(self._cache_path, 'w') as cache_file:
+            json.dump({"BaseUrl": "cached"}, cache_file)
+        self.assertEqual(LazyConfig(cache_path=self._cache_path)["BaseUrl"], "cached")
+
+    def test_stale_cache_is_ignored(self):
+        with open(self._cache_path, 'w') as cache_file:
+            json.dump({"BaseUrl": "stale"}, cache_file)
+        mtime = os.path.getmtime(config_file_path) - 10
+        os.utime(self._cache_path, (mtime, mtime))
+        self.assertNotEqual(LazyConfig(cache_path=self._cache_path)["BaseUrl"], "stale")
+
+    def test_import_does_not_load_config(self):
+        code = "import sys, insightly; print(insightly.Config.loaded, 'dateutil' in sys.modules)"
+        output = subprocess.check_output([sys.executable, '-c', code], env=dict(os.environ, INSIGHTLY_CONFIG_CACHE=''))
+        self.assertEqual(output.split(), [b'False', b'False'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import threading
+import time
+import unittest
+
+import requests
+
+from insightly import (DeadlineExceeded, InsightlyClient, RequestScheduler, RetryPolicy, current_deadline,
+                       use_deadline)
+from stubs import StubHTTPService, StubResponse, organisation_json, paged_handler
+
+
+class DeadlineTestCase(unittest.TestCase):
+    """
+    Tests for request timeouts and per-operation deadlines, run against a stubbed HTTP service.
+    """
+
+    def _client(self, handler, **options):
+        self._http_service = StubHTTPService(handler)
+        return InsightlyClient('key', http_service=self._http_service, **options)
+
+    def test_timeouts_sent(self):
+        client = self._client(lambda method, url, **kwargs: StubResponse(200, organisation_json(1)),
+                              connect_timeout=3, read_timeout=20)
+        client.get_organisation(1)
+        self.assertEqual(self._http_service.calls[0][2]['timeout'], (3, 20))
+
+        with client.deadline(0.5):
+            client.get_organisation(1)
+        self.assertTrue(all(0 < value <= 0.5 for value in self._http_service.calls[1][2]['timeout']))
+
+    def test_listing_stops_at_deadline(self):
+        pages = paged_handler([organisation_json(i) for i in range(1, 10001)], '/Organisations')
+
+        def slow_pages(method, url, **kwargs):
+            time.sleep(0.05)
+            return pages(method, url, **kwargs)
+
+        client = self._client(slow_pages, page_concurrency=2)
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            with client.deadline(0.3):
+                client.list_organisations()
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertLess(len(self._http_service.calls), 20)
+
+    def test_retries_bounded_by_deadline(self):
+        client = self._client(lambda method, url, **kwargs: StubResponse(502, {'Message': 'bad gateway'}),
+                              retry_policy=RetryPolicy(max_retries=10, backoff_base=5))
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            with client.deadline(0.2):
+                client.get_organisation(1)
+        self.assertLess(time.monotonic() - started, 0.4)
+
+    def test_rate_limit_wait_bounded_by_deadline(self):
+        client = self._client(lambda method, url, **kwargs: StubResponse(200, organisation_json(1)),
+                              scheduler=RequestScheduler(rate=0.1, burst=1))
+        client.get_organisation(1)
+        started = time.monotonic()
+        with client.deadline(1):
+            self.assertRaises(DeadlineExceeded, client.get_organisation, 2)
+        self.assertLess(time.monotonic() - started, 0.1)
+        self.assertEqual(len(self._http_service.calls), 1)
+
+    def _slow_client(self, delay):
+        def handler(method, url, **kwargs):
+            # the read timeout sent is honoured, as by requests
+            timeout = kwargs['timeout'][1]
+            time.sleep(min(delay, timeout))
+            if timeout < delay:
+                raise requests.Timeout('read timed out')
+            return StubResponse(200, organisation_json(1))
+
+        return self._client(handler, retry_policy=RetryPolicy(max_retries=0))
+
+    def _get_in_thread(self, client, seconds, outcome):
+        def get():
+            try:
+                if seconds is None:
+                    outcome['result'] = client.get_organisation(1)
+                else:
+                    with client.deadline(seconds):
+                        outcome['result'] = client.get_organisation(1)
+            except Exception as e:
+                outcome['exception'] = e
+            outcome['elapsed'] = time.monotonic() - started
+
+        started = time.monotonic()
+        thread = threading.Thread(target=get)
+        thread.start()
+        return thread
+
+    def test_concurrent_get_not_failed_by_others_deadline(self):
+        client = self._slow_client(0.3)
+        leader, follower = dict(), dict()
+        threads = [self._get_in_thread(client, 0.1, leader)]
+        time.sleep(0.02)
+        threads.append(self._get_in_thread(client, None, follower))
+        for thread in threads:
+            thread.join()
+
+        self.assertIsInstance(leader['exception'], DeadlineExceeded)
+        self.assertEqual(follower['result'].ORGANISATION_ID, 1)
+        self.assertEqual(len(self._http_service.calls), 2)
+
+    def test_concurrent_get_bounded_by_own_deadline(self):
+        client = self._slow_client(0.45)
+        leader, follower = dict(), dict()
+        threads = [self._get_in_thread(client, None, leader)]
+        time.sleep(0.02)
+        threads.append(self._get_in_thread(client, 0.1, follower))
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(leader['result'].ORGANISATION_ID, 1)
+        self.assertIsInstance(follower['exception'], DeadlineExceeded)
+        self.assertLess(follower['elapsed'], 0.3)
+
+    def test_nested_deadline_never_extends(self):
+        with InsightlyClient.deadline(1) as outer:
+            with InsightlyClient.deadline(60) as inner:
+                self.assertIs(inner, outer)
+            with use_deadline(None):
+                self.assertIs(current_deadline(), outer)
+        self.assertIsNone(current_deadline())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import base64
+import unittest
+
+from insightly import EndpointRegistry, InsightlyClient, compile_endpoints
+from insightly.insightly_client import Config
+from stubs import StubHTTPService, StubResponse, contact_json
+
+
+class EndpointRegistryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._registry = EndpointRegistry(Config, 'https://api.insight.ly/v2.3/')
+
+    def test_urls_are_absolute(self):
+        endpoint = self._registry["Contacts", "Get"]
+        self.assertEqual(endpoint.url.format(id=7), 'https://api.insight.ly/v2.3/Contacts/7')
+        self.assertEqual(endpoint.method, 'GET')
+
+    def test_default_page_size(self):
+        self.assertEqual(self._registry["Organisations", "GetAll"].top, 500)
+        self.assertIsNone(self._registry["Users", "GetAll"].top)
+
+    def test_every_endpoint_is_compiled(self):
+        expected = set((entity, name) for entity, section in Config.items()
+                       if isinstance(section, dict) for name in section.get("Endpoints", {}))
+        self.assertEqual(set(self._registry), expected)
+        self.assertNotIn(("Contacts", "Missing"), self._registry)
+
+    def test_registry_is_shared_per_base_url(self):
+        self.assertIs(compile_endpoints(Config, 'https://example.com/'),
+                      compile_endpoints(Config, 'https://example.com/'))
+        self.assertIs(InsightlyClient('a').endpoints, InsightlyClient('b').endpoints)
+        self.assertIsNot(InsightlyClient('a').endpoints, InsightlyClient('a', version='2.2').endpoints)
+
+    def test_registry_is_compiled_per_config(self):
+        config = {"Contacts": {"Endpoints": {"Get": {"Url": "/People/{id}", "Method": "GET"}}}}
+        registry = compile_endpoints(config, 'https://example.com/')
+        self.assertEqual(registry["Contacts", "Get"].url, 'https://example.com/People/{id}')
+        self.assertIsNot(registry, compile_endpoints(Config, 'https://example.com/'))
+        self.assertIs(registry, compile_endpoints(config, 'https://example.com/'))
+
+
+class GetJsonTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._http_service = StubHTTPService(lambda method, url, **kwargs: StubResponse(200, contact_json(7)))
+        self._client = InsightlyClient('key', http_service=self._http_service)
+
+    def test_endpoint_url_is_used_as_is(self):
+        self._client.get_contact(7)
+        method, url, kwargs = self._http_service.calls[0]
+        self.assertEqual((method, url), ('GET', 'https://api.insight.ly/v2.3/Contacts/7'))
+        self.assertEqual(kwargs['headers']['Authorization'],
+                         'Basic {}'.format(base64.b64encode(b'key:').decode()))
+
+    def test_relative_path(self):
+        self._client.get_json('/Contacts/7')
+        self._client.get_json('Contacts/7')
+        self.assertEqual([url for _, url, _ in self._http_service.calls],
+                         ['https://api.insight.ly/v2.3/Contacts/7'] * 2)
+
+    def test_extra_headers_do_not_leak(self):
+        self._client.get_json('/Contacts/7', headers={'X-Test': '1'})
+        self._client.get_json('/Contacts/7')
+        self.assertEqual(self._http_service.calls[0][2]['headers']['X-Test'], '1')
+        self.assertNotIn('X-Test', self._http_service.calls[1][2]['headers'])
+
+
+if __name__ == "__main__":
+    unittest.main()
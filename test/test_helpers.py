@@ -0,0 +1,52 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import datetime
+import unittest
+
+from insightly import Contact, InsightlyClient
+from insightly.helpers import parse_activity_date, parse_activity_dates
+from stubs import StubHTTPService, contact_json, paged_handler
+
+
+class ActivityDateTestCase(unittest.TestCase):
+
+    def test_insightly_format(self):
+        self.assertEqual(parse_activity_date('2019-01-02 03:04:05'), datetime.datetime(2019, 1, 2, 3, 4, 5))
+
+    def test_other_formats_fall_back_to_dateutil(self):
+        self.assertEqual(parse_activity_date('Jan 2 2019 3:04:05 AM'), datetime.datetime(2019, 1, 2, 3, 4, 5))
+
+    def test_datetime_is_kept(self):
+        date = datetime.datetime(2019, 1, 2)
+        self.assertIs(parse_activity_date(date), date)
+
+    def test_batch(self):
+        records = [{'DATE_CREATED_UTC': '2019-01-02 03:04:05', 'DATE_UPDATED_UTC': None},
+                   {'DATE_CREATED_UTC': '2019-01-02 03:04:05', 'DATE_UPDATED_UTC': '2019-06-07 08:09:10'}]
+        parse_activity_dates(records)
+        self.assertIs(records[0]['DATE_CREATED_UTC'], records[1]['DATE_CREATED_UTC'])
+        self.assertIsNone(records[0]['DATE_UPDATED_UTC'])
+        self.assertEqual(records[1]['DATE_UPDATED_UTC'], datetime.datetime(2019, 6, 7, 8, 9, 10))
+
+    def test_listing_parses_dates(self):
+        http_service = StubHTTPService(paged_handler([contact_json(i) for i in range(3)], '/Contacts'))
+        contacts = InsightlyClient('key', http_service=http_service).list_contacts()
+        self.assertEqual(contacts[2].DATE_CREATED_UTC, datetime.datetime(2019, 1, 2, 3, 4, 5))
+
+    def test_lazy_dates(self):
+        client = InsightlyClient('key', lazy_dates=True)
+        contact = Contact.from_json(client, contact_json(7))
+        self.assertEqual(contact._DATE_UPDATED_UTC, '2019-06-07 08:09:10')
+        self.assertEqual(contact.DATE_UPDATED_UTC, datetime.datetime(2019, 6, 7, 8, 9, 10))
+        self.assertIs(contact._DATE_UPDATED_UTC, contact.DATE_UPDATED_UTC)
+        self.assertEqual(contact.to_dict()['DATE_UPDATED_UTC'], '2019-06-07 08:09:10')
+
+    def test_lazy_date_can_be_set(self):
+        contact = Contact.from_json(InsightlyClient('key', lazy_dates=True), contact_json(7))
+        contact.DATE_CREATED_UTC = datetime.datetime(2020, 1, 1)
+        self.assertEqual(contact.DATE_CREATED_UTC, datetime.datetime(2020, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
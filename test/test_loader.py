@@ -0,0 +1,80 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import unittest
+
+from insightly import InsightlyClient, Contact, Loader, Organisation, User
+from stubs import StubHTTPService, StubResponse, contact_json, organisation_json
+
+
+def user_json(user_id):
+    return {'USER_ID': user_id, 'CONTACT_ID': None, 'FIRST_NAME': 'User', 'LAST_NAME': str(user_id),
+            'TIMEZONE_ID': None, 'EMAIL_ADDRESS': None, 'EMAIL_DROPBOX_IDENTIFIER': None,
+            'EMAIL_DROPBOX_ADDRESS': None, 'ADMINISTRATOR': False, 'ACCOUNT_OWNER': False, 'ACTIVE': True,
+            'DATE_CREATED_UTC': '2019-01-02 03:04:05', 'DATE_UPDATED_UTC': '2019-06-07 08:09:10', 'USER_CURRENCY': None,
+            'CONTACT_DISPLAY': None, 'CONTACT_ORDER': None, 'TASK_WEEK_START': None, 'INSTANCE_ID': None,
+            'PROFILE_ID': None, 'ROLE_ID': None}
+
+
+class LoaderTestCase(unittest.TestCase):
+    """
+    Tests for batched ID resolution, run against a stubbed HTTP service.
+    """
+
+    def setUp(self):
+        records = {'Contacts': dict((i, contact_json(i)) for i in range(1, 301)),
+                   'Organisations': dict((i, organisation_json(i)) for i in range(1, 11))}
+
+        def handler(method, url, **kwargs):
+            path, _, query = url.partition('?')
+            entity = path.rsplit('/', 1)[1]
+            if entity == 'Users':
+                return StubResponse(200, [user_json(i) for i in range(1, 4)])
+            params = dict(part.split('=') for part in query.split('&'))
+            ids = [int(record_id) for record_id in params['ids'].split(',')]
+            return StubResponse(200, [records[entity][i] for i in ids if i in records[entity]])
+
+        self._http_service = StubHTTPService(handler)
+        self._insightly = InsightlyClient('key', http_service=self._http_service)
+
+    def test_deferred_records_fetched_in_batches(self):
+        loader = self._insightly.loader(batch_size=100)
+        deferred = [loader.load(Contact, i % 300 + 1) for i in range(1000)]
+        owners = [loader.load(User, i % 3 + 1) for i in range(1000)]
+        self.assertEqual(len(self._http_service.calls), 0)
+
+        self.assertEqual(deferred[41].get().CONTACT_ID, 42)
+        # three batches of contacts and one user listing
+        self.assertEqual(len(self._http_service.calls), 4)
+        self.assertEqual(set(owner.get().USER_ID for owner in owners), {1, 2, 3})
+        self.assertEqual(len(set(record.get().CONTACT_ID for record in deferred)), 300)
+        self.assertEqual(len(self._http_service.calls), 4)
+
+    def test_load_many_keeps_order_and_missing(self):
+        loader = self._insightly.loader()
+        organisations = loader.load_many("Organisations", [3, 99, 1])
+
+        self.assertIsInstance(organisations[0], Organisation)
+        self.assertEqual([o.ORGANISATION_ID if o else None for o in organisations], [3, None, 1])
+        self.assertIn('&ids=1,3,99', self._http_service.calls[0][1])
+
+        loader.load_many(Organisation, [1, 3])
+        self.assertEqual(len(self._http_service.calls), 1)
+
+    def test_pages_parsed_by_given_function(self):
+        pages = []
+
+        def parse_dates(page):
+            pages.append(page)
+            return page
+
+        organisation, = Loader(self._insightly, parse_dates=parse_dates).load_many(Organisation, [2])
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(organisation.ORGANISATION_ID, 2)
+
+    def test_unknown_entity(self):
+        self.assertRaises(ValueError, self._insightly.loader().load, "Projects", 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
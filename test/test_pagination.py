@@ -0,0 +1,94 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import unittest
+
+from insightly import InsightlyClient
+from insightly.pagination import Paginator
+from stubs import StubHTTPService, contact_json, paged_handler
+
+
+class PaginatorTestCase(unittest.TestCase):
+    """
+    Tests for concurrent page prefetching, run against a stubbed HTTP service.
+    """
+
+    def _paginator(self, total, top=10, concurrency=3):
+        records = [{'CATEGORY_ID': i} for i in range(total)]
+        http_service = StubHTTPService(paged_handler(records, '/OpportunityCategories'))
+        client = InsightlyClient('key', http_service=http_service)
+        paginator = Paginator(client, '/OpportunityCategories?skip={skip}&top={top}', top=top,
+                              concurrency=concurrency)
+        return paginator, http_service
+
+    def test_pages_are_yielded_in_order(self):
+        paginator, _ = self._paginator(95)
+        ids = [obj['CATEGORY_ID'] for page in paginator.pages() for obj in page]
+        self.assertEqual(ids, list(range(95)))
+
+    def test_stops_after_short_page(self):
+        paginator, http_service = self._paginator(95, concurrency=1)
+        list(paginator.pages())
+        # ten pages, the last one short - no trailing empty page request
+        self.assertEqual(len(http_service.calls), 10)
+
+    def test_requests_in_flight_bounded_by_window(self):
+        paginator, http_service = self._paginator(95, concurrency=3)
+        list(paginator.pages())
+        self.assertLessEqual(len(http_service.calls), 10 + 2)
+
+    def test_empty_endpoint(self):
+        paginator, _ = self._paginator(0)
+        self.assertEqual(list(paginator.pages()), [])
+
+    def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            Paginator(None, '', concurrency=0)
+
+
+class IterEntitiesTestCase(unittest.TestCase):
+    """
+    Tests for the streaming iter_* methods on InsightlyClient.
+    """
+
+    def setUp(self):
+        records = [contact_json(i) for i in range(1, 1201)]
+        self._http_service = StubHTTPService(paged_handler(records, '/Contacts'))
+        self._insightly = InsightlyClient('key', http_service=self._http_service, page_concurrency=1)
+
+    def test_iter_contacts_is_lazy(self):
+        contacts = self._insightly.iter_contacts()
+        self.assertEqual(self._http_service.calls, [])
+        first = next(contacts)
+        self.assertEqual(first.CONTACT_ID, 1)
+        self.assertEqual(len(self._http_service.calls), 1)
+        contacts.close()
+
+    def test_iter_contacts_yields_all(self):
+        ids = [contact.CONTACT_ID for contact in self._insightly.iter_contacts()]
+        self.assertEqual(ids, list(range(1, 1201)))
+
+    def test_list_contacts_matches_iter(self):
+        self.assertEqual(len(self._insightly.list_contacts()), 1200)
+
+    def test_fields_are_projected(self):
+        contacts = self._insightly.list_contacts(fields=['CONTACT_ID', 'LAST_NAME', 'DATE_UPDATED_UTC'])
+        self.assertEqual(contacts[0].LAST_NAME, 'Last1')
+        self.assertEqual(str(contacts[0].DATE_UPDATED_UTC), '2019-06-07 08:09:10')
+        with self.assertRaises(AttributeError):
+            contacts[0].FIRST_NAME
+        self.assertTrue(all('&brief=true' in url for _, url, _ in self._http_service.calls))
+
+    def test_child_fields_are_not_brief(self):
+        contacts = self._insightly.list_contacts(fields=['CONTACT_ID', 'LINKS'])
+        self.assertEqual(contacts[0].LINKS, [])
+        self.assertFalse(any('brief' in url for _, url, _ in self._http_service.calls))
+
+    def test_unknown_fields(self):
+        with self.assertRaises(ValueError):
+            self._insightly.list_contacts(fields=['CONTACT_ID', 'NAME'])
+        self.assertEqual(self._http_service.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import unittest
+
+from insightly import InsightlyClient, RateLimited, RequestScheduler, TokenBucket
+from insightly.rate_limit import parse_retry_after
+from stubs import FakeClock, StubHTTPService, StubResponse
+
+
+class TokenBucketTestCase(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+        self.assertEqual([bucket.take() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.take(), 0.5)
+        clock.now += 0.5
+        self.assertEqual(bucket.take(), 0.0)
+
+    def test_limit(self):
+        bucket = TokenBucket(rate=10, clock=FakeClock())
+        bucket.limit(2)
+        self.assertEqual(bucket.tokens, 2)
+
+
+class RequestSchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._clock = FakeClock()
+        self._scheduler = RequestScheduler(rate=5, burst=5, max_retries=3, clock=self._clock,
+                                           sleep=self._clock.sleep)
+
+    def _client(self, responses):
+        responses = iter(responses)
+        self._http_service = StubHTTPService(lambda method, url, **kwargs: next(responses))
+        return InsightlyClient('key', http_service=self._http_service, scheduler=self._scheduler)
+
+    def test_admits_requests_at_rate(self):
+        for _ in range(15):
+            self._scheduler.acquire()
+        self.assertAlmostEqual(self._clock.now, 2.0)
+        self.assertEqual(self._scheduler.queue_depth, 0)
+
+    def test_retry_after_is_honoured(self):
+        client = self._client([StubResponse(429, {}, headers={'Retry-After': '7'}), StubResponse(200, [])])
+        self.assertEqual(client.get_json('/Users'), [])
+        self.assertEqual(len(self._http_service.calls), 2)
+        self.assertGreaterEqual(self._clock.now, 7.0)
+        self.assertEqual(self._scheduler.throttled, 1)
+
+    def test_backoff_on_service_unavailable(self):
+        client = self._client([StubResponse(503, {}), StubResponse(503, {}), StubResponse(200, [])])
+        self.assertEqual(client.get_json('/Users'), [])
+        self.assertEqual(self._scheduler.retries, 2)
+
+    def test_gives_up_after_max_retries(self):
+        client = self._client([StubResponse(429, {})] * 4)
+        with self.assertRaises(RateLimited):
+            client.get_json('/Users')
+        self.assertEqual(len(self._http_service.calls), 4)
+
+    def test_remaining_quota_limits_budget(self):
+        client = self._client([StubResponse(200, [], headers={'X-RateLimit-Remaining': '1'})])
+        client.get_json('/Users')
+        self.assertEqual(self._scheduler.budget, 1)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('3'), 3.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,255 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import json
+import pickle
+import unittest
+
+from insightly import Contact, CustomField, InsightlyClient, Link, Opportunity, Organisation
+from stubs import StubHTTPService, StubResponse, contact_json, opportunity_json, organisation_json, paged_handler
+
+
+class InsightlyRecordTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._records = [Contact.from_json(None, contact_json(1)),
+                         Organisation.from_json(None, organisation_json(2)),
+                         Opportunity.from_json(None, opportunity_json(3))]
+
+    def test_attributes_are_slotted(self):
+        for record in self._records:
+            self.assertEqual(record.__dict__, {})
+        self.assertEqual(CustomField('TIER__c', 'Gold').__dict__, {})
+
+    def test_getstate(self):
+        state = self._records[0].__getstate__()
+        self.assertNotIn('client', state)
+        self.assertNotIn('id', state)
+        self.assertEqual(state['CONTACT_ID'], 1)
+        self.assertEqual(str(state['DATE_CREATED_UTC']), '2019-01-02 03:04:05')
+        self.assertNotIn('CONTACT_ID', Contact(None).__getstate__())
+
+    def test_pickle_round_trip(self):
+        for record in self._records:
+            copy = pickle.loads(pickle.dumps(record))
+            self.assertEqual(copy.__getstate__(), record.__getstate__())
+
+    def test_other_attributes_can_be_set(self):
+        organisation = self._records[1]
+        organisation.match_score = 0.9
+        self.assertEqual(organisation.match_score, 0.9)
+        self.assertEqual(organisation.__getstate__()['match_score'], 0.9)
+
+
+class LazyRecordTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._client = InsightlyClient('key', lazy_entities=True)
+        self._json = organisation_json(
+            2, ADDRESS_SHIP_CITY='Berlin', CUSTOMFIELDS=[{'CUSTOM_FIELD_ID': 'TIER__c', 'FIELD_VALUE': 'Gold'}],
+            LINKS=[{'LINK_ID': 5, 'ORGANISATION_ID': 2, 'CONTACT_ID': 1, 'OPPORTUNITY_ID': None,
+                    'SECOND_OPPORTUNITY_ID': None, 'PROJECT_ID': None, 'SECOND_PROJECT_ID': None, 'ROLE': 'Owner',
+                    'DETAILS': None}])
+
+    def test_attributes_are_read_on_access(self):
+        organisation = Organisation.from_json(self._client, self._json)
+        self.assertIs(organisation.client, self._client)
+        self.assertEqual(organisation.ORGANISATION_NAME, 'Organisation 2')
+        self.assertEqual(organisation.ADDRESS_SHIP_CITY, 'Berlin')
+        self.assertEqual(str(organisation.DATE_UPDATED_UTC), '2019-06-07 08:09:10')
+
+    def test_nested_objects_are_built_on_access(self):
+        organisation = Organisation.from_json(self._client, self._json)
+        with self.assertRaises(AttributeError):
+            object.__getattribute__(organisation, 'LINKS')
+        links = organisation.LINKS
+        self.assertIsInstance(links[0], Link)
+        self.assertIs(organisation.LINKS, links)
+        self.assertEqual(organisation.CUSTOMFIELDS[0].FIELD_VALUE, 'Gold')
+
+    def test_matches_eager_record(self):
+        lazy = Organisation.from_json(self._client, self._json)
+        eager = Organisation.from_json(None, self._json)
+        self.assertEqual(lazy.to_dict(), eager.to_dict())
+        self.assertEqual(lazy.__getstate__().keys(), eager.__getstate__().keys())
+
+    def test_attributes_can_be_set(self):
+        contact = Contact.from_json(self._client, contact_json(1))
+        contact.FIRST_NAME = 'Ada'
+        self.assertEqual(contact.FIRST_NAME, 'Ada')
+        self.assertEqual(contact.to_dict()['FIRST_NAME'], 'Ada')
+        with self.assertRaises(AttributeError):
+            contact.NOT_A_FIELD
+
+    def test_listing(self):
+        http_service = StubHTTPService(paged_handler([opportunity_json(i) for i in range(3)], '/Opportunities'))
+        client = InsightlyClient('key', http_service=http_service, lazy_entities=True)
+        opportunities = client.list_opportunities()
+        self.assertEqual([opportunity.OPPORTUNITY_ID for opportunity in opportunities], [0, 1, 2])
+
+
+class RefreshInPlaceTestCase(unittest.TestCase):
+    """
+    Tests for fetch() and save() applying the record returned by Insightly to the instance in place.
+    """
+
+    def setUp(self):
+        self.server_json = organisation_json(2, CUSTOMFIELDS=[{'CUSTOM_FIELD_ID': 'TIER__c', 'FIELD_VALUE': 'Gold'}])
+
+        def handler(method, url, data=None, **kwargs):
+            if method == 'POST':
+                name = json.loads(data)['ORGANISATION_NAME']
+                return StubResponse(201, dict(self.server_json, ORGANISATION_NAME=name))
+            if method == 'PUT':
+                self.server_json.update(json.loads(data), DATE_UPDATED_UTC='2019-07-01 00:00:00')
+            return StubResponse(200, self.server_json)
+
+        self._http_service = StubHTTPService(handler)
+
+    def _organisation(self, **client_options):
+        client = InsightlyClient('key', http_service=self._http_service, **client_options)
+        return Organisation.from_json(client, json.loads(json.dumps(self.server_json)))
+
+    def test_fetch_updates_instance(self):
+        organisation = self._organisation()
+        links = organisation.LINKS
+        self.server_json.update(ORGANISATION_NAME='Renamed', DATE_UPDATED_UTC='2019-07-01 00:00:00')
+
+        self.assertEqual(organisation.fetch(), {'ORGANISATION_NAME', 'DATE_UPDATED_UTC'})
+        self.assertEqual(organisation.ORGANISATION_NAME, 'Renamed')
+        self.assertEqual(str(organisation.DATE_UPDATED_UTC), '2019-07-01 00:00:00')
+        # unchanged nested objects are kept
+        self.assertIs(organisation.LINKS, links)
+        self.assertEqual(organisation.fetch(), set())
+
+    def test_fetch_discards_local_changes(self):
+        organisation = self._organisation()
+        organisation.CUSTOMFIELDS[0].FIELD_VALUE = 'Silver'
+        self.assertEqual(organisation.fetch(), {'CUSTOMFIELDS'})
+        self.assertEqual(organisation.CUSTOMFIELDS[0].FIELD_VALUE, 'Gold')
+
+    def test_fetch_lazy_record(self):
+        organisation = self._organisation(lazy_entities=True)
+        self.assertEqual(organisation.ORGANISATION_NAME, 'Organisation 2')
+        self.server_json.update(ORGANISATION_NAME='Renamed', BACKGROUND='New')
+
+        self.assertEqual(organisation.fetch(), {'ORGANISATION_NAME', 'BACKGROUND'})
+        self.assertEqual((organisation.ORGANISATION_NAME, organisation.BACKGROUND), ('Renamed', 'New'))
+
+    def test_save_applies_response(self):
+        organisation = self._organisation()
+        organisation.BACKGROUND = 'Updated'
+        self.assertEqual(organisation.save(), {'DATE_UPDATED_UTC'})
+
+        created = Organisation(organisation.client, name='New')
+        self.server_json['ORGANISATION_ID'] = 9
+        self.assertIn('ORGANISATION_ID', created.save())
+        self.assertEqual(created.ORGANISATION_ID, 9)
+        self.assertEqual(created.CUSTOMFIELDS[0].FIELD_VALUE, 'Gold')
+
+
+class DirtyFieldsTestCase(unittest.TestCase):
+    """
+    Tests for save() skipping records unchanged since received, and sending the whole record otherwise.
+    """
+
+    def setUp(self):
+        self.server_json = organisation_json(2, CUSTOMFIELDS=[{'CUSTOM_FIELD_ID': 'TIER__c', 'FIELD_VALUE': 'Gold'}])
+
+        def handler(method, url, data=None, **kwargs):
+            if method == 'PUT':
+                self.server_json.update(json.loads(data))
+            return StubResponse(200, self.server_json)
+
+        self._http_service = StubHTTPService(handler)
+        self._client = InsightlyClient('key', http_service=self._http_service)
+
+    def _organisation(self):
+        return Organisation.from_json(self._client, json.loads(json.dumps(self.server_json)))
+
+    def _sent(self):
+        return json.loads(self._http_service.calls[-1][2]['data'])
+
+    def test_unchanged_record_not_sent(self):
+        organisation = self._organisation()
+        self.assertEqual(organisation.changed_fields(), set())
+        self.assertEqual(organisation.save(), set())
+        self.assertEqual(self._http_service.calls, [])
+
+    def test_changed_record_sent_whole(self):
+        organisation = self._organisation()
+        organisation.BACKGROUND = 'Updated'
+        self.assertEqual(organisation.changed_fields(), {'BACKGROUND'})
+
+        body = organisation.to_dict()
+        organisation.save()
+        # Insightly replaces the whole record on update, so no field is left out
+        self.assertEqual(self._sent(), body)
+        self.assertEqual(self._sent()['CUSTOMFIELDS'], [{'CUSTOM_FIELD_ID': 'TIER__c', 'FIELD_VALUE': 'Gold'}])
+        self.assertEqual(organisation.changed_fields(), set())
+
+    def test_nested_changes(self):
+        organisation = self._organisation()
+        organisation.CUSTOMFIELDS[0].FIELD_VALUE = 'Silver'
+        self.assertEqual(organisation.changed_fields(), {'CUSTOMFIELDS'})
+
+        organisation.save()
+        self.assertEqual(self._sent()['CUSTOMFIELDS'], [{'CUSTOM_FIELD_ID': 'TIER__c', 'FIELD_VALUE': 'Silver'}])
+
+        organisation = self._organisation()
+        organisation.mark_changed('BACKGROUND')
+        calls = len(self._http_service.calls)
+        organisation.save()
+        self.assertEqual(len(self._http_service.calls), calls + 1)
+        self.assertEqual(self._sent(), organisation.to_dict())
+
+    def test_lists_changed_in_place(self):
+        # built straight from the JSON, without copying it first
+        organisation = Organisation.from_json(self._client, organisation_json(2, TAGS=[{'TAG_NAME': 'old'}]))
+        organisation.TAGS.append({'TAG_NAME': 'new'})
+        organisation.TAGS[0]['TAG_NAME'] = 'renamed'
+        self.assertEqual(organisation.changed_fields(), {'TAGS'})
+
+        organisation.save()
+        self.assertEqual(self._http_service.calls[-1][0], 'PUT')
+        self.assertEqual(self._sent()['TAGS'], [{'TAG_NAME': 'renamed'}, {'TAG_NAME': 'new'}])
+
+        # and after the record is refreshed from the response
+        organisation.EMAILDOMAINS.append({'EMAIL_DOMAIN': 'example.com'})
+        self.assertEqual(organisation.changed_fields(), {'EMAILDOMAINS'})
+
+        client = InsightlyClient('key', http_service=self._http_service, lazy_entities=True)
+        lazy = Organisation.from_json(client, organisation_json(3))
+        lazy.TAGS.append({'TAG_NAME': 'new'})
+        self.assertEqual(lazy.changed_fields(), {'TAGS'})
+
+    def test_lazy_record(self):
+        client = InsightlyClient('key', http_service=self._http_service, lazy_entities=True)
+        organisation = Organisation.from_json(client, json.loads(json.dumps(self.server_json)))
+        self.assertEqual(organisation.save(), set())
+        self.assertEqual(self._http_service.calls, [])
+
+        organisation.BACKGROUND = 'Updated'
+        organisation.save()
+        self.assertEqual(self._sent()['BACKGROUND'], 'Updated')
+        self.assertEqual(self._sent()['CUSTOMFIELDS'], [{'CUSTOM_FIELD_ID': 'TIER__c', 'FIELD_VALUE': 'Gold'}])
+
+    def test_projected_record_not_saved(self):
+        http_service = StubHTTPService(paged_handler([self.server_json], '/Organisations'))
+        client = InsightlyClient('key', http_service=http_service)
+        organisation, = client.list_organisations(fields=['ORGANISATION_ID', 'ORGANISATION_NAME'])
+        organisation.ORGANISATION_NAME = 'renamed'
+
+        self.assertIsNone(organisation.changed_fields())
+        self.assertRaises(ValueError, organisation.save)
+        self.assertNotIn('PUT', [method for method, _, _ in http_service.calls])
+
+    def test_constructed_record_sent_whole(self):
+        organisation = Organisation(self._client, organisation_id=2, name='Organisation 2')
+        self.assertIsNone(organisation.changed_fields())
+        organisation.save()
+        self.assertIn('BACKGROUND', self._sent())
+
+
+if __name__ == "__main__":
+    unittest.main()
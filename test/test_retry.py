@@ -0,0 +1,96 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import datetime
+import unittest
+
+import requests
+
+from insightly import InsightlyClient, MissingOrInvalidParameter, ResourceUnavailable, RetryPolicy
+from stubs import StubHTTPService, StubResponse, organisation_json
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class RetryTestCase(unittest.TestCase):
+    """
+    Tests for retrying requests failing transiently, run against a stubbed HTTP service.
+    """
+
+    def _client(self, handler):
+        self._http_service = StubHTTPService(handler)
+        self.policy = RetryPolicy(max_retries=3, sleep=lambda seconds: None)
+        return InsightlyClient('key', http_service=self._http_service, retry_policy=self.policy)
+
+    def _responses(self, *responses):
+        responses = list(responses)
+
+        def handler(method, url, **kwargs):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        return handler
+
+    def test_idempotent_requests_retried(self):
+        client = self._client(self._responses(StubResponse(502), requests.ConnectionError('reset'),
+                                              StubResponse(200, organisation_json(1))))
+        self.assertEqual(client.get_organisation(1).ORGANISATION_ID, 1)
+        self.assertEqual((self.policy.retries, self.policy.give_ups), (2, 0))
+
+    def test_gives_up_after_max_retries(self):
+        client = self._client(lambda method, url, **kwargs: StubResponse(500, {'Message': 'error'}))
+        self.assertRaises(ResourceUnavailable, client.delete_organisation, 1)
+        self.assertEqual(len(self._http_service.calls), 4)
+        self.assertEqual((self.policy.retries, self.policy.give_ups), (3, 1))
+
+    def test_client_errors_not_retried(self):
+        client = self._client(lambda method, url, **kwargs: StubResponse(400, {'Message': 'invalid'}))
+        self.assertRaises(MissingOrInvalidParameter, client.get_organisation, 1)
+        self.assertEqual(len(self._http_service.calls), 1)
+
+    def test_post_found_created_not_sent_again(self):
+        created = organisation_json(7, ORGANISATION_NAME='Acme & Co', DATE_CREATED_UTC=_now())
+        older = organisation_json(3, ORGANISATION_NAME='Acme & Co')
+        client = self._client(self._responses(StubResponse(504), StubResponse(200, [older, created])))
+
+        self.assertEqual(client.add_organisation('Acme & Co', 1).ORGANISATION_ID, 7)
+        self.assertEqual([method for method, _, _ in self._http_service.calls], ['POST', 'GET'])
+        self.assertIn('/Organisations/Search?organisation_name=Acme%20%26%20Co', self._http_service.calls[1][1])
+        self.assertEqual((self.policy.recovered, self.policy.retries), (1, 0))
+
+    def test_post_retried_when_not_created(self):
+        client = self._client(self._responses(requests.Timeout('read timeout'), StubResponse(200, []),
+                                              StubResponse(201, organisation_json(8, ORGANISATION_NAME='Acme'))))
+
+        self.assertEqual(client.add_organisation('Acme', 1).ORGANISATION_ID, 8)
+        self.assertEqual([method for method, _, _ in self._http_service.calls], ['POST', 'GET', 'POST'])
+        self.assertEqual(self.policy.retries, 1)
+
+    def test_unavailable_post_looked_up_before_sent_again(self):
+        created = organisation_json(9, ORGANISATION_NAME='Acme', DATE_CREATED_UTC=_now())
+        client = self._client(self._responses(StubResponse(503, {'Message': 'unavailable'}),
+                                              StubResponse(200, [created]),
+                                              StubResponse(201, organisation_json(10, ORGANISATION_NAME='Acme'))))
+
+        self.assertEqual(client.add_organisation('Acme', 1).ORGANISATION_ID, 9)
+        self.assertEqual([method for method, _, _ in self._http_service.calls], ['POST', 'GET'])
+        self.assertIn('/Organisations/Search?', self._http_service.calls[1][1])
+        self.assertEqual(self.policy.recovered, 1)
+
+    def test_throttled_post_sent_again(self):
+        client = self._client(self._responses(StubResponse(429, {'Message': 'slow down'}),
+                                              StubResponse(201, organisation_json(8, ORGANISATION_NAME='Acme'))))
+        self.assertEqual(client.add_organisation('Acme', 1).ORGANISATION_ID, 8)
+        self.assertEqual([method for method, _, _ in self._http_service.calls], ['POST', 'POST'])
+
+    def test_post_not_retried_when_lookup_fails(self):
+        client = self._client(self._responses(StubResponse(502), StubResponse(401, {'Message': 'expired'})))
+        self.assertRaises(ResourceUnavailable, client.add_organisation, 'Acme', 1)
+        self.assertEqual(self.policy.give_ups, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import datetime
+import json
+import unittest
+
+from insightly import Contact, CustomField, InsightlyClient, Link, Opportunity, Organisation
+from insightly.models import encode_value
+from stubs import StubHTTPService, StubResponse, contact_json, opportunity_json, organisation_json
+
+
+class RecordEncoderTestCase(unittest.TestCase):
+
+    def test_datetimes_are_formatted(self):
+        contact = Contact.from_json(None, contact_json(7))
+        body = contact.to_dict()
+        self.assertEqual(body['DATE_CREATED_UTC'], '2019-01-02 03:04:05')
+        self.assertEqual(body['DATE_UPDATED_UTC'], '2019-06-07 08:09:10')
+        self.assertEqual(encode_value([datetime.datetime(2020, 1, 2)]), ['2020-01-02 00:00:00'])
+
+    def test_nested_objects(self):
+        organisation = Organisation.from_json(None, organisation_json(
+            3, CUSTOMFIELDS=[{'CUSTOM_FIELD_ID': 'TIER__c', 'FIELD_VALUE': 'Gold'}]))
+        organisation.LINKS = [Link(contact_id=7, role='Owner')]
+        body = organisation.to_dict()
+        self.assertEqual(body['CUSTOMFIELDS'], [{'CUSTOM_FIELD_ID': 'TIER__c', 'FIELD_VALUE': 'Gold'}])
+        self.assertNotIn('LINK_ID', body['LINKS'][0])
+        self.assertEqual(body['LINKS'][0]['CONTACT_ID'], 7)
+
+    def test_only_accepted_fields(self):
+        opportunity = Opportunity.from_json(None, opportunity_json(5))
+        opportunity.unsaved_note = 'local only'
+        body = opportunity.to_dict()
+        self.assertNotIn('unsaved_note', body)
+        self.assertNotIn('client', body)
+        self.assertEqual(body['OPPORTUNITY_ID'], 5)
+        self.assertEqual(json.loads(opportunity.to_json()), body)
+
+    def test_new_record_has_no_id(self):
+        body = Contact(None, first_name='Ada', last_name='Lovelace').to_dict()
+        self.assertNotIn('CONTACT_ID', body)
+        self.assertEqual((body['FIRST_NAME'], body['LAST_NAME']), ('Ada', 'Lovelace'))
+
+    def test_custom_field_to_json(self):
+        self.assertEqual(json.loads(CustomField('TIER__c', 'Gold').to_json()),
+                         {'CUSTOM_FIELD_ID': 'TIER__c', 'FIELD_VALUE': 'Gold'})
+
+    def test_save_sends_request_body(self):
+        http_service = StubHTTPService(lambda method, url, **kwargs: StubResponse(200, contact_json(9)))
+        contact = Contact(InsightlyClient('key', http_service=http_service), first_name='Ada', last_name='Lovelace')
+        contact.save()
+        sent = json.loads(http_service.calls[0][2]['data'])
+        self.assertEqual(sent, Contact(None, first_name='Ada', last_name='Lovelace').to_dict())
+        self.assertEqual(contact.CONTACT_ID, 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import itertools
+import json
+import threading
+import unittest
+
+from insightly import CommitFailed, Contact, InsightlyClient, Organisation
+from stubs import StubHTTPService, StubResponse, contact_json, organisation_json
+
+LINK_FIELDS = ('LINK_ID', 'ORGANISATION_ID', 'CONTACT_ID', 'OPPORTUNITY_ID', 'SECOND_OPPORTUNITY_ID', 'PROJECT_ID',
+               'SECOND_PROJECT_ID', 'ROLE', 'DETAILS')
+
+
+class SessionTestCase(unittest.TestCase):
+    """
+    Tests for the unit-of-work session, run against a stubbed HTTP service.
+    """
+
+    def setUp(self):
+        ids = itertools.count(100)
+        self.order = []
+        lock = threading.Lock()
+
+        def handler(method, url, data=None, **kwargs):
+            body = json.loads(data) if data else {}
+            path = url.split('/v2.3/', 1)[1]
+            with lock:
+                self.order.append((method, path))
+            if path.endswith('/Links'):
+                return StubResponse(201, dict(dict.fromkeys(LINK_FIELDS), LINK_ID=next(ids), **body))
+            if method == 'DELETE':
+                return StubResponse(202)
+            if method == 'POST' and body.get('ORGANISATION_NAME') == 'invalid':
+                return StubResponse(400, {'Message': 'invalid name'})
+            if method == 'POST':
+                body[{'Contacts': 'CONTACT_ID', 'Organisations': 'ORGANISATION_ID'}[path]] = next(ids)
+            if path.startswith('Contacts'):
+                return StubResponse(200, contact_json(body.pop('CONTACT_ID'), **body))
+            return StubResponse(200, organisation_json(body.pop('ORGANISATION_ID'), **body))
+
+        self._http_service = StubHTTPService(handler)
+        self._insightly = InsightlyClient('key', http_service=self._http_service)
+
+    def _organisation(self, organisation_id):
+        link = dict(dict.fromkeys(LINK_FIELDS), LINK_ID=9, ORGANISATION_ID=organisation_id, CONTACT_ID=5)
+        return Organisation.from_json(self._insightly, organisation_json(organisation_id, LINKS=[link]))
+
+    def test_creates_sent_before_links(self):
+        organisation = Organisation(self._insightly, name='New')
+        contact = Contact(self._insightly, first_name='New', last_name='Contact')
+        with self._insightly.session() as session:
+            session.save(organisation)
+            session.save(contact)
+            session.link(organisation, 'add_contact_link', contact, role='CEO')
+            self.assertEqual(self._http_service.calls, [])
+
+        self.assertEqual(sorted(self.order[:2]), [('POST', 'Contacts'), ('POST', 'Organisations')])
+        self.assertEqual(self.order[2], ('POST', 'Organisations/{}/Links'.format(organisation.ORGANISATION_ID)))
+        link = json.loads(self._http_service.calls[2][2]['data'])
+        self.assertEqual(link['CONTACT_ID'], contact.CONTACT_ID)
+        self.assertTrue(all(result.ok for result in session.results))
+
+    def test_redundant_writes_collapsed(self):
+        organisation, deleted = self._organisation(1), self._organisation(2)
+        created_then_deleted = Organisation(self._insightly, name='Temporary')
+        with self._insightly.session() as session:
+            organisation.BACKGROUND = 'First'
+            session.save(organisation)
+            organisation.BACKGROUND = 'Second'
+            session.save(organisation)
+            session.save(deleted)
+            session.delete(deleted)
+            session.delete(Organisation, 2)
+            session.save(created_then_deleted)
+            session.delete(created_then_deleted)
+            for _ in range(3):
+                session.link(organisation, 'add_contact_link', 5, role='Owner')
+            session.link(deleted, 'add_contact_link', 5)
+
+        self.assertEqual(sorted(self.order), [('DELETE', 'Organisations/2'), ('POST', 'Organisations/1/Links'),
+                                              ('PUT', 'Organisations')])
+        update = [kwargs for method, _, kwargs in self._http_service.calls if method == 'PUT'][0]
+        self.assertEqual(json.loads(update['data'])['BACKGROUND'], 'Second')
+
+    def test_link_updates_merged(self):
+        session = self._insightly.session()
+        organisation = self._organisation(1)
+        session.link(organisation, 'update_contact_link', 9, role='Owner')
+        session.link(organisation, 'update_contact_link', link_id=9, details='Since 2019')
+        session.link(organisation, 'update_contact_link', 10, role='Owner')
+        self.assertEqual(session.pending(), 2)
+
+    def test_failures_reported(self):
+        organisation = Organisation(self._insightly, name='invalid')
+        session = self._insightly.session()
+        session.save(organisation)
+        session.link(organisation, 'add_contact_link', 5)
+        session.save(self._organisation(1))
+
+        with self.assertRaises(CommitFailed) as raised:
+            with session:
+                pass
+        results = raised.exception.results
+        self.assertEqual([result.ok for result in results], [False, True, False])
+        self.assertIsInstance(results[2].exception, ValueError)
+        self.assertEqual(session.pending(), 0)
+
+    def test_exception_discards_writes(self):
+        try:
+            with self._insightly.session() as session:
+                session.save(Organisation(self._insightly, name='New'))
+                raise KeyError
+        except KeyError:
+            pass
+        self.assertEqual(session.pending(), 0)
+        self.assertEqual(self._http_service.calls, [])
+
+    def test_link_mutations_only(self):
+        session = self._insightly.session()
+        self.assertRaises(ValueError, session.link, self._organisation(1), 'fetch')
+        self.assertRaises(ValueError, session.delete, "Users", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import threading
+import time
+import unittest
+
+from insightly import InsightlyClient, SingleFlight
+from stubs import StubHTTPService, StubResponse, organisation_json
+
+
+class SingleFlightTestCase(unittest.TestCase):
+
+    def test_concurrent_calls_share_one_result(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow_call():
+            calls.append(1)
+            release.wait()
+            return 'result'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(single_flight.do('key', slow_call)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['result'] * 8)
+        self.assertEqual(single_flight.in_flight(), 0)
+
+    def test_exception_shared_then_retried(self):
+        single_flight = SingleFlight()
+
+        def failing_call():
+            raise ValueError('boom')
+
+        self.assertRaises(ValueError, single_flight.do, 'key', failing_call)
+        self.assertEqual(single_flight.do('key', lambda: 'ok'), 'ok')
+
+
+class CoalescedRequestsTestCase(unittest.TestCase):
+    """
+    Tests for coalescing concurrent identical GETs, run against a stubbed HTTP service.
+    """
+
+    def setUp(self):
+        self.release = threading.Event()
+
+        def handler(method, url, **kwargs):
+            self.release.wait()
+            return StubResponse(200, organisation_json(int(url.rsplit('/', 1)[1])))
+
+        self._http_service = StubHTTPService(handler)
+
+    def _get_concurrently(self, client, ids):
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(client.get_organisation(i))) for i in ids]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_identical_gets_share_one_request(self):
+        client = InsightlyClient('key', http_service=self._http_service)
+        results = self._get_concurrently(client, [1] * 6 + [2] * 4)
+
+        self.assertEqual(len(self._http_service.calls), 2)
+        self.assertEqual(sorted(o.ORGANISATION_ID for o in results), [1] * 6 + [2] * 4)
+        # each caller gets its own objects
+        self.assertEqual(len(set(id(o.TAGS) for o in results)), 10)
+
+    def test_coalescing_can_be_disabled(self):
+        client = InsightlyClient('key', http_service=self._http_service, coalesce=False)
+        self._get_concurrently(client, [1] * 3)
+        self.assertEqual(len(self._http_service.calls), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
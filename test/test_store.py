@@ -0,0 +1,95 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from insightly import InsightlyClient, Contact, LocalStore, Organisation
+from stubs import StubHTTPService, StubResponse, contact_json, organisation_json, paged_handler
+
+
+class LocalStoreTestCase(unittest.TestCase):
+    """
+    Tests for the SQLite local store, filled by listing a stubbed HTTP service.
+    """
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.store = LocalStore(os.path.join(directory, 'insightly.db'))
+        self.addCleanup(self.store.close)
+        organisations = [organisation_json(i, OWNER_USER_ID=i % 3, TAGS=[{'TAG_NAME': 'tag{}'.format(i % 2)}],
+                                           EMAILDOMAINS=[{'EMAIL_DOMAIN_ID': i, 'EMAIL_DOMAIN': 'org{}.com'.format(i)}])
+                         for i in range(1, 1201)]
+        self._http_service = StubHTTPService(paged_handler(organisations, '/Organisations'))
+        self._insightly = InsightlyClient('key', http_service=self._http_service, store=self.store)
+
+    def test_listing_fills_store(self):
+        self._insightly.list_organisations()
+        calls = len(self._http_service.calls)
+
+        organisation = self.store.get_organisation(7)
+        self.assertIsInstance(organisation, Organisation)
+        self.assertEqual(organisation.ORGANISATION_NAME, 'Organisation 7')
+        self.assertIs(organisation.client, self._insightly)
+        self.assertIsNone(self.store.get_organisation(5000))
+        self.assertEqual(self.store.count(Organisation), 1200)
+        self.assertEqual(len(self._http_service.calls), calls)
+
+    def test_filters(self):
+        self._insightly.list_organisations()
+
+        self.assertEqual([o.ORGANISATION_ID for o in self.store.filter(Organisation, name='organisation 12')], [12])
+        self.assertEqual([o.ORGANISATION_ID for o in self.store.filter("Organisations", email_domain='ORG42.com')],
+                         [42])
+        owned = self.store.filter(Organisation, owner_user_id=1, tag='tag0')
+        self.assertEqual([o.ORGANISATION_ID for o in owned][:3], [4, 10, 16])
+        self.assertTrue(all(o.OWNER_USER_ID == 1 for o in owned))
+
+    def test_relisting_replaces_records(self):
+        self._insightly.list_organisations()
+        self._http_service.handler = paged_handler([organisation_json(3, TAGS=[])], '/Organisations')
+        self._insightly.list_organisations()
+
+        self.assertEqual(self.store.filter(Organisation, tag='tag1', name='Organisation 3'), [])
+        self.store.delete(Organisation, [3])
+        self.assertIsNone(self.store.get_organisation(3))
+
+    def test_projected_listings_are_not_stored(self):
+        self._http_service.handler = paged_handler([contact_json(1, EMAIL_ADDRESS='a@example.com')], '/Contacts')
+        self._insightly.list_contacts(fields=['CONTACT_ID'])
+        self.assertEqual(self.store.count(Contact), 0)
+
+        self._insightly.list_contacts()
+        contact, = self.store.filter(Contact, email_domain='example.com', name='First1 Last1')
+        self.assertEqual(contact.EMAIL_ADDRESS, 'a@example.com')
+
+    def test_saves_and_deletes_update_store(self):
+        self._insightly.list_organisations()
+        pages = self._http_service.handler
+
+        def handler(method, url, data=None, **kwargs):
+            if method == 'PUT':
+                return StubResponse(200, json.loads(data))
+            if method == 'DELETE':
+                return StubResponse(202)
+            return pages(method, url, **kwargs)
+
+        self._http_service.handler = handler
+        organisation = self.store.get_organisation(7)
+        organisation.ORGANISATION_NAME = 'Renamed'
+        organisation.save()
+        self.assertEqual(self.store.get_organisation(7).ORGANISATION_NAME, 'Renamed')
+        self.assertEqual(self.store.filter(Organisation, name='organisation 7'), [])
+
+        self._insightly.delete_organisation(8)
+        self._insightly.bulk_delete(Organisation, [9, 10])
+        self.assertEqual([self.store.get_organisation(i) for i in (8, 9, 10)], [None] * 3)
+        self.assertEqual(self.store.count(Organisation), 1197)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from insightly import InsightlyClient, Contact, DeltaSync, SyncState
+from stubs import StubHTTPService, StubResponse, contact_json
+from urllib.parse import unquote
+
+
+class DeltaSyncTestCase(unittest.TestCase):
+    """
+    Tests for incremental sync against a stubbed HTTP service holding a mutable set of contacts.
+    """
+
+    def setUp(self):
+        self.contacts = dict((i, contact_json(i, DATE_UPDATED_UTC='2019-06-07 08:00:00')) for i in range(1, 6))
+
+        def handler(method, url, **kwargs):
+            path, _, query = url.partition('?')
+            params = dict(part.split('=') for part in query.split('&') if part)
+            records = sorted(self.contacts.values(), key=lambda record: record['CONTACT_ID'])
+            if path.endswith('/Contacts/Search'):
+                updated_after = unquote(params['updated_after_utc'])
+                records = [record for record in records if record['DATE_UPDATED_UTC'] > updated_after]
+            elif not path.endswith('/Contacts'):
+                return StubResponse(404, {'error': 'not found'})
+            skip, top = int(params['skip']), int(params['top'])
+            return StubResponse(200, records[skip:skip + top])
+
+        self._http_service = StubHTTPService(handler)
+        self._insightly = InsightlyClient('key', http_service=self._http_service)
+
+    def _update(self, contact_id, timestamp, **values):
+        self.contacts[contact_id] = contact_json(contact_id, DATE_UPDATED_UTC=timestamp, **values)
+
+    def test_first_sync_inserts_everything(self):
+        report = DeltaSync(self._insightly).sync(Contact)
+
+        self.assertEqual([contact.CONTACT_ID for contact in report.inserted], [1, 2, 3, 4, 5])
+        self.assertEqual(report.updated, [])
+        self.assertEqual(report.deleted, [])
+        self.assertEqual(report.watermark, datetime.datetime(2019, 6, 7, 8, 0, 0))
+
+    def test_later_syncs_fetch_only_changes(self):
+        sync = DeltaSync(self._insightly, detect_deletes=True)
+        sync.sync(Contact)
+        self._update(2, '2019-06-07 09:00:00', FIRST_NAME='Renamed')
+        self._update(6, '2019-06-07 09:30:00')
+        del self.contacts[4]
+        del self._http_service.calls[:]
+
+        report = sync.sync("Contacts")
+
+        self.assertEqual([contact.CONTACT_ID for contact in report.inserted], [6])
+        self.assertEqual([contact.FIRST_NAME for contact in report.updated], ['Renamed'])
+        self.assertEqual(report.deleted, [4])
+        self.assertEqual(report.watermark, datetime.datetime(2019, 6, 7, 9, 30, 0))
+        urls = [url for _, url, _ in self._http_service.calls]
+        self.assertIn('/Contacts/Search?updated_after_utc=2019-06-07%2007%3A59%3A59', urls[0])
+        self.assertTrue(urls[-1].endswith('&brief=true'))
+
+    def test_deletes_not_listed_by_default(self):
+        sync = DeltaSync(self._insightly)
+        sync.sync(Contact)
+        del self.contacts[4]
+        del self._http_service.calls[:]
+
+        report = sync.sync(Contact)
+
+        self.assertEqual(report.deleted, [])
+        self.assertTrue(all('/Contacts/Search?' in url for _, url, _ in self._http_service.calls))
+
+    def test_iter_ids(self):
+        self.assertEqual(list(self._insightly.iter_ids(Contact)), [1, 2, 3, 4, 5])
+        self.assertTrue(all(url.endswith('&brief=true') for _, url, _ in self._http_service.calls))
+
+    def test_overlap_does_not_report_changes_twice(self):
+        sync = DeltaSync(self._insightly)
+        sync.sync(Contact)
+        # the records at the watermark are returned again by the overlap
+        report = sync.sync(Contact)
+        self.assertEqual(len(report), 0)
+
+        self._update(3, '2019-06-07 08:00:01', FIRST_NAME='Next second')
+        report = sync.sync(Contact)
+        self.assertEqual([contact.FIRST_NAME for contact in report.updated], ['Next second'])
+        self.assertEqual(len(sync.sync(Contact)), 0)
+
+    def test_state_is_saved_between_runs(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'sync.json')
+        DeltaSync(self._insightly, path=path).sync(Contact)
+
+        state = SyncState.load(path)
+        self.assertEqual(state.watermark("Contacts"), datetime.datetime(2019, 6, 7, 8, 0, 0))
+
+        self._update(5, '2019-06-08 00:00:00')
+        report = DeltaSync(self._insightly, path=path).sync(Contact)
+        self.assertEqual([contact.CONTACT_ID for contact in report.updated], [5])
+        self.assertEqual(report.inserted, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/python
+
+from __future__ import with_statement, print_function
+import threading
+import unittest
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:  # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from insightly import InsightlyClient, PooledHTTPService
+
+
+class _PortRecordingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.client_ports.add(self.client_address[1])
+        body = b'[]'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class PooledHTTPServiceTestCase(unittest.TestCase):
+    """
+    Tests for the pooled HTTP transport, run against a local HTTP server.
+    """
+
+    def setUp(self):
+        self._server = HTTPServer(('127.0.0.1', 0), _PortRecordingHandler)
+        self._server.client_ports = set()
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        self._url = 'http://127.0.0.1:{}/'.format(self._server.server_port)
+
+    def tearDown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def test_default_http_service_is_pooled(self):
+        client = InsightlyClient('key')
+        self.assertIsInstance(client.http_service, PooledHTTPService)
+
+    def test_custom_http_service_is_kept(self):
+        http_service = object()
+        client = InsightlyClient('key', http_service=http_service)
+        self.assertIs(client.http_service, http_service)
+
+    def test_connections_are_reused(self):
+        with PooledHTTPService(pool_maxsize=2) as http_service:
+            for _ in range(5):
+                self.assertEqual(http_service.request('GET', self._url).json(), [])
+        self.assertEqual(len(self._server.client_ports), 1)
+
+    def test_keep_alive_disabled(self):
+        with PooledHTTPService(keep_alive=False) as http_service:
+            for _ in range(3):
+                http_service.request('GET', self._url)
+        self.assertEqual(len(self._server.client_ports), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()